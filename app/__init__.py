@@ -1,5 +1,23 @@
-from .chatbot_manager import ChatbotManager
-from .ui_components import UIComponents
-from .document_processor import DocumentProcessor
+from importlib import import_module
+
+# Submodules are imported on first attribute access (PEP 562), so `import app`
+# does not pull in langchain, FAISS, database drivers or embedding models.
+_EXPORTS = {
+    'ChatbotManager': '.chatbot_manager',
+    'UIComponents': '.ui_components',
+    'DocumentProcessor': '.document_processor',
+}
 
 __all__ = ['ChatbotManager', 'UIComponents', 'DocumentProcessor']
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,266 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage, ToolMessage
+from langchain_core.tools import BaseTool
+
+FINAL_ANSWER_PROMPT = (
+    "The tool budget for this turn is used up. Answer the user now with the "
+    "information gathered so far, and say what could not be checked."
+)
+OUT_OF_TIME_ANSWER = "I ran out of time for this question before I could answer it. Please try again."
+
+
+class ToolResultCache:
+    """LRU cache of tool outputs keyed by tool, scope and normalized arguments.
+
+    Entries expire after the tool's TTL, so identical calls are served from
+    memory within a turn and across turns while the result is still fresh.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: Optional[Dict[str, float]] = None, default_ttl: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl or {}
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(tool: BaseTool, args: Dict[str, Any]) -> Tuple[str, str, str]:
+        scope = str((tool.metadata or {}).get("cache_scope", ""))
+        normalized = {name: value.strip() if isinstance(value, str) else value for name, value in args.items()}
+        return tool.name, scope, json.dumps(normalized, sort_keys=True, default=str)
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Tuple[str, str, str], result: str) -> None:
+        ttl = self.ttl.get(key[0], self.default_ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+@dataclass
+class TurnBudget:
+    """Wall-clock and token limits for one agent turn"""
+    max_seconds: float
+    max_tokens: int
+    max_steps: int
+    reserve_seconds: float = 0.0
+    started: float = field(default_factory=time.monotonic)
+    tokens: int = 0
+    steps: int = 0
+
+    @property
+    def remaining_seconds(self) -> float:
+        return self.max_seconds - (time.monotonic() - self.started)
+
+    @property
+    def step_seconds(self) -> float:
+        """Time left for tool-calling steps; `reserve_seconds` is kept for the final answer."""
+        return self.remaining_seconds - self.reserve_seconds
+
+    def charge(self, message: AIMessage) -> None:
+        usage = getattr(message, "usage_metadata", None) or {}
+        self.tokens += usage.get("total_tokens", 0)
+        self.steps += 1
+
+    def exhausted(self) -> Optional[str]:
+        """Why the turn must stop calling tools, or None while budget remains."""
+        if self.step_seconds <= 0:
+            return "time"
+        if self.tokens >= self.max_tokens:
+            return "tokens"
+        if self.steps >= self.max_steps:
+            return "steps"
+        return None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "seconds": round(time.monotonic() - self.started, 2),
+            "tokens": self.tokens,
+            "steps": self.steps
+        }
+
+
+class AgentRuntime:
+    """Tool-calling agent loop with parallel tool execution.
+
+    Each step is one model call with native tool calling; all tool calls the
+    model requests in that step run concurrently, and their results come back
+    as ToolMessages. The turn ends when the model answers without tools, or
+    when its time, token or step budget runs out, in which case the model is
+    asked once more, without tools, for a final answer.
+
+    Every model call gets a request timeout from the time budget: steps may
+    use the budget minus `final_answer_reserve`, the final answer what is left.
+    """
+
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        tools: Sequence[BaseTool],
+        config: Dict[str, Any],
+        cache: Optional[ToolResultCache] = None
+    ):
+        self.llm = llm
+        self.tools = {tool.name: tool for tool in tools}
+        self.settings = config.get("agent", {})
+        self.cache = cache
+        self.max_parallel_tools = self.settings.get("max_parallel_tools", 4)
+
+    def new_budget(self) -> TurnBudget:
+        max_seconds = self.settings.get("time_budget", 60)
+        return TurnBudget(
+            max_seconds=max_seconds,
+            max_tokens=self.settings.get("token_budget", 12000),
+            max_steps=self.settings.get("max_steps", 8),
+            # Never more than half the budget, so a short budget still leaves time for tools.
+            reserve_seconds=min(self.settings.get("final_answer_reserve", 10), max_seconds / 2)
+        )
+
+    def run(self, messages: List[BaseMessage], run_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run one turn and return `output`, `intermediate_steps` and `budget` usage."""
+        budget = self.new_budget()
+        messages = list(messages)
+        intermediate_steps: List[Tuple[Dict[str, Any], str]] = []
+        model = self.llm.bind_tools(list(self.tools.values())) if self.tools else self.llm
+
+        while True:
+            stop_reason = budget.exhausted()
+            if stop_reason:
+                message = self._final_answer(messages, budget, run_config)
+                break
+            try:
+                message = model.invoke(messages, run_config, timeout=budget.step_seconds)
+            except Exception:
+                # A call failing once the step time is gone is the request timeout.
+                if budget.exhausted() != "time":
+                    raise
+                continue
+            budget.charge(message)
+            messages.append(message)
+            if not message.tool_calls:
+                break
+
+            results = self._run_tools(message.tool_calls, budget, run_config)
+            for call, result in zip(message.tool_calls, results):
+                messages.append(ToolMessage(content=result, tool_call_id=call["id"], name=call["name"]))
+                intermediate_steps.append((call, result))
+
+        return {
+            "output": message.content,
+            "intermediate_steps": intermediate_steps,
+            "budget": {**budget.summary(), "stop_reason": stop_reason}
+        }
+
+    def _final_answer(
+        self, messages: List[BaseMessage], budget: TurnBudget, run_config: Optional[Dict[str, Any]]
+    ) -> AIMessage:
+        """Ask the model, without tools, to answer within the time that is left."""
+        if budget.remaining_seconds > 0:
+            try:
+                message = self.llm.invoke(
+                    messages + [SystemMessage(content=FINAL_ANSWER_PROMPT)], run_config, timeout=budget.remaining_seconds
+                )
+                budget.charge(message)
+                return message
+            except Exception:
+                if budget.remaining_seconds > 0:
+                    raise
+        return AIMessage(content=OUT_OF_TIME_ANSWER)
+
+    def _run_tools(
+        self, tool_calls: List[Dict[str, Any]], budget: TurnBudget, run_config: Optional[Dict[str, Any]]
+    ) -> List[str]:
+        """Execute one step's tool calls concurrently, serving repeats from the cache.
+
+        Calls still running when the turn's step time runs out are reported as
+        timed out; their threads finish in the background.
+        """
+        results: List[Optional[str]] = [None] * len(tool_calls)
+        pending: Dict[Any, int] = {}
+        first_call: Dict[Tuple[str, str, str], int] = {}
+        duplicates: List[Tuple[int, int]] = []
+
+        executor = ThreadPoolExecutor(max_workers=self.max_parallel_tools, thread_name_prefix="agent-tool")
+        try:
+            for i, call in enumerate(tool_calls):
+                tool = self.tools.get(call["name"])
+                if tool is None:
+                    results[i] = f"Unknown tool {call['name']!r}. Available tools: {', '.join(self.tools)}"
+                    continue
+                key = ToolResultCache.key(tool, call["args"])
+                if key in first_call:
+                    duplicates.append((i, first_call[key]))
+                    continue
+                first_call[key] = i
+                cached = self.cache.get(key) if self.cache else None
+                if cached is not None:
+                    results[i] = cached
+                    continue
+                pending[executor.submit(self._invoke_tool, tool, call["args"], key, run_config)] = i
+
+            done, not_done = wait(pending, timeout=max(budget.step_seconds, 0))
+            for future in done:
+                results[pending[future]] = future.result()
+            for future in not_done:
+                future.cancel()
+                results[pending[future]] = "The tool did not finish within this turn's time budget."
+        finally:
+            executor.shutdown(wait=False)
+
+        for i, source in duplicates:
+            results[i] = results[source]
+        return results
+
+    def _invoke_tool(
+        self, tool: BaseTool, args: Dict[str, Any], key: Tuple[str, str, str], run_config: Optional[Dict[str, Any]]
+    ) -> str:
+        try:
+            result = str(tool.invoke(args, run_config))
+        except Exception as e:
+            # Failures are returned to the model as observations and never cached.
+            return f"{tool.name} failed: {e}"
+        if self.cache:
+            self.cache.put(key, result)
+        return result
+
+
+_tool_cache: Optional[ToolResultCache] = None
+_tool_cache_lock = threading.Lock()
+
+
+def get_tool_cache(config: Dict[str, Any]) -> ToolResultCache:
+    """Return the process-wide tool result cache configured by `agent.tool_cache`."""
+    global _tool_cache
+    with _tool_cache_lock:
+        if _tool_cache is None:
+            settings = config.get("agent", {}).get("tool_cache", {})
+            _tool_cache = ToolResultCache(
+                max_entries=settings.get("max_entries", 256),
+                ttl=settings.get("ttl", {}),
+                default_ttl=settings.get("default_ttl", 600)
+            )
+        return _tool_cache
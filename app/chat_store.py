@@ -0,0 +1,137 @@
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+
+class ChatStore:
+    """Append-only SQLite (WAL) store of chat messages, keyed by session ID.
+
+    Each message gets a per-session sequence number, so appending is one
+    insert and any window of a conversation is a primary-key range read.
+    """
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY, message_count INTEGER NOT NULL,
+                    created_at TEXT, updated_at TEXT
+                )
+            """)
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    session_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL,
+                    content TEXT NOT NULL, created_at TEXT,
+                    PRIMARY KEY (session_id, seq)
+                ) WITHOUT ROWID
+            """)
+
+    def append(self, session_id: str, role: str, content: str) -> int:
+        """Append one message and return its sequence number."""
+        now = datetime.now().isoformat()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT message_count FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            seq = row[0] if row else 0
+            self._connection.execute(
+                "INSERT INTO messages (session_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                (session_id, seq, role, content, now)
+            )
+            self._connection.execute(
+                """
+                INSERT INTO sessions (session_id, message_count, created_at, updated_at) VALUES (?, 1, ?, ?)
+                ON CONFLICT (session_id) DO UPDATE SET message_count = message_count + 1, updated_at = excluded.updated_at
+                """,
+                (session_id, now, now)
+            )
+        return seq
+
+    def count(self, session_id: str) -> int:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT message_count FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def range(self, session_id: str, start: int, end: int) -> List[Dict[str, str]]:
+        """Messages with `start <= seq < end`, oldest first."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (session_id, start, end)
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+    def window(self, session_id: str, limit: int) -> List[Dict[str, str]]:
+        """The last `limit` messages of a session, oldest first."""
+        end = self.count(session_id)
+        return self.range(session_id, max(end - limit, 0), end)
+
+    def clear(self, session_id: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._connection.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def sessions(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT session_id, message_count, created_at, updated_at FROM sessions ORDER BY updated_at DESC"
+            ).fetchall()
+        return [
+            {"session_id": sid, "message_count": count, "created_at": created, "updated_at": updated}
+            for sid, count, created, updated in rows
+        ]
+
+
+class ChatStoreHistory(BaseChatMessageHistory):
+    """LangChain message history backed by a ChatStore.
+
+    Reads return only the last `window` messages, so memory use does not grow
+    with the length of the conversation.
+    """
+
+    ROLES = {"user": HumanMessage, "assistant": AIMessage}
+
+    def __init__(self, store: ChatStore, session_id: str, window: int = 20):
+        self.store = store
+        self.session_id = session_id
+        self.window = window
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return [
+            self.ROLES.get(message["role"], HumanMessage)(content=message["content"])
+            for message in self.store.window(self.session_id, self.window)
+        ]
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        for message in messages:
+            role = "assistant" if isinstance(message, AIMessage) else "user"
+            self.store.append(self.session_id, role, message.content)
+
+    def clear(self) -> None:
+        self.store.clear(self.session_id)
+
+
+_store: Optional[ChatStore] = None
+_store_lock = threading.Lock()
+
+
+def get_chat_store(config: Dict[str, Any]) -> ChatStore:
+    """Return the process-wide chat store at `chat_history.db_path`."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ChatStore(Path(config.get("chat_history", {}).get("db_path", "data/chat_history.db")))
+        return _store
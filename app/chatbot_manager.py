@@ -1,22 +1,50 @@
-from langchain import hub
-from langchain.agents import AgentExecutor, Tool, create_react_agent
+from langchain.agents import Tool
 from langchain.memory import ConversationBufferMemory
-from langchain_community.chat_message_histories import StreamlitChatMessageHistory
-from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
 from langchain_groq import ChatGroq
 from langchain.prompts import ChatPromptTemplate, PromptTemplate
-from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.messages import AIMessage, HumanMessage
-from typing import Dict, Any, List
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.tools import ToolException
+from pydantic import BaseModel, Field
+from typing import TYPE_CHECKING, Callable, Dict, Any, List, Optional
+import hashlib
+import json
 import re
 import os
 
+from .agent_runtime import AgentRuntime, get_tool_cache
+from .chat_store import ChatStoreHistory, get_chat_store
+from .embeddings import get_embeddings
+from .parent_retrieval import ParentExpander
+from .prompt_packer import PromptPacker
+from .reranker import get_reranker
+from .speculative import SpeculativeAnswerer, speculation_stats
+from .tag_stream import TagStreamParser
+
+if TYPE_CHECKING:
+    from config import AppConfig
+    from .metadata_filter import DocumentFilter
+
+
+class ToolQuery(BaseModel):
+    query: str = Field(description="The search query or question for the tool")
+
 class ChatbotManager:
-    def __init__(self, api_keys: dict, config: Dict[str, Any]):
-        """Initialize the ChatbotManager with API keys and configuration."""
+    def __init__(
+        self,
+        api_keys: dict,
+        config: "AppConfig",
+        db_manager: Optional[Any] = None,
+        session_id: str = "default"
+    ):
+        """Initialize the ChatbotManager with API keys and configuration.
+
+        Conversation history is persisted in the chat store under `session_id`.
+        """
         self.api_keys = api_keys
         self.config = config
+        self.db_manager = db_manager
+        self.session_id = session_id
         self.tracing_enabled = os.getenv("LANGCHAIN_TRACING_V2", "false").lower() == "true"
         self._setup_memory()
         self.model = "llama-3.3-70b-versatile"
@@ -24,10 +52,16 @@ class ChatbotManager:
         self.tools = self._initialize_tools()
         self.model_selector_agent = self._create_model_selector_agent()
         self.chat_history = []
+        self.prompt_packer = PromptPacker(config)
+        self.last_token_usage: Dict[str, int] = {}
 
     def _setup_memory(self) -> None:
         """Setup conversation memory with proper configuration."""
-        self.msgs = StreamlitChatMessageHistory(key="langchain_messages")
+        self.msgs = ChatStoreHistory(
+            get_chat_store(self.config),
+            self.session_id,
+            window=self.config.get('chat_history', {}).get('prompt_window', 20)
+        )
         self.memory = ConversationBufferMemory(
             chat_memory=self.msgs,
             return_messages=True,
@@ -59,34 +93,121 @@ class ChatbotManager:
 
     def _initialize_tools(self) -> List[Tool]:
         """Initialize and configure available tools."""
-        search = DuckDuckGoSearchAPIWrapper(
-            max_results=5,
-            time='d',
-            safesearch='moderate'
-        )
-        
+        search = None
+
         def search_with_fallback(*args, **kwargs) -> str:
             """Wrapper function to handle rate limiting."""
+            nonlocal search
+            if search is None:
+                from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+
+                search = DuckDuckGoSearchAPIWrapper(
+                    max_results=5,
+                    time='d',
+                    safesearch='moderate'
+                )
             try:
                 return search.run(*args, **kwargs)
             except Exception as e:
                 if "Ratelimit" in str(e):
-                    return (
+                    # Raised rather than returned so the agent runtime does not cache it.
+                    raise ToolException(
                         "I apologize, but I'm currently rate-limited from performing web searches. "
                         "I'll try to answer based on my existing knowledge. If you need specific "
                         "current information, please try again in a few minutes."
                     )
                 raise e
 
-        return [
+        tools = [
             Tool(
-                name="Web Search",
+                name="web_search",
                 func=search_with_fallback,
                 description="Useful for finding current information from the web. Use for specific queries about current events, facts, or general knowledge.",
+                args_schema=ToolQuery,
                 return_direct=False
             )
         ]
 
+        sql_tool = self._create_sql_tool()
+        if sql_tool:
+            tools.append(sql_tool)
+        nosql_tool = self._create_nosql_tool()
+        if nosql_tool:
+            tools.append(nosql_tool)
+        return tools
+
+    def _create_sql_tool(self) -> Optional[Tool]:
+        """Expose the connected SQL database to the agent, if there is one."""
+        if not self.db_manager or not self.db_manager.is_connected:
+            return None
+        from .database_manager import SQLDatabaseManager
+        from .sql_tool import SQLQueryTool
+
+        manager = self.db_manager.manager
+        if not isinstance(manager, SQLDatabaseManager):
+            return None
+
+        sql_config = self.config.get('sql_tool', {})
+        sql_llm = ChatGroq(
+            api_key=self.api_keys['groq_api_key'],
+            model=sql_config.get('model', "llama-3.3-70b-versatile"),
+            streaming=False,
+            temperature=0,
+            max_tokens=512
+        )
+        embeddings = get_embeddings(sql_config.get('embedding_model', "sentence-transformers/all-MiniLM-L6-v2"))
+        sql_query_tool = SQLQueryTool(manager, sql_llm, embeddings, sql_config)
+        return Tool(
+            name="sql_database",
+            func=sql_query_tool.run,
+            args_schema=ToolQuery,
+            # Cached results are only shared between managers connected to the same database.
+            metadata={"cache_scope": str(manager.engine.url)},
+            description=(
+                f"Answers questions about data in the connected {manager.database_type} database. "
+                "Input should be a natural-language question; the tool writes and runs a read-only SQL query."
+            ),
+            return_direct=False
+        )
+
+    def _create_nosql_tool(self) -> Optional[Tool]:
+        """Expose a connected MongoDB database to the agent for read-only find queries."""
+        if not self.db_manager or not self.db_manager.is_connected or self.db_manager.database_type != "mongodb":
+            return None
+
+        nosql_config = self.config.get('nosql_tool', {})
+        max_documents = nosql_config.get('max_documents', 20)
+
+        def find(query: str) -> str:
+            try:
+                query_params = json.loads(query)
+            except json.JSONDecodeError as e:
+                raise ToolException(f"Input must be a JSON object: {e}")
+            if not isinstance(query_params, dict) or 'collection' not in query_params:
+                raise ToolException("Input must be a JSON object with a 'collection' key")
+            # Read-only: whatever the model asks for, only a bounded find is run.
+            query_params['operation'] = 'find'
+            query_params['limit'] = min(int(query_params.get('limit', max_documents)), max_documents)
+            # Runs on the shared async loop, so parallel tool calls overlap their round trips.
+            future = self.db_manager.submit_query(json.dumps(query_params))
+            documents = future.result(timeout=nosql_config.get('timeout', 15))
+            return json.dumps(documents, default=str)[:nosql_config.get('max_chars', 4000)]
+
+        return Tool(
+            name="nosql_database",
+            func=find,
+            args_schema=ToolQuery,
+            # Scoped by a hash of the connection settings, which may hold credentials.
+            metadata={"cache_scope": hashlib.sha1(
+                json.dumps(self.db_manager.connection_params, sort_keys=True, default=str).encode()
+            ).hexdigest()},
+            description=(
+                "Reads documents from the connected MongoDB database. Input must be a JSON object: "
+                '{"database": "...", "collection": "...", "filter": {...}, "projection": {...}, "limit": 10}.'
+            ),
+            return_direct=False
+        )
+
     def _create_model_selector_agent(self) -> Any:
         """Create the model selection agent."""
         selector_llm = ChatGroq(
@@ -112,10 +233,26 @@ class ChatbotManager:
         
         return model_selection_prompt | selector_llm
 
-    def get_response(self, user_input: str, cfg: Dict[str, Any]) -> Dict[str, Any]:
-        """Get a response from the chatbot using the appropriate model."""
+    def get_response(
+        self, user_input: str, cfg: Dict[str, Any], on_update: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """Get a response from the chatbot using the appropriate model.
+
+        With `speculative_draft.enabled`, quick lookups skip the selector and
+        agent: a fast draft is streamed through `on_update` while the strong
+        model answers concurrently.
+        """
         try:
             task_type = self._determine_task_type(user_input)
+
+            if task_type == "quick_lookup" and self.config.get('speculative_draft', {}).get('enabled'):
+                try:
+                    return self._speculative_response(user_input, on_update)
+                except Exception as e:
+                    if on_update:
+                        on_update("")
+                    if "Ratelimit" not in str(e):
+                        raise e
             
             try:
                 selection_response = self.model_selector_agent.invoke({
@@ -134,34 +271,21 @@ class ChatbotManager:
             model_match = re.search(r'<model>(.*?)</model>', selection_text)
             reasoning_match = re.search(r'<reasoning>(.*?)</reasoning>', selection_text)
             
-            selected_model = model_match.group(1) if model_match else "llama-3.3-70b-versatile"
+            selected_model = model_match.group(1).strip() if model_match else ""
+            if selected_model not in self.config.models:
+                selected_model = self.config.route('task_type', task_type, "llama-3.3-70b-versatile")
             reasoning = reasoning_match.group(1) if reasoning_match else ""
             
             if selected_model != self.model:
                 self.llm = self._initialize_llm(selected_model)
             
-            react_agent = create_react_agent(
-                self.llm,
-                self.tools,
-                hub.pull("hwchase17/react-chat")
-            )
-            
-            agent_executor = AgentExecutor(
-                agent=react_agent,
-                tools=self.tools,
-                memory=self.memory,
-                handle_parsing_errors=True,
-                max_iterations=8,
-                early_stopping_method="force",
-                verbose=True,
-                return_intermediate_steps=True
-            )
-            
-            response = agent_executor.invoke(
-                {
-                    "input": user_input.strip(),
-                    "chat_history": self.memory.chat_memory.messages if self.memory else []
-                },
+            runtime = AgentRuntime(self.llm, self.tools, self.config, cache=get_tool_cache(self.config))
+            response = runtime.run(
+                [
+                    SystemMessage(content=self.config.get('system_prompt', {}).get('value', "")),
+                    *(self.memory.chat_memory.messages if self.memory else []),
+                    HumanMessage(content=user_input.strip())
+                ],
                 cfg
             )
             
@@ -174,8 +298,91 @@ class ChatbotManager:
         except Exception as e:
             return self._handle_error("response", str(e))
 
-    def document_retrieval(self, vector_store: Any, input_query: str) -> Dict[str, str]:
-        """Enhanced RAG implementation for document retrieval and response generation."""
+    def _speculative_response(self, user_input: str, on_update: Optional[Callable[[str], None]]) -> Dict[str, Any]:
+        """Answer a quick lookup with a fast draft, upgraded to the strong model's answer if they disagree."""
+        settings = self.config.get('speculative_draft', {})
+
+        def direct_llm(model: str) -> ChatGroq:
+            return ChatGroq(
+                api_key=self.api_keys['groq_api_key'],
+                model=model,
+                streaming=True,
+                callbacks=self._get_callbacks() if self.tracing_enabled else None
+            )
+
+        answerer = SpeculativeAnswerer(
+            fast_llm=direct_llm(settings.get('draft_model', "llama-3.1-8b-instant")),
+            strong_llm=direct_llm(settings.get('target_model', "llama-3.3-70b-versatile")),
+            embeddings=get_embeddings(settings.get('embedding_model', "sentence-transformers/all-MiniLM-L6-v2")),
+            threshold=settings.get('agreement_threshold', 0.85)
+        )
+        history = self.memory.chat_memory.messages[-settings.get('history_messages', 6):] if self.memory else []
+        messages = [
+            SystemMessage(content=self.config.get('system_prompt', {}).get('value', "")),
+            *history,
+            HumanMessage(content=user_input)
+        ]
+        result = answerer.answer(messages, on_update)
+
+        stats = speculation_stats.snapshot()
+        reasoning = (
+            f"Fast draft replaced (agreement {result.similarity:.2f})" if result.upgraded
+            else f"Fast draft kept (agreement {result.similarity:.2f})"
+        ) + f"; upgrade rate {stats['upgrade_rate']:.0%} over {stats['drafts']} lookups"
+        output = self._format_response(result.output, result.model, reasoning)
+        self._update_chat_history(user_input, output)
+        return {"output": output, "speculation": result}
+
+    def cot_response(
+        self, user_input: str, on_section: Optional[Callable[[Optional[str], str], None]] = None
+    ) -> Dict[str, Any]:
+        """Answer with the chain-of-thought reflection prompt, streaming tagged sections as they arrive.
+
+        `on_section(tag, text)` receives each new piece of text with the
+        `cot_reflection.tags` section it belongs to (None outside any tag).
+        """
+        try:
+            cot_config = self.config['cot_reflection']
+            slider = self.config.sliders.get('max_tokens_slider_cot_reflection')
+            max_tokens = int(slider.value) if slider else 4096
+            messages = [
+                SystemMessage(content=cot_config['value']),
+                *(self.memory.chat_memory.messages if self.memory else []),
+                HumanMessage(content=user_input)
+            ]
+
+            parser = TagStreamParser(cot_config.get('tags', {}))
+            sections: Dict[Optional[str], List[str]] = {}
+
+            def route(events: List[Any]) -> None:
+                for section, text in events:
+                    sections.setdefault(section, []).append(text)
+                    if on_section:
+                        on_section(section, text)
+
+            for chunk in self.llm.bind(max_tokens=max_tokens).stream(messages):
+                route(parser.feed(chunk.content))
+            route(parser.close())
+
+            # Like the original regex version, fall back to the untagged text when there is no <output>.
+            output = "".join(sections.get("output", [])).strip() or "".join(sections.get(None, [])).strip()
+            output = self._format_response(output, self.model, "Chain-of-thought reflection")
+            self._update_chat_history(user_input, output)
+            return {
+                "output": output,
+                "sections": {section: "".join(parts).strip() for section, parts in sections.items() if section}
+            }
+
+        except Exception as e:
+            return self._handle_error("cot_reflection", str(e))
+
+    def document_retrieval(
+        self, vector_store: Any, input_query: str, doc_filter: Optional["DocumentFilter"] = None
+    ) -> Dict[str, str]:
+        """Enhanced RAG implementation for document retrieval and response generation.
+
+        `doc_filter` restricts the search to matching chunks inside the index search.
+        """
         try:
             template = """
             You are a helpful AI assistant. Answer the question based on the provided context.
@@ -184,7 +391,7 @@ class ChatbotManager:
             1. Use ONLY information from the provided context
             2. If the answer isn't in the context, say "I cannot find this information in the provided documents"
             3. If you need more context, say "I would need additional context to fully answer this question"
-            4. When citing information, specify the source document and page number
+            4. When citing information, specify the source document and page number, or the timestamp range for audio transcripts
             5. If the context contains code, format it properly using markdown
             6. Keep responses clear and well-structured
             7. If multiple documents provide conflicting information, acknowledge this and explain the differences
@@ -204,7 +411,7 @@ class ChatbotManager:
             [Your detailed answer here]
             
             SOURCES:
-            [List the source documents and page numbers used]
+            [List the source documents and page numbers or timestamps used]
             
             CONFIDENCE:
             [High/Medium/Low - Based on the completeness and relevance of the context]
@@ -215,30 +422,51 @@ class ChatbotManager:
             
             prompt = ChatPromptTemplate.from_template(template)
 
-            retriever = vector_store.as_retriever(
-                search_type="mmr",
-                search_kwargs={
-                    "k": 4,
-                    "fetch_k": 8,
-                    "lambda_mult": 0.7
-                }
-            )
+            packer_config = self.config.get('prompt_packer', {})
+            rerank_config = self.config.get('reranker', {})
+            candidate_k = packer_config.get('candidate_k', 24)
+            if rerank_config.get('enabled'):
+                candidate_k = rerank_config.get('candidate_k', 48)
+            search_kwargs = {
+                "k": candidate_k,
+                "fetch_k": candidate_k * 2,
+                "lambda_mult": self.config.get('document_processing', {}).get('mmr_lambda', 0.7)
+            }
+            if doc_filter is not None and not doc_filter.is_empty:
+                search_kwargs["filter"] = doc_filter
 
-            rag_chain = (
-                {
-                    "context": retriever,
-                    "question": RunnablePassthrough(),
-                    "chat_history": lambda x: self._format_chat_history()
-                }
-                | prompt
-                | self.llm
-                | StrOutputParser()
+            # MMR picks a diverse set; each pick keeps its own relevance score, not its MMR rank.
+            candidates = vector_store.max_marginal_relevance_search_with_relevance_scores(input_query, **search_kwargs)
+            if rerank_config.get('enabled') and candidates:
+                # Only the best few chunks by cross-encoder score reach the prompt.
+                reranker = get_reranker(
+                    rerank_config.get('model', "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+                    rerank_config.get('max_length', 512),
+                    rerank_config.get('cache_size', 4096)
+                )
+                scored_documents = reranker.rerank(
+                    input_query, [doc for doc, _ in candidates], rerank_config.get('top_n', 6), rerank_config.get('min_score')
+                )
+            else:
+                # The packer adds them by descending relevance while the model's window allows.
+                scored_documents = candidates
+            parent_config = self.config.get('document_processing', {}).get('parent_retrieval', {})
+            if parent_config.get('enabled'):
+                scored_documents = ParentExpander(parent_config).expand(vector_store, scored_documents)
+            packed = self.prompt_packer.pack(
+                self.model, template, input_query, scored_documents, self._format_chat_history(limit=None)
             )
 
-            response = rag_chain.invoke(input_query)
+            rag_chain = prompt | self.llm | StrOutputParser()
+            response = rag_chain.invoke({
+                "context": packed.context,
+                "question": input_query,
+                "chat_history": "\n".join(f"{m['role']}: {m['content']}" for m in packed.chat_history)
+            })
             self._update_chat_history(input_query, response)
-            
-            return {"output": response}
+            self.last_token_usage = packed.token_usage
+
+            return {"output": response, "token_usage": packed.token_usage}
 
         except Exception as e:
             return self._handle_error("document_retrieval", str(e))
@@ -263,13 +491,14 @@ class ChatbotManager:
             model_info += f"\n**Reasoning:** {reasoning}"
         return formatted_response + model_info
 
-    def _format_chat_history(self) -> List[Dict[str, str]]:
-        """Format chat history for the prompt."""
+    def _format_chat_history(self, limit: Optional[int] = 5) -> List[Dict[str, str]]:
+        """Format the last `limit` history messages (all of them with `limit=None`) for the prompt."""
         if not self.memory or not self.memory.chat_memory.messages:
             return []
         
         formatted_history = []
-        for msg in self.memory.chat_memory.messages[-5:]:  
+        messages = self.memory.chat_memory.messages
+        for msg in (messages[-limit:] if limit else messages):
             if isinstance(msg, (HumanMessage, AIMessage)):
                 formatted_history.append({
                     "role": "user" if isinstance(msg, HumanMessage) else "assistant",
@@ -298,13 +527,5 @@ class ChatbotManager:
 
     @property
     def model_specs(self) -> str:
-        """Get formatted model specifications from config."""
-        model_details = []
-        for model, details in self.config['models'].items():
-            spec = f"- {model}:\n"
-            spec += f"  Description: {details['description'].strip()}\n"
-            spec += f"  Use cases: {', '.join(details['use_case'])}\n"
-            spec += f"  Context window: {details['context_window']} tokens\n"
-            model_details.append(spec)
-        
-        return "\n".join(model_details)
\ No newline at end of file
+        """Formatted model specifications, precomputed when the config is loaded."""
+        return self.config.model_specs
@@ -0,0 +1,115 @@
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from langchain_core.documents import Document
+
+from .metadata_filter import DocumentFilter, search_index
+
+
+class ConcurrentFAISS(FAISS):
+    """FAISS store that can be searched while a background worker appends to it.
+
+    Embedding happens outside the lock; only the index/docstore mutation and
+    the index reads are serialized, so searches wait at most for one batch insert.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.RLock()
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        embeddings = self._embed_documents(texts)
+        return self.add_embeddings(zip(texts, embeddings), metadatas=metadatas, ids=ids, **kwargs)
+
+    def add_embeddings(self, *args: Any, **kwargs: Any) -> List[str]:
+        with self.lock:
+            return super().add_embeddings(*args, **kwargs)
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[Any] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        with self.lock:
+            if not isinstance(filter, DocumentFilter):
+                return super().similarity_search_with_score_by_vector(embedding, k=k, filter=filter, **kwargs)
+            vector = np.array([embedding], dtype=np.float32)
+            if self._normalize_L2:
+                faiss.normalize_L2(vector)
+            scores, indices = search_index(self, vector, k, filter)
+            return [
+                (self.docstore.search(self.index_to_docstore_id[int(i)]), float(score))
+                for score, i in zip(scores[0], indices[0]) if i != -1
+            ]
+
+    def max_marginal_relevance_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        *,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Any] = None
+    ) -> List[Tuple[Document, float]]:
+        with self.lock:
+            if not isinstance(filter, DocumentFilter):
+                return super().max_marginal_relevance_search_with_score_by_vector(
+                    embedding, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=filter
+                )
+            vector = np.array([embedding], dtype=np.float32)
+            if self._normalize_L2:
+                faiss.normalize_L2(vector)
+            scores, indices = search_index(self, vector, fetch_k, filter)
+            rows = [(int(i), float(score)) for score, i in zip(scores[0], indices[0]) if i != -1]
+            selected = maximal_marginal_relevance(
+                vector, [self.index.reconstruct(i) for i, _ in rows], k=k, lambda_mult=lambda_mult
+            )
+            return [(self.docstore.search(self.index_to_docstore_id[rows[j][0]]), rows[j][1]) for j in selected]
+
+    def max_marginal_relevance_search_with_relevance_scores(
+        self, query: str, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5, filter: Optional[Any] = None
+    ) -> List[Tuple[Document, float]]:
+        """MMR selection, each document paired with its relevance to the query (higher is better)."""
+        vector = np.array([self._embed_query(query)], dtype=np.float32)
+        if self._normalize_L2:
+            # FAISS's own MMR search does not normalize the query like its similarity search does.
+            faiss.normalize_L2(vector)
+        relevance = self._select_relevance_score_fn()
+        return [
+            (doc, relevance(distance))
+            for doc, distance in self.max_marginal_relevance_search_with_score_by_vector(
+                vector[0].tolist(), k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=filter
+            )
+        ]
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        with self.lock:
+            # Deleting renumbers the FAISS rows, so the metadata bitmaps are rebuilt on next use.
+            self.__dict__.pop("metadata_index", None)
+            return super().delete(ids, **kwargs)
+
+    def merge_from(self, target: FAISS) -> None:
+        with self.lock:
+            super().merge_from(target)
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        with self.lock:
+            return super().get_by_ids(ids)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state.pop("lock")
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
@@ -1,12 +1,136 @@
-from typing import Any, Dict
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import MongoClient
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http import models as qdrant_models
+import asyncio
+import concurrent.futures
+import hashlib
 import json
-from sqlalchemy import create_engine
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+import pyarrow as pa
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.pool import QueuePool
 from datetime import datetime
 
 
+class QueryCancelled(Exception):
+    """Raised when a streaming query is cancelled by the caller."""
+
+
+class QueryStream:
+    """Iterate over a SQL result as fixed-size Arrow record batches.
+
+    Rows are fetched through a server-side cursor, so only one batch is held in
+    memory at a time. Iteration stops once `max_rows` or `max_bytes` is reached
+    (setting `truncated`), and `cancel()` may be called from another thread.
+    """
+
+    def __init__(
+        self,
+        connection: Any,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        on_close: Optional[Any] = None
+    ):
+        self.connection = connection
+        self.query = query
+        self.params = params or {}
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.columns: List[str] = []
+        self.rows_read = 0
+        self.bytes_read = 0
+        self.truncated = False
+        self._on_close = on_close
+        self._cancelled = threading.Event()
+        self._closed = False
+
+    def __iter__(self) -> Iterator[pa.RecordBatch]:
+        try:
+            result = self.connection.execution_options(
+                stream_results=True,
+                yield_per=self.batch_size
+            ).execute(text(self.query), self.params)
+            if not result.returns_rows:
+                return
+            self.columns = list(result.keys())
+
+            for partition in result.partitions(self.batch_size):
+                if self._cancelled.is_set():
+                    raise QueryCancelled("Query cancelled")
+
+                if self.max_rows is not None and self.rows_read + len(partition) > self.max_rows:
+                    partition = partition[:self.max_rows - self.rows_read]
+                    self.truncated = True
+
+                batch = self._to_record_batch(partition)
+                self.rows_read += batch.num_rows
+                self.bytes_read += batch.nbytes
+                yield batch
+
+                if self.max_bytes is not None and self.bytes_read >= self.max_bytes:
+                    self.truncated = True
+                if self.max_rows is not None and self.rows_read >= self.max_rows and not self.truncated:
+                    self.truncated = result.fetchone() is not None
+                if self.truncated:
+                    break
+            result.close()
+        finally:
+            self.close()
+
+    def read_all(self) -> pa.Table:
+        """Consume the stream into a single Arrow table (still bounded by the caps)."""
+        batches = list(self)
+        if not batches:
+            return pa.table({column: [] for column in self.columns})
+        return pa.Table.from_batches(batches)
+
+    def cancel(self) -> None:
+        """Stop the stream; also asks the driver to abort the running statement when supported."""
+        self._cancelled.set()
+        try:
+            driver_connection = self.connection.connection.driver_connection
+            for method in ("cancel", "interrupt"):
+                if hasattr(driver_connection, method):
+                    getattr(driver_connection, method)()
+                    break
+        except Exception:
+            pass
+
+    def __enter__(self) -> "QueryStream":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            if self._on_close:
+                self._on_close()
+
+    def _to_record_batch(self, rows: List[Any]) -> pa.RecordBatch:
+        columns = list(zip(*rows)) if rows else [[] for _ in self.columns]
+        arrays = []
+        for values in columns:
+            try:
+                arrays.append(pa.array(values))
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                arrays.append(pa.array([None if v is None else str(v) for v in values], type=pa.string()))
+        return pa.RecordBatch.from_arrays(arrays, names=self.columns)
+
+
 class DatabaseManager:
     def __init__(self, database_type: str, connection_params: Dict[str, Any]):
         self.database_type = database_type.lower()
@@ -38,8 +162,8 @@ class DatabaseManager:
             if "url" not in params and "host" not in params:
                 raise ValueError("MongoDB requires either url or host parameter")
         elif self.database_type == "qdrant":
-            if "url" not in params:
-                raise ValueError("Qdrant requires url parameter")
+            if "url" not in params and "path" not in params:
+                raise ValueError("Qdrant requires url or path parameter")
 
     def create_connection(self):
         try:
@@ -56,7 +180,12 @@ class DatabaseManager:
 
     @property
     def is_connected(self) -> bool:
-        return self._manager.connection is not None
+        return self._manager.is_connected
+
+    @property
+    def manager(self) -> Any:
+        """The SQL or NoSQL manager doing the actual work."""
+        return self._manager
 
     def get_connection_info(self) -> Dict[str, Any]:
         return {
@@ -64,9 +193,28 @@ class DatabaseManager:
             "type": self.database_type,
             "last_error": self.last_error,
             "connected_since": self.connection_timestamp,
-            "is_connected": self.is_connected
+            "is_connected": self.is_connected,
+            "pool": self._manager.pool_status() if isinstance(self._manager, SQLDatabaseManager) else {}
         }
 
+    async def aquery(self, query: str) -> Any:
+        """Run a MongoDB / Qdrant query asynchronously."""
+        if not isinstance(self._manager, NoSQLDatabaseManager):
+            raise ValueError(f"Async queries are not supported for {self.database_type}")
+        return await self._manager.aquery(query)
+
+    def submit_query(self, query: str) -> "concurrent.futures.Future":
+        """Start a MongoDB / Qdrant query in the background and return a future."""
+        if not isinstance(self._manager, NoSQLDatabaseManager):
+            raise ValueError(f"Async queries are not supported for {self.database_type}")
+        return self._manager.submit(query)
+
+    def stream_query(self, query: str, **kwargs: Any) -> "QueryStream":
+        """Stream a SQL query as Arrow batches; see `SQLDatabaseManager.stream_query`."""
+        if not isinstance(self._manager, SQLDatabaseManager):
+            raise ValueError(f"Streaming queries are not supported for {self.database_type}")
+        return self._manager.stream_query(query, **kwargs)
+
     def disconnect(self):
         """Explicitly disconnect from the database."""
         try:
@@ -79,39 +227,115 @@ class DatabaseManager:
             raise
 
 
+class EngineRegistry:
+    """Process-wide SQLAlchemy engines, one connection pool per database target.
+
+    Engines are keyed by the normalized connection URL (credentials included),
+    reference-counted across sessions and disposed when the last one releases.
+    """
+
+    def __init__(self, pool_size: int = 5, max_overflow: int = 10, pool_timeout: int = 30, pool_recycle: int = 1800):
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self.pool_recycle = pool_recycle
+        self._engines: Dict[str, Engine] = {}
+        self._refcounts: Dict[str, int] = {}
+        self._waits: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(connection_string: str) -> str:
+        url = make_url(connection_string)
+        if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:":
+            url = url.set(database=os.path.abspath(url.database))
+        return url.render_as_string(hide_password=False)
+
+    def acquire(self, connection_string: str) -> Tuple[str, Engine]:
+        key = self.normalize(connection_string)
+        with self._lock:
+            if key not in self._engines:
+                self._engines[key] = create_engine(
+                    key,
+                    poolclass=QueuePool,
+                    pool_size=self.pool_size,
+                    max_overflow=self.max_overflow,
+                    pool_timeout=self.pool_timeout,
+                    pool_recycle=self.pool_recycle,
+                    pool_pre_ping=True
+                )
+                self._refcounts[key] = 0
+                self._waits[key] = {"checkouts": 0, "total_wait": 0.0, "max_wait": 0.0}
+            self._refcounts[key] += 1
+            return key, self._engines[key]
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            if key not in self._refcounts:
+                return
+            self._refcounts[key] -= 1
+            if self._refcounts[key] <= 0:
+                self._engines.pop(key).dispose()
+                self._refcounts.pop(key)
+                self._waits.pop(key)
+
+    def record_wait(self, key: str, seconds: float) -> None:
+        with self._lock:
+            waits = self._waits.get(key)
+            if waits is not None:
+                waits["checkouts"] += 1
+                waits["total_wait"] += seconds
+                waits["max_wait"] = max(waits["max_wait"], seconds)
+
+    def stats(self, key: str) -> Dict[str, Any]:
+        """Report pool utilization and checkout wait times for one target."""
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                return {}
+            pool = engine.pool
+            waits = dict(self._waits[key])
+            sessions = self._refcounts[key]
+        capacity = self.pool_size + self.max_overflow
+        return {
+            "sessions": sessions,
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "utilization": pool.checkedout() / capacity if capacity else 0.0,
+            "checkouts": waits["checkouts"],
+            "avg_wait_ms": 1000 * waits["total_wait"] / waits["checkouts"] if waits["checkouts"] else 0.0,
+            "max_wait_ms": 1000 * waits["max_wait"]
+        }
+
+
+engine_registry = EngineRegistry()
+
+
 class SQLDatabaseManager:
     def __init__(self, database_type: str, connection_params: Dict[str, Any]):
         self.database_type = database_type
         self.connection_params = connection_params
-        self.connection = None
         self.engine = None
+        self._engine_key = None
+
+    @property
+    def connection(self) -> Optional[Engine]:
+        """Kept for callers checking connectivity; connections are checked out per query."""
+        return self.engine
 
     def connect(self) -> Any:
         if self.is_connected:
-            return self.connection
+            return self.engine
 
         try:
-            if 'file_path' in self.connection_params:
-                connection_string = f"sqlite:///{self.connection_params['file_path']}"
-            else:
-                url = self.connection_params['url']
-                if 'username' in self.connection_params:
-                    credentials = f"{self.connection_params['username']}:{self.connection_params['password']}"
-                    url = url.replace('://', f"://{credentials}@")
-                connection_string = url
-
-            self.engine = create_engine(
-                connection_string,
-                poolclass=QueuePool,
-                pool_size=5,
-                max_overflow=10
-            )
-            self.connection = self.engine.connect()
-
-            self.connection = self.engine.connect()
-            return self.connection
+            self._engine_key, self.engine = engine_registry.acquire(self._connection_string())
+            with self.checkout():
+                pass
+            return self.engine
             
         except Exception as e:
+            self.disconnect()
             detailed_error = str(e)
             if "Access denied" in detailed_error:
                 raise ConnectionError("Invalid username or password")
@@ -122,33 +346,191 @@ class SQLDatabaseManager:
             else:
                 raise ConnectionError(f"Failed to connect to SQL database: {detailed_error}")
 
+    def _connection_string(self) -> str:
+        if 'file_path' in self.connection_params:
+            file_path = self.connection_params['file_path']
+            if hasattr(file_path, 'getvalue'):
+                file_path = self._persist_uploaded_file(file_path)
+            return f"sqlite:///{file_path}"
+
+        url = self.connection_params['url']
+        if 'username' in self.connection_params:
+            credentials = f"{self.connection_params['username']}:{self.connection_params['password']}"
+            url = url.replace('://', f"://{credentials}@")
+        return url
+
+    @staticmethod
+    def _persist_uploaded_file(uploaded_file: Any) -> str:
+        """Store an uploaded SQLite file by content hash so identical uploads share one engine."""
+        content = uploaded_file.getvalue()
+        path = Path(tempfile.gettempdir()) / f"sqlite-{hashlib.sha256(content).hexdigest()[:16]}.db"
+        if not path.exists():
+            path.write_bytes(content)
+        return str(path)
+
+    @contextmanager
+    def checkout(self) -> Iterator[Connection]:
+        """Check a pooled connection out for the duration of one operation."""
+        connection = self._checkout()
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def _checkout(self) -> Connection:
+        if not self.is_connected:
+            raise ConnectionError("Database not connected")
+        start = time.perf_counter()
+        connection = self.engine.connect()
+        engine_registry.record_wait(self._engine_key, time.perf_counter() - start)
+        return connection
+
     def query(self, query: str) -> Any:
         if not self.is_connected:
             raise ConnectionError("Database not connected")
         try:
-            return self.connection.execute(query)
+            with self.checkout() as connection:
+                result = connection.execute(text(query))
+                rows = result.fetchall() if result.returns_rows else result.rowcount
+                connection.commit()
+                return rows
         except Exception as e:
             raise Exception(f"Query execution failed: {str(e)}")
+
+    def stream_query(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        max_rows: Optional[int] = 100_000,
+        max_bytes: Optional[int] = 256 * 1024 * 1024,
+        timeout: Optional[float] = None,
+        read_only: bool = False
+    ) -> QueryStream:
+        """Run a query through a server-side cursor, yielding Arrow batches lazily.
+
+        The pooled connection is held only while the stream is being consumed.
+        `timeout` (seconds) and `read_only` are enforced by the database where
+        the dialect supports it.
+        """
+        connection = self._checkout()
+        try:
+            reset_guards = self._apply_guards(connection, timeout, read_only)
+        except Exception:
+            connection.close()
+            raise
+
+        def release() -> None:
+            try:
+                reset_guards()
+            finally:
+                connection.close()
+
+        return QueryStream(
+            connection,
+            query,
+            params=params,
+            batch_size=batch_size,
+            max_rows=max_rows,
+            max_bytes=max_bytes,
+            on_close=release
+        )
+
+    @staticmethod
+    def _apply_guards(connection: Connection, timeout: Optional[float], read_only: bool) -> Callable[[], None]:
+        """Apply a statement timeout and read-only mode; return a callable undoing them."""
+        dialect = connection.dialect.name
+        resets = []
+        if dialect == "postgresql":
+            # Transaction-scoped settings: reverted when the connection is returned and rolled back.
+            if read_only:
+                connection.execute(text("SET TRANSACTION READ ONLY"))
+            if timeout:
+                connection.execute(text(f"SET LOCAL statement_timeout = {int(timeout * 1000)}"))
+        elif dialect == "mysql":
+            # Session-scoped settings: must be undone before the connection goes back to the pool.
+            if read_only:
+                # Applies from the next transaction, so end the one the statement opened.
+                connection.execute(text("SET SESSION TRANSACTION READ ONLY"))
+                connection.commit()
+                resets.append(lambda: connection.execute(text("SET SESSION TRANSACTION READ WRITE")))
+            if timeout:
+                connection.execute(text(f"SET SESSION MAX_EXECUTION_TIME = {int(timeout * 1000)}"))
+                resets.append(lambda: connection.execute(text("SET SESSION MAX_EXECUTION_TIME = 0")))
+        elif dialect == "sqlite":
+            driver_connection = connection.connection.driver_connection
+            if read_only:
+                driver_connection.execute("PRAGMA query_only = ON")
+                resets.append(lambda: driver_connection.execute("PRAGMA query_only = OFF"))
+            if timeout:
+                deadline = time.monotonic() + timeout
+                driver_connection.set_progress_handler(lambda: int(time.monotonic() > deadline), 10_000)
+                resets.append(lambda: driver_connection.set_progress_handler(None, 0))
+
+        def reset() -> None:
+            for undo in resets:
+                undo()
+
+        return reset
+
+    @property
+    def engine_key(self) -> Optional[str]:
+        """Normalized URL identifying the shared engine this manager uses."""
+        return self._engine_key
+
+    def pool_status(self) -> Dict[str, Any]:
+        return engine_registry.stats(self._engine_key) if self._engine_key else {}
         
     @property
     def is_connected(self) -> bool:
-        return self.connection is not None
+        return self.engine is not None
 
     def disconnect(self):
-        """Explicitly disconnect from the database."""
-        if self.connection:
-            self.connection.close()
-            self.connection = None
-        if self.engine:
-            self.engine.dispose()
-            self.engine = None
+        """Release this session's reference to the shared engine."""
+        if self._engine_key:
+            engine_registry.release(self._engine_key)
+        self.engine = None
+        self._engine_key = None
+
+
+class BackgroundLoop:
+    """Event loop running in a daemon thread, shared by the async database clients.
+
+    Streamlit scripts are synchronous; submitting coroutines here lets several
+    queries (e.g. from parallel agent tool calls) share one loop and keeps
+    async clients bound to a loop that outlives any single script run.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="db-async-loop", daemon=True)
+        self._thread.start()
+
+    def submit(self, coroutine: Awaitable[Any]) -> "concurrent.futures.Future":
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+
+_background_loop: Optional[BackgroundLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = BackgroundLoop()
+        return _background_loop
 
 
 class NoSQLDatabaseManager:
+    MAX_DOCUMENTS = 1000
+    BATCH_SIZE = 100
+
     def __init__(self, database_type: str, connection_params: Dict[str, Any]):
         self.database_type = database_type
         self.connection_params = connection_params
         self.connection = None
+        self.async_connection = None
 
     def connect(self) -> Any:
         if self.is_connected:
@@ -158,20 +540,9 @@ class NoSQLDatabaseManager:
             db_type = self.database_type.lower()
             
             if db_type == 'mongodb':
-                if 'url' in self.connection_params:
-                    self.connection = MongoClient(self.connection_params['url'])
-                else:
-                    self.connection = MongoClient(
-                        host=self.connection_params.get('host', 'localhost'),
-                        port=self.connection_params.get('port', 27017),
-                        username=self.connection_params.get('username'),
-                        password=self.connection_params.get('password')
-                    )
+                self.connection = MongoClient(**self._mongo_client_kwargs())
             elif db_type == 'qdrant':
-                self.connection = QdrantClient(
-                    url=self.connection_params.get('url'),
-                    api_key=self.connection_params.get('api_key')
-                )
+                self.connection = QdrantClient(**self._qdrant_client_kwargs())
             else:
                 raise ValueError(f"Unsupported NoSQL database type: {db_type}")
                 
@@ -180,6 +551,41 @@ class NoSQLDatabaseManager:
         except Exception as e:
             raise ConnectionError(f"Failed to connect to NoSQL database: {str(e)}")
 
+    def _mongo_client_kwargs(self) -> Dict[str, Any]:
+        if 'url' in self.connection_params:
+            return {"host": self.connection_params['url']}
+        return {
+            "host": self.connection_params.get('host', 'localhost'),
+            "port": self.connection_params.get('port', 27017),
+            "username": self.connection_params.get('username'),
+            "password": self.connection_params.get('password')
+        }
+
+    def _qdrant_client_kwargs(self) -> Dict[str, Any]:
+        # Local mode (":memory:" or an on-disk path) for development and tests.
+        if 'path' in self.connection_params:
+            return {"path": self.connection_params['path']}
+        if self.connection_params.get('url') == ":memory:":
+            return {"location": ":memory:"}
+        return {
+            "url": self.connection_params.get('url'),
+            "api_key": self.connection_params.get('api_key')
+        }
+
+    @property
+    def is_local_qdrant(self) -> bool:
+        """Embedded Qdrant: a second client cannot open the same storage, so async calls reuse the sync one."""
+        return self.database_type.lower() == 'qdrant' and 'url' not in self._qdrant_client_kwargs()
+
+    def _get_async_connection(self) -> Any:
+        """Create the Motor / async Qdrant client on first use (inside the background loop)."""
+        if self.async_connection is None:
+            if self.database_type.lower() == 'mongodb':
+                self.async_connection = AsyncIOMotorClient(**self._mongo_client_kwargs())
+            else:
+                self.async_connection = AsyncQdrantClient(**self._qdrant_client_kwargs())
+        return self.async_connection
+
     def query(self, query: str) -> Any:
         if not self.is_connected:
             raise ConnectionError("Database not connected")
@@ -193,20 +599,100 @@ class NoSQLDatabaseManager:
                 operation = query_params['operation']
                 
                 if operation == 'find':
-                    return collection.find(query_params.get('filter', {}))
+                    return list(self._find_cursor(collection, query_params))
                 elif operation == 'insert':
-                    return collection.insert_many(query_params['documents'])
+                    return collection.insert_many(query_params['documents'], ordered=False)
                 
             elif db_type == 'qdrant':
-                return self.connection.search(
+                if 'vectors' in query_params:
+                    responses = self.connection.query_batch_points(
+                        collection_name=query_params['collection'],
+                        requests=self._search_requests(query_params)
+                    )
+                    return [response.points for response in responses]
+                return self.connection.query_points(
                     collection_name=query_params['collection'],
-                    query_vector=query_params['vector'],
+                    query=query_params['vector'],
+                    query_filter=self._qdrant_filter(query_params),
                     limit=query_params.get('limit', 10)
-                )
+                ).points
                 
         except Exception as e:
             raise Exception(f"Query execution failed: {str(e)}")
 
+    async def aquery(self, query: str) -> Any:
+        """Async counterpart of `query` using Motor / the async Qdrant client."""
+        if not self.is_connected:
+            raise ConnectionError("Database not connected")
+
+        if self.is_local_qdrant:
+            # A path is locked by the sync client and ":memory:" would be a separate, empty database.
+            return await asyncio.get_running_loop().run_in_executor(None, self.query, query)
+
+        try:
+            query_params = json.loads(query)
+            client = self._get_async_connection()
+
+            if self.database_type.lower() == 'mongodb':
+                collection = client[query_params.get('database', 'default')][query_params['collection']]
+                operation = query_params['operation']
+
+                if operation == 'find':
+                    limit = self._find_limit(query_params)
+                    return await self._find_cursor(collection, query_params).to_list(length=limit)
+                elif operation == 'insert':
+                    return await collection.insert_many(query_params['documents'], ordered=False)
+
+            else:
+                if 'vectors' in query_params:
+                    responses = await client.query_batch_points(
+                        collection_name=query_params['collection'],
+                        requests=self._search_requests(query_params)
+                    )
+                    return [response.points for response in responses]
+                response = await client.query_points(
+                    collection_name=query_params['collection'],
+                    query=query_params['vector'],
+                    query_filter=self._qdrant_filter(query_params),
+                    limit=query_params.get('limit', 10)
+                )
+                return response.points
+
+        except Exception as e:
+            raise Exception(f"Query execution failed: {str(e)}")
+
+    def submit(self, query: str) -> "concurrent.futures.Future":
+        """Run `aquery` on the background loop and return a future, so callers can overlap it with other work."""
+        return get_background_loop().submit(self.aquery(query))
+
+    def _find_limit(self, query_params: Dict[str, Any]) -> int:
+        return min(query_params.get('limit', self.MAX_DOCUMENTS), self.MAX_DOCUMENTS)
+
+    def _find_cursor(self, collection: Any, query_params: Dict[str, Any]) -> Any:
+        """Build a bounded find cursor with projection and batch-size controls."""
+        return collection.find(
+            query_params.get('filter', {}),
+            projection=query_params.get('projection'),
+            batch_size=query_params.get('batch_size', self.BATCH_SIZE)
+        ).limit(self._find_limit(query_params))
+
+    def _search_requests(self, query_params: Dict[str, Any]) -> List[Any]:
+        query_filter = self._qdrant_filter(query_params)
+        return [
+            qdrant_models.QueryRequest(
+                query=vector,
+                filter=query_filter,
+                limit=query_params.get('limit', 10),
+                with_payload=query_params.get('with_payload', True)
+            )
+            for vector in query_params['vectors']
+        ]
+
+    @staticmethod
+    def _qdrant_filter(query_params: Dict[str, Any]) -> Optional[Any]:
+        query_filter = query_params.get('filter')
+        return qdrant_models.Filter(**query_filter) if query_filter else None
+
     @property
     def is_connected(self) -> bool:
         return self.connection is not None
@@ -217,5 +703,11 @@ class NoSQLDatabaseManager:
             if self.database_type.lower() == 'mongodb':
                 self.connection.close()
             elif self.database_type.lower() == 'qdrant':
-                pass
-            self.connection = None
\ No newline at end of file
+                self.connection.close()
+            self.connection = None
+        if self.async_connection is not None:
+            if self.database_type.lower() == 'mongodb':
+                self.async_connection.close()
+            else:
+                get_background_loop().submit(self.async_connection.close()).result()
+            self.async_connection = None
@@ -0,0 +1,220 @@
+import math
+import mmap
+import tempfile
+import threading
+from array import array
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+# Per-chunk integer metadata stored as columns; -1 marks an absent value.
+INT_FIELDS = ("page", "page_number", "chunk_index", "chunk_size", "start_index", "end_index", "token_count")
+MISSING = -1
+# Per-chunk float metadata (transcript `start`/`end` seconds); NaN marks an absent value.
+FLOAT_FIELDS = ("start", "end")
+
+
+def _is_index(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and not math.isnan(value)
+
+
+class CompactDocstore(Docstore, AddableMixin):
+    """Columnar docstore that keeps chunk text in a single memory-mapped blob.
+
+    Metadata shared by many chunks (file name, type, timestamp, ...) is interned
+    once as a group, integer and float fields live in typed arrays, and
+    `Document` objects are only built when `search` is called for a retrieved id.
+    """
+
+    def __init__(self, blob_path: Optional[str] = None):
+        self._blob = open(blob_path, "a+b") if blob_path else tempfile.TemporaryFile()
+        self._blob_path = blob_path
+        self._blob_size = self._blob.seek(0, 2)
+        self._mmap: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+
+        self._row_by_id: Dict[str, int] = {}
+        self._offsets = array("q")
+        self._lengths = array("l")
+        self._groups: List[Tuple[Tuple[str, Any], ...]] = []
+        self._group_index: Dict[Tuple[Tuple[str, Any], ...], int] = {}
+        self._group_ids = array("l")
+        self._int_columns = {field: array("q") for field in INT_FIELDS}
+        self._float_columns = {field: array("d") for field in FLOAT_FIELDS}
+        self._extras: Dict[int, Dict[str, Any]] = {}
+        self._page_rows: Dict[Tuple[Any, int], List[int]] = {}
+        self._page_rows_indexed = 0
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        """Append documents to the blob and columns."""
+        overlapping = set(texts).intersection(self._row_by_id)
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+
+        with self._lock:
+            self._blob_size = self._blob.seek(0, 2)
+            for doc_id, doc in texts.items():
+                encoded = doc.page_content.encode("utf-8")
+                self._blob.write(encoded)
+                self._row_by_id[doc_id] = len(self._offsets)
+                self._offsets.append(self._blob_size)
+                self._lengths.append(len(encoded))
+                self._blob_size += len(encoded)
+                self._add_metadata(doc.metadata)
+            self._blob.flush()
+
+    def search(self, search: str) -> Union[str, Document]:
+        """Materialize the document stored under `search`."""
+        row = self._row_by_id.get(search)
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=self.text(row), metadata=self.metadata(row))
+
+    def delete(self, ids: List) -> None:
+        """Forget the given ids; their blob bytes are reclaimed only on rebuild."""
+        missing = set(ids).difference(self._row_by_id)
+        if missing:
+            raise ValueError(f"Tried to delete ids that does not exist: {missing}")
+        with self._lock:
+            for doc_id in ids:
+                self._row_by_id.pop(doc_id)
+
+    def text(self, row: int) -> str:
+        offset, length = self._offsets[row], self._lengths[row]
+        if length == 0:
+            return ""
+        return self._view(offset + length)[offset:offset + length].decode("utf-8")
+
+    def metadata(self, row: int) -> Dict[str, Any]:
+        metadata = dict(self._groups[self._group_ids[row]])
+        for field, column in self._int_columns.items():
+            if column[row] != MISSING:
+                metadata[field] = column[row]
+        for field, column in self._float_columns.items():
+            if not math.isnan(column[row]):
+                metadata[field] = column[row]
+        metadata.update(self._extras.get(row, {}))
+        return metadata
+
+    def row(self, doc_id: str) -> Optional[int]:
+        return self._row_by_id.get(doc_id)
+
+    def page_rows(self, row: int) -> List[int]:
+        """Rows of the same file and page as `row` that carry offsets, ordered by `start_index`.
+
+        The lookup is built incrementally from the integer columns, so sibling
+        chunks can be stitched back into their page without storing page text.
+        """
+        with self._lock:
+            starts = self._int_columns["start_index"]
+            for indexed in range(self._page_rows_indexed, len(self._offsets)):
+                if starts[indexed] == MISSING:
+                    continue
+                rows = self._page_rows.setdefault(self._page_key(indexed), [])
+                if rows and starts[rows[-1]] > starts[indexed]:
+                    rows.append(indexed)
+                    rows.sort(key=starts.__getitem__)
+                else:
+                    rows.append(indexed)
+            self._page_rows_indexed = len(self._offsets)
+
+            if starts[row] == MISSING:
+                return [row]
+            return list(self._page_rows.get(self._page_key(row), [row]))
+
+    def _page_key(self, row: int) -> Tuple[Any, Any, int]:
+        # The upload timestamp keeps re-uploads of the same file apart.
+        group = dict(self._groups[self._group_ids[row]])
+        return group.get("file_name"), group.get("processing_timestamp"), self._int_columns["page_number"][row]
+
+    def offsets(self, row: int) -> Tuple[int, int]:
+        """`(start_index, end_index)` of a chunk within its page."""
+        start = self._int_columns["start_index"][row]
+        end = self._int_columns["end_index"][row]
+        return start, end if end != MISSING else start + len(self.text(row))
+
+    def stats(self) -> Dict[str, int]:
+        """Return row, group and blob size counters."""
+        return {
+            "documents": len(self._row_by_id),
+            "metadata_groups": len(self._groups),
+            "blob_bytes": self._blob_size,
+        }
+
+    def __len__(self) -> int:
+        return len(self._row_by_id)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._row_by_id
+
+    def _add_metadata(self, metadata: Dict[str, Any]) -> None:
+        row = len(self._group_ids)
+        shared, extras = [], {}
+        for key, value in metadata.items():
+            if key in self._int_columns and _is_index(value):
+                continue
+            if key in self._float_columns and _is_number(value):
+                continue
+            try:
+                hash(value)
+                shared.append((key, value))
+            except TypeError:
+                extras[key] = value
+
+        for field, column in self._int_columns.items():
+            value = metadata.get(field, MISSING)
+            column.append(value if _is_index(value) else MISSING)
+        for field, column in self._float_columns.items():
+            value = metadata.get(field)
+            column.append(float(value) if _is_number(value) else math.nan)
+
+        group = tuple(sorted(shared))
+        if group not in self._group_index:
+            self._group_index[group] = len(self._groups)
+            self._groups.append(group)
+        self._group_ids.append(self._group_index[group])
+        if extras:
+            self._extras[row] = extras
+
+    def _view(self, required_size: int) -> mmap.mmap:
+        """Return a read-only mapping of the blob covering `required_size` bytes."""
+        view = self._mmap
+        if view is None or len(view) < required_size:
+            with self._lock:
+                if self._mmap is None or len(self._mmap) < required_size:
+                    self._mmap = mmap.mmap(self._blob.fileno(), 0, access=mmap.ACCESS_READ)
+                view = self._mmap
+        return view
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        self._blob.flush()
+        if self._blob_path:
+            state["_blob_bytes"] = None
+        else:
+            state["_blob_bytes"] = bytes(self._view(self._blob_size)[:self._blob_size]) if self._blob_size else b""
+        for key in ("_blob", "_mmap", "_lock"):
+            state.pop(key)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        blob_bytes = state.pop("_blob_bytes")
+        self.__dict__.update(state)
+        self.__dict__.setdefault("_page_rows", {})
+        self.__dict__.setdefault("_page_rows_indexed", 0)
+        self.__dict__.setdefault(
+            "_float_columns", {field: array("d", [math.nan] * len(self._offsets)) for field in FLOAT_FIELDS}
+        )
+        self._lock = threading.Lock()
+        self._mmap = None
+        if self._blob_path:
+            self._blob = open(self._blob_path, "a+b")
+        else:
+            self._blob = tempfile.TemporaryFile()
+            self._blob.write(blob_bytes)
+            self._blob.flush()
@@ -5,13 +5,21 @@ from typing import List, Tuple, Dict, Any, Optional
 from dataclasses import dataclass
 from pathlib import Path
 
+import numpy as np
 import streamlit as st
 from langchain_community.document_loaders import PyPDFLoader
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
 
+from .embeddings import get_embeddings
+from .ocr_processor import OCRProcessor
+from .shared_index import LayeredVectorStore, get_shared_corpus
+from .text_splitter import FastTextSplitter
+from .transcription import Transcript, Transcriber
+from .vector_backends import create_backend
+
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".mp4", ".m4a", ".ogg", ".oga", ".flac", ".aac", ".wma", ".amr"}
+
 @dataclass
 class ProcessingResult:
     """Data class to hold document processing results"""
@@ -21,20 +29,56 @@ class ProcessingResult:
     metadata: Dict[str, Any] = None
 
 class DocumentProcessor:
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
-        """Initialize the DocumentProcessor with specified embedding model."""
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=model_name,
-            encode_kwargs={'normalize_embeddings': True} 
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        config: Optional[Dict[str, Any]] = None,
+        track_session: bool = True,
+        session_id: Optional[str] = None,
+        api_key: Optional[str] = None
+    ):
+        """Initialize the DocumentProcessor with specified embedding model.
+
+        Background workers pass `track_session=False` since they run outside
+        any Streamlit session. The index this processor creates belongs to
+        `session_id` (the Streamlit session's id by default). `api_key` is the
+        Groq key used to transcribe audio (GROQ_API_KEY when not given).
+        """
+        self.config = (config or {}).get("document_processing", {})
+        self.session_id = session_id
+        self.api_key = api_key
+        embedding_config = self.config.get("embeddings", {})
+        self.embeddings = get_embeddings(
+            model_name,
+            backend=embedding_config.get("backend", "torch"),
+            threads=embedding_config.get("threads"),
+            batch_size=embedding_config.get("batch_size", 32),
+            max_batch_tokens=embedding_config.get("max_batch_tokens", 16384),
+            parity_threshold=embedding_config.get("parity_threshold", 0.99)
         )
         self.vector_store = None
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=50,
-            separators=["\n\n", "\n", ".", "!", "?", " ", ""],
-            length_function=len,
+        self.backend = create_backend(self.config.get("vector_store"), self.embeddings)
+        shared_config = self.config.get("shared_corpus", {})
+        self.shared_corpus = (
+            get_shared_corpus(shared_config.get("path", "data/shared_corpus"), self.embeddings)
+            if shared_config.get("enabled") else None
         )
-        self._initialize_session_state()
+        # With parent retrieval, only small child chunks are indexed; parents are rebuilt from them.
+        parent_config = self.config.get("parent_retrieval", {})
+        chunk_config = (
+            {"chunk_size": parent_config.get("child_chunk_size", 64), "chunk_overlap": parent_config.get("child_chunk_overlap", 8)}
+            if parent_config.get("enabled") else self.config
+        )
+        self.text_splitter = FastTextSplitter(
+            chunk_size=chunk_config.get("chunk_size", 200),
+            chunk_overlap=chunk_config.get("chunk_overlap", 20),
+            tokenizer_name=model_name if self.config.get("length_unit", "tokens") == "tokens" else None,
+        )
+        self.ocr = OCRProcessor(self.config.get("ocr"))
+        self.transcription_config = (config or {}).get("transcription", {})
+        self._transcriber: Optional[Transcriber] = None
+        if track_session:
+            self._initialize_session_state()
 
     def _initialize_session_state(self) -> None:
         """Initialize session state for document tracking."""
@@ -47,11 +91,24 @@ class DocumentProcessor:
                 "file_details": {}
             }
 
+        if self.session_id is None:
+            self.session_id = st.session_state.get("session_id")
+
         if "local_database" in st.session_state and st.session_state.local_database:
             self.vector_store = st.session_state.local_database
 
-    def chunk_pdf(self, pdf_files: List[Any]) -> Tuple[List[Document], Optional[FAISS]]:
-        """Process multiple PDF files and create/update vector store."""
+    def retrieval_store(self) -> Optional[Any]:
+        """Return the store to query: the shared corpus layered under this session's uploads."""
+        if self.shared_corpus is None:
+            return self.vector_store
+        return LayeredVectorStore(self.shared_corpus, self.vector_store)
+
+    def chunk_pdf(self, pdf_files: List[Any], shared: bool = False) -> Tuple[List[Document], Optional[FAISS]]:
+        """Process multiple PDF files and create/update vector store.
+
+        With `shared=True` the chunks are appended to the shared corpus instead
+        of the session's private index.
+        """
         if not pdf_files:
             return [], self.vector_store
 
@@ -82,7 +139,10 @@ class DocumentProcessor:
 
         if all_chunks:
             try:
-                self.vector_store = self._update_vector_store(all_chunks)
+                if shared and self.shared_corpus is not None:
+                    self.shared_corpus.append(all_chunks)
+                else:
+                    self.vector_store = self._update_vector_store(all_chunks)
                 self._save_processing_stats(processing_stats)
             except Exception as e:
                 st.error(f"Failed to update vector store: {str(e)}")
@@ -94,35 +154,11 @@ class DocumentProcessor:
         """Process a single PDF file with enhanced error handling."""
         temp_path = None
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=Path(pdf_file.name).suffix or ".pdf") as temp_file:
                 temp_file.write(pdf_file.read())
                 temp_path = Path(temp_file.name)
 
-            loader = PyPDFLoader(str(temp_path))
-            pages = loader.load()
-            
-            chunks = self.text_splitter.split_documents(pages)
-            
-            for i, chunk in enumerate(chunks):
-                chunk.metadata.update({
-                    "file_name": pdf_file.name,
-                    "file_type": pdf_file.type,
-                    "page_number": chunk.metadata.get("page", 0),
-                    "chunk_index": i,
-                    "chunk_size": len(chunk.page_content),
-                    "processing_timestamp": datetime.now().isoformat(),
-                    "total_chunks": len(chunks)
-                })
-
-            return ProcessingResult(
-                success=True,
-                chunks=chunks,
-                metadata={
-                    "total_pages": len(pages),
-                    "total_chunks": len(chunks),
-                    "average_chunk_size": sum(len(c.page_content) for c in chunks) / len(chunks) if chunks else 0
-                }
-            )
+            return self.load_file(temp_path, pdf_file.name, pdf_file.type)
 
         except Exception as e:
             return ProcessingResult(
@@ -137,14 +173,121 @@ class DocumentProcessor:
                 except Exception as e:
                     st.warning(f"Failed to clean up temporary file: {str(e)}")
 
-    def _update_vector_store(self, chunks: List[Document]) -> FAISS:
-        """Update or create vector store with new chunks."""
+    @property
+    def transcriber(self) -> Transcriber:
+        """Audio transcriber for this processor's API key, created on first use."""
+        if self._transcriber is None:
+            self._transcriber = self._create_transcriber(self.api_key)
+        return self._transcriber
+
+    def _create_transcriber(self, api_key: Optional[str]) -> Transcriber:
+        return Transcriber(
+            {"transcription": self.transcription_config},
+            api_key=api_key or os.getenv("GROQ_API_KEY")
+        )
+
+    @staticmethod
+    def is_audio(file_name: str, file_type: Optional[str]) -> bool:
+        return (file_type or "").startswith("audio/") or Path(file_name).suffix.lower() in AUDIO_EXTENSIONS
+
+    def load_file(self, path: Path, file_name: str, file_type: str, api_key: Optional[str] = None) -> ProcessingResult:
+        """Chunk a stored file: audio is transcribed first, anything else is read as a PDF.
+
+        A shared processor transcribes with the uploading user's `api_key` when given.
+        """
+        if self.is_audio(file_name, file_type):
+            transcriber = self.transcriber if api_key in (None, self.api_key) else self._create_transcriber(api_key)
+            return self.load_transcript(transcriber.transcribe(path.read_bytes()), file_name, file_type)
+        return self.load_chunks(path, file_name, file_type)
+
+    def load_transcript(self, transcript: Transcript, file_name: str, file_type: str) -> ProcessingResult:
+        """Split a transcript into chunks carrying the `start`/`end` time (seconds) they cover.
+
+        Transcript segments are joined one per line so chunk cuts prefer segment
+        boundaries; character offsets then map each chunk back to its segments.
+        """
+        segments = [segment for segment in transcript.segments if segment.text.strip()]
+        texts = [segment.text.strip() for segment in segments]
+        text = "\n".join(texts)
+        segment_offsets = np.cumsum([0] + [len(t) + 1 for t in texts[:-1]]) if texts else np.zeros(0)
+        spans = self.text_splitter.split_spans(text) if text else []
+
+        processing_timestamp = datetime.now().isoformat()
+        chunks = []
+        for i, span in enumerate(spans):
+            first = int(np.searchsorted(segment_offsets, span.start, side="right")) - 1
+            last = int(np.searchsorted(segment_offsets, span.end - 1, side="right")) - 1
+            chunks.append(Document(
+                page_content=span.text(text),
+                metadata={
+                    "source": file_name,
+                    "source_type": "transcript",
+                    "file_name": file_name,
+                    "file_type": file_type,
+                    "page_number": 0,
+                    "start": segments[first].start,
+                    "end": segments[last].end,
+                    "start_index": span.start,
+                    "end_index": span.end,
+                    "chunk_index": i,
+                    "chunk_size": span.end - span.start,
+                    "token_count": span.token_count,
+                    "processing_timestamp": processing_timestamp,
+                    "total_chunks": len(spans)
+                }
+            ))
+
+        return ProcessingResult(
+            success=True,
+            chunks=chunks,
+            metadata={
+                "total_pages": 0,
+                "total_chunks": len(chunks),
+                "average_chunk_size": sum(len(c.page_content) for c in chunks) / len(chunks) if chunks else 0,
+                "audio_duration": transcript.duration,
+                "transcript_segments": len(segments),
+                "transcript_cached": transcript.cached,
+                "transcription_time": transcript.elapsed
+            }
+        )
+
+    def load_chunks(self, pdf_path: Path, file_name: str, file_type: str) -> ProcessingResult:
+        """Load, OCR and split a PDF stored on disk into chunks (without embedding them)."""
+        loader = PyPDFLoader(str(pdf_path))
+        pages = loader.load()
+        ocr_results = self.ocr.fill_textless_pages(pdf_path, pages)
+        
+        chunks = self.text_splitter.split_documents(pages)
+        
+        processing_timestamp = datetime.now().isoformat()
+        for i, chunk in enumerate(chunks):
+            chunk.metadata.update({
+                "file_name": file_name,
+                "file_type": file_type,
+                "page_number": chunk.metadata.get("page", 0),
+                "chunk_index": i,
+                "chunk_size": len(chunk.page_content),
+                "token_count": chunk.metadata.get("token_count", 0),
+                "processing_timestamp": processing_timestamp,
+                "total_chunks": len(chunks)
+            })
+
+        return ProcessingResult(
+            success=True,
+            chunks=chunks,
+            metadata={
+                "total_pages": len(pages),
+                "total_chunks": len(chunks),
+                "average_chunk_size": sum(len(c.page_content) for c in chunks) / len(chunks) if chunks else 0,
+                **self.ocr.summarize(ocr_results)
+            }
+        )
+
+    def _update_vector_store(self, chunks: List[Document]) -> Any:
+        """Update or create vector store with new chunks on the configured backend."""
         try:
-            if self.vector_store is None:
-                return FAISS.from_documents(chunks, self.embeddings)
-            
-            self.vector_store.add_documents(chunks)
-            return self.vector_store
+            vector_store, _ = self.backend.add_documents(self.vector_store, chunks, session_id=self.session_id)
+            return vector_store
         except Exception as e:
             st.error(f"Error updating vector store: {str(e)}")
             raise
@@ -166,6 +309,7 @@ class DocumentProcessor:
             
         stats["file_details"][pdf_file.name] = {
             "chunks": len(result.chunks),
+            "file_type": pdf_file.type,
             "processed_at": datetime.now().isoformat(),
             **result.metadata
         } if result.metadata else {}
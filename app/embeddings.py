@@ -0,0 +1,173 @@
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from .text_splitter import get_tokenizer
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "torch_int8", "onnx")
+
+# Fixed probe texts of varied length for comparing a backend with the reference model.
+PARITY_PROBES = [
+    "Invoice total due by the end of the month.",
+    "The quarterly report shows revenue growth in all regions except the north-east, where supply issues persisted.",
+    "def add(a, b):\n    return a + b",
+    "Patients received 5 mg twice daily for two weeks; no adverse events were recorded during follow-up visits.",
+    "Quelle est la capitale de la France ?",
+    "Table 3: precision, recall and F1 for each retrieval configuration, averaged over five runs with different seeds. "
+    "The re-ranked configuration improves recall at every cut-off while keeping latency under the target.",
+]
+
+
+@dataclass
+class ParityReport:
+    """Data class to hold the agreement of a backend with the reference embeddings"""
+    backend: str
+    min_cosine: float
+    mean_cosine: float
+    threshold: float
+
+    @property
+    def passed(self) -> bool:
+        return self.min_cosine >= self.threshold
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """CPU-tuned sentence-transformers embeddings with length-bucketed batching.
+
+    Texts are sorted by token count and cut into batches holding at most
+    `batch_size` texts and `max_batch_tokens` padded tokens, so short chunks
+    are embedded in large batches and long ones are never padded against
+    short ones. Output order and normalization match HuggingFaceEmbeddings.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        backend: str = "onnx",
+        threads: Optional[int] = None,
+        batch_size: int = 32,
+        max_batch_tokens: int = 16384
+    ):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        if backend == "onnx":
+            model_kwargs: Dict[str, Any] = {"provider": "CPUExecutionProvider"}
+            if threads:
+                import onnxruntime
+
+                options = onnxruntime.SessionOptions()
+                options.intra_op_num_threads = threads
+                model_kwargs["session_options"] = options
+            self.model = SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+        elif backend == "torch_int8":
+            import torch
+
+            if threads:
+                # Process-wide: PyTorch has a single intra-op pool.
+                torch.set_num_threads(threads)
+            model = SentenceTransformer(model_name, device="cpu")
+            self.model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        else:
+            raise ValueError(f"Unsupported embedding backend: {backend}")
+        self.max_length = self.model.max_seq_length
+        self.tokenizer = get_tokenizer(model_name)
+
+    def batches(self, texts: List[str]) -> List[List[int]]:
+        """Text positions grouped into batches of similar token length."""
+        lengths = [
+            min(len(encoding.ids), self.max_length)
+            for encoding in self.tokenizer.encode_batch(texts, add_special_tokens=True)
+        ]
+        batches, batch = [], []
+        for position in sorted(range(len(texts)), key=lambda i: lengths[i]):
+            # Sorted ascending, so the text being added sets the batch's padded length.
+            if batch and (len(batch) == self.batch_size or (len(batch) + 1) * lengths[position] > self.max_batch_tokens):
+                batches.append(batch)
+                batch = []
+            batch.append(position)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        vectors = np.empty((len(texts), self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        for batch in self.batches(texts):
+            vectors[batch] = self.model.encode(
+                [texts[i] for i in batch],
+                batch_size=len(batch),
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def check_parity(reference: Embeddings, candidate: Embeddings, backend: str, threshold: float = 0.99) -> ParityReport:
+    """Cosine similarity between the two models' embeddings of the probe texts."""
+    expected = np.asarray(reference.embed_documents(PARITY_PROBES), dtype=np.float32)
+    actual = np.asarray(candidate.embed_documents(PARITY_PROBES), dtype=np.float32)
+    cosines = (expected * actual).sum(axis=1) / (
+        np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    )
+    return ParityReport(backend, float(cosines.min()), float(cosines.mean()), threshold)
+
+
+@lru_cache(maxsize=4)
+def get_embeddings(
+    model_name: str,
+    backend: str = "torch",
+    threads: Optional[int] = None,
+    batch_size: int = 32,
+    max_batch_tokens: int = 16384,
+    parity_threshold: Optional[float] = 0.99
+) -> Any:
+    """Load the embedding model once per process and share it across sessions.
+
+    sentence-transformers/torch are only imported here, on first use. With an
+    optimized `backend`, the model is checked against the reference PyTorch
+    embeddings first (unless `parity_threshold` is None); if they diverge, the
+    reference model is used so existing indexes stay compatible.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported embedding backend: {backend}")
+    if backend != "torch":
+        try:
+            embeddings = SentenceTransformerEmbeddings(model_name, backend, threads, batch_size, max_batch_tokens)
+            if parity_threshold is None:
+                return embeddings
+            # The reference model is not cached, so it is freed once the check is done.
+            report = check_parity(get_embeddings.__wrapped__(model_name), embeddings, backend, parity_threshold)
+        except Exception as e:
+            # Missing extras, failed ONNX/OpenVINO exports and runtime errors all fall back alike.
+            logger.warning(f"Embedding backend {backend} unavailable ({e!r}); using torch", exc_info=True)
+            return get_embeddings(model_name)
+        if report.passed:
+            logger.info(f"Embedding backend {backend} matches torch (min cosine {report.min_cosine:.5f})")
+            return embeddings
+        logger.warning(
+            f"Embedding backend {backend} diverges from torch (min cosine {report.min_cosine:.5f} "
+            f"< {parity_threshold}); using torch"
+        )
+        return get_embeddings(model_name)
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        encode_kwargs={'normalize_embeddings': True}
+    )
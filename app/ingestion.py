@@ -0,0 +1,375 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+
+from langchain_core.vectorstores import VectorStore
+
+from .document_processor import DocumentProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    ACTIVE = (QUEUED, RUNNING)
+    RETRYABLE = (FAILED, CANCELLED)
+
+
+INTERRUPTED_ERROR = "Interrupted by a restart before it finished; please upload the file again."
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job was cancelled."""
+
+
+@dataclass
+class IngestionJob:
+    """Data class to hold the state of one file ingestion job"""
+    job_id: str
+    session_id: str
+    file_name: str
+    file_type: str
+    file_path: str
+    shared: bool = False
+    status: str = JobStatus.QUEUED
+    chunks_done: int = 0
+    chunks_total: int = 0
+    attempts: int = 0
+    error: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    updated_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+    @property
+    def progress(self) -> float:
+        if self.status == JobStatus.DONE:
+            return 1.0
+        return self.chunks_done / self.chunks_total if self.chunks_total else 0.0
+
+
+class JobStore:
+    """SQLite-backed persistent job table, so queued uploads survive restarts."""
+
+    COLUMNS = (
+        "job_id", "session_id", "file_name", "file_type", "file_path", "shared", "status",
+        "chunks_done", "chunks_total", "attempts", "error", "metadata", "created_at", "updated_at"
+    )
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(f"""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY, session_id TEXT, file_name TEXT, file_type TEXT,
+                    file_path TEXT, shared INTEGER, status TEXT, chunks_done INTEGER,
+                    chunks_total INTEGER, attempts INTEGER, error TEXT, metadata TEXT,
+                    created_at TEXT, updated_at TEXT
+                )
+            """)
+            self._connection.execute("CREATE INDEX IF NOT EXISTS jobs_session ON jobs (session_id)")
+
+    def add(self, job: IngestionJob) -> None:
+        row = self._to_row(job)
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"INSERT INTO jobs ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                [row[column] for column in self.COLUMNS]
+            )
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        if "metadata" in fields:
+            fields["metadata"] = json.dumps(fields["metadata"], default=str)
+        fields["updated_at"] = datetime.now().isoformat()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._connection:
+            self._connection.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", [*fields.values(), job_id])
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        jobs = self._select("WHERE job_id = ?", (job_id,))
+        return jobs[0] if jobs else None
+
+    def list(self, session_id: str) -> List[IngestionJob]:
+        return self._select("WHERE session_id = ? ORDER BY created_at", (session_id,))
+
+    def requeue_interrupted(self) -> Tuple[List[str], List[IngestionJob]]:
+        """Recover the jobs a previous process left queued or running.
+
+        Shared-corpus jobs are queued again, since their output is on disk for
+        everyone. Private jobs wrote to an in-memory session index that died
+        with the process, so no one could query their output: they are marked
+        failed. Returns the requeued job ids and the failed jobs.
+        """
+        unfinished = (JobStatus.QUEUED, JobStatus.RUNNING)
+        orphaned = self._select("WHERE status IN (?, ?) AND shared = 0", unfinished)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE status IN (?, ?) AND shared = 0",
+                (JobStatus.FAILED, INTERRUPTED_ERROR, datetime.now().isoformat(), *unfinished)
+            )
+            self._connection.execute(
+                "UPDATE jobs SET status = ?, chunks_done = 0 WHERE status = ? AND shared = 1",
+                (JobStatus.QUEUED, JobStatus.RUNNING)
+            )
+        requeued = self._select("WHERE status = ? ORDER BY created_at", (JobStatus.QUEUED,))
+        return [job.job_id for job in requeued], orphaned
+
+    def _select(self, clause: str, params: tuple) -> List[IngestionJob]:
+        with self._lock:
+            rows = self._connection.execute(f"SELECT {', '.join(self.COLUMNS)} FROM jobs {clause}", params).fetchall()
+        jobs = []
+        for row in rows:
+            values = dict(zip(self.COLUMNS, row))
+            values["shared"] = bool(values["shared"])
+            values["metadata"] = json.loads(values["metadata"] or "{}")
+            jobs.append(IngestionJob(**values))
+        return jobs
+
+    @staticmethod
+    def _to_row(job: IngestionJob) -> Dict[str, Any]:
+        row = dict(job.__dict__)
+        row["shared"] = int(job.shared)
+        row["metadata"] = json.dumps(job.metadata, default=str)
+        return row
+
+
+class IngestionQueue:
+    def __init__(self, config: Dict[str, Any]):
+        """Initialize the background ingestion workers from `document_processing.ingestion`.
+
+        The queue holds each session's index only while the session uses it:
+        indexes idle for `store_ttl` seconds, or beyond the `max_sessions` most
+        recently used, are dropped (the session keeps its own reference).
+        """
+        settings = config.get("document_processing", {}).get("ingestion", {})
+        self.data_dir = Path(settings.get("data_dir", "data/ingestion"))
+        self.files_dir = self.data_dir / "files"
+        self.files_dir.mkdir(parents=True, exist_ok=True)
+        self.batch_size = settings.get("batch_size", 64)
+        self.max_attempts = settings.get("max_attempts", 3)
+        self.store_ttl = settings.get("store_ttl", 3600)
+        self.max_sessions = settings.get("max_sessions", 64)
+
+        self.jobs_store = JobStore(self.data_dir / "jobs.db")
+        self.processor = DocumentProcessor(config=config, track_session=False)
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.get("max_workers", 2),
+            thread_name_prefix="ingestion"
+        )
+        # Session id -> (index, last use), least recently used first.
+        self._stores: "OrderedDict[str, Tuple[VectorStore, float]]" = OrderedDict()
+        self._stores_lock = threading.Lock()
+        # Jobs scheduled per session; their session's index is never evicted.
+        self._pending: Counter = Counter()
+        self._cancelled: Set[str] = set()
+        # Users' API keys are kept in memory only, never in the job table.
+        self._api_keys: Dict[str, str] = {}
+
+        requeued, orphaned = self.jobs_store.requeue_interrupted()
+        for job in orphaned:
+            Path(job.file_path).unlink(missing_ok=True)
+        for job_id in requeued:
+            self._schedule(self.jobs_store.get(job_id))
+
+    def submit(
+        self,
+        session_id: str,
+        uploaded_file: Any,
+        shared: bool = False,
+        api_key: Optional[str] = None,
+        store: Optional[VectorStore] = None
+    ) -> IngestionJob:
+        """Persist an uploaded file and queue it for background ingestion.
+
+        `api_key` is the uploading user's Groq key, used to transcribe audio.
+        `store` is the session's current index, appended to instead of
+        starting a new one if the queue has already dropped it.
+        """
+        job_id = uuid.uuid4().hex
+        if api_key:
+            self._api_keys[job_id] = api_key
+        file_path = self.files_dir / f"{job_id}{Path(uploaded_file.name).suffix}"
+        file_path.write_bytes(uploaded_file.getvalue())
+
+        job = IngestionJob(
+            job_id=job_id,
+            session_id=session_id,
+            file_name=uploaded_file.name,
+            file_type=uploaded_file.type,
+            file_path=str(file_path),
+            shared=shared
+        )
+        self.jobs_store.add(job)
+        self._schedule(job, store)
+        return job
+
+    def cancel(self, job_id: str) -> None:
+        """Cancel a queued job or stop a running one after its current batch."""
+        job = self.jobs_store.get(job_id)
+        if job is None or job.status not in JobStatus.ACTIVE:
+            return
+        self._cancelled.add(job_id)
+        if job.status == JobStatus.QUEUED:
+            self.jobs_store.update(job_id, status=JobStatus.CANCELLED)
+
+    def retry(self, job_id: str, api_key: Optional[str] = None) -> None:
+        """Queue a failed or cancelled job again."""
+        job = self.jobs_store.get(job_id)
+        if job is None or job.status not in JobStatus.RETRYABLE:
+            return
+        if api_key:
+            self._api_keys[job_id] = api_key
+        self._cancelled.discard(job_id)
+        self.jobs_store.update(job_id, status=JobStatus.QUEUED, chunks_done=0, attempts=0, error=None)
+        self._schedule(job)
+
+    def jobs(self, session_id: str) -> List[IngestionJob]:
+        return self.jobs_store.list(session_id)
+
+    def vector_store(self, session_id: str) -> Optional[VectorStore]:
+        """Return the session's index; it grows batch by batch while jobs run."""
+        with self._stores_lock:
+            entry = self._stores.get(session_id)
+            if entry is None:
+                return None
+            self._touch(session_id, entry[0])
+            return entry[0]
+
+    def release(self, session_id: str) -> None:
+        """Drop the queue's reference to a session's index, e.g. when the session ends."""
+        with self._stores_lock:
+            self._stores.pop(session_id, None)
+
+    def _touch(self, session_id: str, store: VectorStore) -> None:
+        """Record a use of the session's index and evict stale ones (`_stores_lock` held)."""
+        self._stores[session_id] = (store, time.monotonic())
+        self._stores.move_to_end(session_id)
+        now = time.monotonic()
+        for stale_id, (_, last_used) in list(self._stores.items()):
+            if len(self._stores) <= self.max_sessions and now - last_used < self.store_ttl:
+                break
+            # A session with scheduled jobs is still being written to.
+            if not self._pending[stale_id]:
+                del self._stores[stale_id]
+
+    def _schedule(self, job: IngestionJob, store: Optional[VectorStore] = None) -> None:
+        """Queue a job on the workers, reattaching the session's `store` if the queue dropped it."""
+        with self._stores_lock:
+            self._pending[job.session_id] += 1
+            if store is not None and job.session_id not in self._stores:
+                self._touch(job.session_id, store)
+        self._executor.submit(self._run, job.job_id, job.session_id)
+
+    def _run(self, job_id: str, session_id: str) -> None:
+        try:
+            self._ingest(job_id)
+        finally:
+            with self._stores_lock:
+                self._pending[session_id] -= 1
+                if not self._pending[session_id]:
+                    del self._pending[session_id]
+
+    def _ingest(self, job_id: str) -> None:
+        job = self.jobs_store.get(job_id)
+        if job is None or job.status != JobStatus.QUEUED:
+            return
+
+        self.jobs_store.update(job_id, status=JobStatus.RUNNING, attempts=job.attempts + 1, error=None)
+        added_ids: List[str] = []
+        try:
+            result = self.processor.load_file(
+                Path(job.file_path), job.file_name, job.file_type, api_key=self._api_keys.get(job_id)
+            )
+            chunks = result.chunks
+            self.jobs_store.update(job_id, chunks_total=len(chunks), chunks_done=0)
+
+            if job.shared and self.processor.shared_corpus is not None:
+                self._check_cancelled(job_id)
+                self.processor.shared_corpus.append(chunks)
+            else:
+                for start in range(0, len(chunks), self.batch_size):
+                    self._check_cancelled(job_id)
+                    batch = chunks[start:start + self.batch_size]
+                    added_ids.extend(self._index_batch(job.session_id, batch))
+                    self.jobs_store.update(job_id, chunks_done=start + len(batch))
+
+            self.jobs_store.update(job_id, status=JobStatus.DONE, chunks_done=len(chunks), metadata=result.metadata)
+
+        except JobCancelled:
+            self._rollback(job.session_id, added_ids)
+            self._cancelled.discard(job_id)
+            self.jobs_store.update(job_id, status=JobStatus.CANCELLED)
+
+        except Exception as e:
+            self._rollback(job.session_id, added_ids)
+            if job.attempts + 1 < self.max_attempts:
+                self.jobs_store.update(job_id, status=JobStatus.QUEUED, error=str(e))
+                self._schedule(job)
+            else:
+                self.jobs_store.update(job_id, status=JobStatus.FAILED, error=str(e))
+
+        else:
+            # Outside the try: a finished job must not be rolled back or retried over its cleanup.
+            self._api_keys.pop(job_id, None)
+            self._cancelled.discard(job_id)
+            try:
+                Path(job.file_path).unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"Could not remove ingested upload {job.file_path}: {e}")
+
+    def _check_cancelled(self, job_id: str) -> None:
+        if job_id in self._cancelled:
+            raise JobCancelled(job_id)
+
+    def _index_batch(self, session_id: str, batch: List[Document]) -> List[str]:
+        """Embed a batch outside any lock, then append it to the session's index."""
+        vectors = self.processor.embeddings.embed_documents([chunk.page_content for chunk in batch])
+        backend = self.processor.backend
+
+        with self._stores_lock:
+            entry = self._stores.get(session_id)
+            if entry is None:
+                store, ids = backend.add_documents(None, batch, vectors, session_id=session_id)
+                self._touch(session_id, store)
+                return ids
+            store = entry[0]
+            self._touch(session_id, store)
+        return backend.add_documents(store, batch, vectors)[1]
+
+    def _rollback(self, session_id: str, ids: List[str]) -> None:
+        """Remove the chunks a failed or cancelled job already indexed."""
+        with self._stores_lock:
+            entry = self._stores.get(session_id)
+        if entry is not None and ids:
+            entry[0].delete(ids)
+
+
+_queue: Optional[IngestionQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_ingestion_queue(config: Dict[str, Any]) -> IngestionQueue:
+    """Return the process-wide ingestion queue, starting it on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = IngestionQueue(config)
+        return _queue
@@ -0,0 +1,190 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from .docstore import CompactDocstore
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
+
+CATEGORICAL_FIELDS = ("file_name", "file_type")
+
+
+def _timestamp(value: Any) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return np.nan
+
+
+@dataclass(frozen=True)
+class DocumentFilter:
+    """Restrict retrieval to chunks whose metadata matches every given criterion.
+
+    Values within a field are OR-ed (any of `file_names`), fields are AND-ed.
+    `page_range` is inclusive and uses the stored `page_number`; upload bounds
+    compare against `processing_timestamp`.
+    """
+    file_names: Tuple[str, ...] = ()
+    file_types: Tuple[str, ...] = ()
+    page_range: Optional[Tuple[int, int]] = None
+    uploaded_after: Optional[str] = None
+    uploaded_before: Optional[str] = None
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.file_names or self.file_types or self.page_range or self.uploaded_after or self.uploaded_before)
+
+    def matches(self, metadata: Dict[str, Any]) -> bool:
+        """Evaluate the filter on one metadata dict (for stores without a metadata index)."""
+        if self.file_names and metadata.get("file_name") not in self.file_names:
+            return False
+        if self.file_types and metadata.get("file_type") not in self.file_types:
+            return False
+        if self.page_range and not self.page_range[0] <= metadata.get("page_number", -1) <= self.page_range[1]:
+            return False
+        if self.uploaded_after or self.uploaded_before:
+            uploaded = _timestamp(metadata.get("processing_timestamp"))
+            if self.uploaded_after and not uploaded >= _timestamp(self.uploaded_after):
+                return False
+            if self.uploaded_before and not uploaded <= _timestamp(self.uploaded_before):
+                return False
+        return True
+
+
+class MetadataIndex:
+    """Per-value row bitmaps over a FAISS store's internal ids.
+
+    Rows are indexed incrementally as the store grows; a filter becomes one
+    bitmap (OR within a field, AND across fields) handed to FAISS as an
+    IDSelectorBitmap, so non-matching vectors are skipped during the search
+    itself instead of over-fetching and discarding.
+    """
+
+    MAX_CACHED_MASKS = 64
+
+    def __init__(self):
+        self.size = 0
+        self._capacity = 0
+        self._bitmaps: Dict[str, Dict[Any, np.ndarray]] = {name: {} for name in CATEGORICAL_FIELDS}
+        self._pages = np.empty(0, dtype=np.int32)
+        self._timestamps = np.empty(0, dtype=np.float64)
+        self._masks: "OrderedDict[DocumentFilter, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state.pop("_lock")
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def sync(self, store: "FAISS") -> None:
+        """Index the rows appended to `store` since the last call."""
+        total = store.index.ntotal
+        with self._lock:
+            if total < self.size:
+                self.__init__()
+            if total == self.size:
+                return
+            self._reserve(total)
+            for row in range(self.size, total):
+                metadata = self._row_metadata(store, row)
+                for name in CATEGORICAL_FIELDS:
+                    value = metadata.get(name)
+                    bitmap = self._bitmaps[name].get(value)
+                    if bitmap is None:
+                        bitmap = self._bitmaps[name][value] = np.zeros(self._capacity, dtype=bool)
+                    bitmap[row] = True
+                self._pages[row] = metadata.get("page_number", -1)
+                self._timestamps[row] = _timestamp(metadata.get("processing_timestamp"))
+            self.size = total
+            self._masks.clear()
+
+    @staticmethod
+    def _row_metadata(store: "FAISS", row: int) -> Dict[str, Any]:
+        """Metadata of a FAISS row, read from the compact columns without building a Document."""
+        doc_id = store.index_to_docstore_id[row]
+        if isinstance(store.docstore, CompactDocstore):
+            return store.docstore.metadata(store.docstore.row(doc_id))
+        return store.docstore.search(doc_id).metadata
+
+    def mask(self, doc_filter: DocumentFilter) -> np.ndarray:
+        """Boolean mask over the indexed rows that satisfy the filter."""
+        with self._lock:
+            cached = self._masks.get(doc_filter)
+            if cached is not None:
+                self._masks.move_to_end(doc_filter)
+                return cached
+
+            mask = np.ones(self.size, dtype=bool)
+            for name, values in (("file_name", doc_filter.file_names), ("file_type", doc_filter.file_types)):
+                if values:
+                    selected = np.zeros(self.size, dtype=bool)
+                    for value in values:
+                        bitmap = self._bitmaps[name].get(value)
+                        if bitmap is not None:
+                            selected |= bitmap[:self.size]
+                    mask &= selected
+            if doc_filter.page_range:
+                low, high = doc_filter.page_range
+                mask &= (self._pages[:self.size] >= low) & (self._pages[:self.size] <= high)
+            if doc_filter.uploaded_after:
+                mask &= self._timestamps[:self.size] >= _timestamp(doc_filter.uploaded_after)
+            if doc_filter.uploaded_before:
+                mask &= self._timestamps[:self.size] <= _timestamp(doc_filter.uploaded_before)
+
+            self._masks[doc_filter] = mask
+            if len(self._masks) > self.MAX_CACHED_MASKS:
+                self._masks.popitem(last=False)
+            return mask
+
+    def _reserve(self, total: int) -> None:
+        if total <= self._capacity:
+            return
+        capacity = max(total, 2 * self._capacity, 1024)
+        for bitmaps in self._bitmaps.values():
+            for value, bitmap in bitmaps.items():
+                grown = np.zeros(capacity, dtype=bool)
+                grown[:self._capacity] = bitmap
+                bitmaps[value] = grown
+        self._pages = np.resize(self._pages, capacity)
+        self._timestamps = np.resize(self._timestamps, capacity)
+        self._capacity = capacity
+
+
+def get_metadata_index(store: "FAISS") -> MetadataIndex:
+    """Return the store's metadata index, synced with its current contents."""
+    index = store.__dict__.get("metadata_index")
+    if index is None:
+        index = store.__dict__.setdefault("metadata_index", MetadataIndex())
+    index.sync(store)
+    return index
+
+
+def search_index(
+    store: "FAISS", vectors: np.ndarray, k: int, doc_filter: Optional[DocumentFilter] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """`store.index.search`, restricted to the rows matching `doc_filter`."""
+    import faiss
+
+    if doc_filter is None or doc_filter.is_empty:
+        return store.index.search(vectors, k)
+
+    mask = get_metadata_index(store).mask(doc_filter)
+    if not mask.any():
+        return (
+            np.full((len(vectors), k), np.inf, dtype=np.float32),
+            np.full((len(vectors), k), -1, dtype=np.int64)
+        )
+    packed = np.packbits(mask, bitorder="little")
+    selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(packed))
+    return store.index.search(vectors, k, params=faiss.SearchParameters(sel=selector))
@@ -0,0 +1,199 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import fitz
+import pytesseract
+from PIL import Image
+from langchain_core.documents import Document
+
+
+def _ocr_image(png_bytes: bytes, language: str, tesseract_config: str, timeout: float = 0) -> Tuple[str, float]:
+    """Run Tesseract on a rendered page image (executed in a worker process).
+
+    pytesseract kills the tesseract process after `timeout` seconds (0 for no
+    limit), which frees the worker for the next page.
+    """
+    start = time.perf_counter()
+    with Image.open(io.BytesIO(png_bytes)) as image:
+        text = pytesseract.image_to_string(image, lang=language, config=tesseract_config, timeout=timeout)
+    return text, time.perf_counter() - start
+
+
+@dataclass
+class OCRPageResult:
+    """Data class to hold the OCR outcome of a single page"""
+    page_number: int
+    image_hash: str
+    text: str
+    duration: float
+    cached: bool = False
+    error: Optional[str] = None
+
+
+class OCRCache:
+    """Process-wide LRU cache of OCR text keyed by page-image hash."""
+
+    def __init__(self, max_entries: int = 512, cache_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, image_hash: str) -> Optional[str]:
+        with self._lock:
+            if image_hash in self._entries:
+                self._entries.move_to_end(image_hash)
+                return self._entries[image_hash]
+
+        if self.cache_dir:
+            path = self.cache_dir / f"{image_hash}.txt"
+            if path.exists():
+                text = path.read_text(encoding="utf-8")
+                self._remember(image_hash, text)
+                return text
+        return None
+
+    def put(self, image_hash: str, text: str) -> None:
+        self._remember(image_hash, text)
+        if self.cache_dir:
+            path = self.cache_dir / f"{image_hash}.txt"
+            temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            temp_path.write_text(text, encoding="utf-8")
+            os.replace(temp_path, path)
+
+    def _remember(self, image_hash: str, text: str) -> None:
+        with self._lock:
+            self._entries[image_hash] = text
+            self._entries.move_to_end(image_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_executors: Dict[int, ProcessPoolExecutor] = {}
+_cache: Optional[OCRCache] = None
+_shared_lock = threading.Lock()
+
+
+def _get_executor(max_workers: int) -> ProcessPoolExecutor:
+    """Return the process pool of `max_workers` shared by every session using that size.
+
+    Pools are never replaced, so a session configuring another size cannot shut
+    down a pool other sessions are still submitting to.
+    """
+    with _shared_lock:
+        if max_workers not in _executors:
+            _executors[max_workers] = ProcessPoolExecutor(max_workers=max_workers)
+        return _executors[max_workers]
+
+
+def _get_cache(max_entries: int, cache_dir: Optional[str]) -> OCRCache:
+    """Return the OCR cache shared by every session."""
+    global _cache
+    with _shared_lock:
+        if _cache is None:
+            _cache = OCRCache(max_entries=max_entries, cache_dir=cache_dir)
+        return _cache
+
+
+class OCRProcessor:
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """Initialize the OCRProcessor from the `document_processing.ocr` config section."""
+        config = config or {}
+        self.enabled = config.get("enabled", True)
+        self.language = config.get("language", "eng")
+        self.dpi = config.get("dpi", 200)
+        self.max_workers = max(1, config.get("max_workers", 2))
+        self.min_text_chars = config.get("min_text_chars", 20)
+        self.page_timeout = config.get("page_timeout", 120)
+        self.tesseract_config = config.get("tesseract_config", "")
+        self.cache = _get_cache(config.get("cache_size", 512), config.get("cache_dir"))
+
+    def find_textless_pages(self, pages: List[Document]) -> List[int]:
+        """Return the indices of pages whose extracted text is (almost) empty."""
+        return [
+            idx for idx, page in enumerate(pages)
+            if len(page.page_content.strip()) < self.min_text_chars
+        ]
+
+    def fill_textless_pages(self, pdf_path: Path, pages: List[Document]) -> List[OCRPageResult]:
+        """OCR the text-less pages of a PDF in place and return per-page results.
+
+        A page not done within `page_timeout` is reported as timed out. Cancelling
+        its future only drops it if it is still queued: a page already running
+        is stopped by Tesseract's own timeout instead.
+        """
+        if not self.enabled:
+            return []
+
+        targets = self.find_textless_pages(pages)
+        if not targets:
+            return []
+
+        results = []
+        pending = {}
+        with fitz.open(str(pdf_path)) as pdf:
+            for idx in targets:
+                page_number = pages[idx].metadata.get("page", idx)
+                png_bytes, image_hash = self._render_page(pdf[page_number])
+
+                cached_text = self.cache.get(image_hash)
+                if cached_text is not None:
+                    results.append(OCRPageResult(page_number, image_hash, cached_text, 0.0, cached=True))
+                    continue
+
+                future = _get_executor(self.max_workers).submit(
+                    _ocr_image, png_bytes, self.language, self.tesseract_config, self.page_timeout
+                )
+                pending[idx] = (page_number, image_hash, future)
+
+        for idx, (page_number, image_hash, future) in pending.items():
+            try:
+                text, duration = future.result(timeout=self.page_timeout)
+                self.cache.put(image_hash, text)
+                results.append(OCRPageResult(page_number, image_hash, text, duration))
+            except FutureTimeoutError:
+                future.cancel()
+                results.append(OCRPageResult(page_number, image_hash, "", self.page_timeout, error="OCR timed out"))
+            except Exception as e:
+                results.append(OCRPageResult(page_number, image_hash, "", 0.0, error=str(e)))
+
+        by_page = {result.page_number: result for result in results}
+        for idx in targets:
+            page = pages[idx]
+            result = by_page.get(page.metadata.get("page", idx))
+            if result and result.text.strip():
+                page.page_content = result.text
+                page.metadata["ocr"] = True
+
+        return sorted(results, key=lambda r: r.page_number)
+
+    def _render_page(self, page: Any) -> Tuple[bytes, str]:
+        """Rasterize a single page to grayscale PNG and hash its pixels with the OCR settings."""
+        pixmap = page.get_pixmap(dpi=self.dpi, colorspace=fitz.csGRAY)
+        digest = hashlib.sha256()
+        digest.update(f"{pixmap.width}x{pixmap.height}:{self.language}:{self.tesseract_config}:".encode())
+        digest.update(pixmap.samples)
+        return pixmap.tobytes("png"), digest.hexdigest()
+
+    @staticmethod
+    def summarize(results: List[OCRPageResult]) -> Dict[str, Any]:
+        """Summarize OCR results for `document_stats`."""
+        return {
+            "ocr_pages": len(results),
+            "ocr_cached_pages": sum(1 for r in results if r.cached),
+            "ocr_failed_pages": sum(1 for r in results if r.error),
+            "ocr_total_time": sum(r.duration for r in results),
+            "ocr_page_timings": {
+                r.page_number + 1: round(r.duration, 3) for r in results
+            },
+        }
@@ -0,0 +1,139 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+
+@dataclass
+class ParentSpan:
+    """Data class to hold one parent window: a run of sibling chunk rows on a page"""
+    docstore: Any
+    page: int
+    rows: List[int]
+    start: int
+    end: int
+    score: float
+    child: Document
+    child_hits: int = 1
+
+
+class ParentExpander:
+    """Expand small retrieved chunks to their parent page or section.
+
+    Only the small child chunks are embedded and stored. A parent is rebuilt
+    from the child's siblings on the same page using their stored character
+    offsets, so parent text is never stored a second time. Parents that
+    overlap or touch are merged into one, keeping the best child score.
+    Stores without an offset-aware docstore (e.g. Qdrant) return the child
+    chunks unchanged.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.parent = config.get("parent", "page")
+        self.max_parent_chars = config.get("max_parent_chars", 4000)
+        self.window_chars = config.get("window_chars", 1000)
+        self.max_parents = config.get("max_parents", 6)
+
+    def expand(self, vector_store: Any, scored_documents: List[Tuple[Document, float]]) -> List[Tuple[Document, float]]:
+        """Replace `(child, score)` pairs, best first, by merged `(parent, score)` pairs."""
+        docstores = self._docstores(vector_store)
+        spans: Dict[Tuple[int, int], List[ParentSpan]] = {}
+        passthrough: List[Tuple[Document, float]] = []
+
+        for doc, score in scored_documents:
+            span = self._parent_span(docstores, doc, score)
+            if span is None:
+                passthrough.append((doc, score))
+                continue
+            spans.setdefault((id(span.docstore), span.page), []).append(span)
+
+        parents = [
+            (self._to_document(span), span.score)
+            for page_spans in spans.values()
+            for span in self._merge(page_spans)
+        ]
+        ranked = sorted(parents + passthrough, key=lambda pair: pair[1], reverse=True)
+        return ranked[:self.max_parents] if self.max_parents else ranked
+
+    @staticmethod
+    def _docstores(vector_store: Any) -> List[Any]:
+        layers = vector_store._layers() if hasattr(vector_store, "_layers") else [vector_store]
+        return [
+            layer.docstore for layer in layers
+            if hasattr(getattr(layer, "docstore", None), "page_rows")
+        ]
+
+    def _parent_span(self, docstores: List[Any], doc: Document, score: float) -> Optional[ParentSpan]:
+        if doc.id is None or doc.metadata.get("start_index") is None:
+            return None
+        for docstore in docstores:
+            row = docstore.row(doc.id)
+            if row is None:
+                continue
+            siblings = docstore.page_rows(row)
+            offsets = [docstore.offsets(sibling) for sibling in siblings]
+            page_start, page_end = offsets[0][0], max(end for _, end in offsets)
+            child_start, child_end = docstore.offsets(row)
+
+            if self.parent == "page" and page_end - page_start <= self.max_parent_chars:
+                low, high = page_start, page_end
+            else:
+                low, high = child_start - self.window_chars, child_end + self.window_chars
+            # Snap the window to whole sibling chunks so no word is cut.
+            rows = [s for s, (start, end) in zip(siblings, offsets) if start < high and end > low]
+            rows = rows or [row]
+            return ParentSpan(
+                docstore=docstore,
+                page=siblings[0],
+                rows=rows,
+                start=min(docstore.offsets(r)[0] for r in rows),
+                end=max(docstore.offsets(r)[1] for r in rows),
+                score=score,
+                child=doc
+            )
+        return None
+
+    @staticmethod
+    def _merge(spans: List[ParentSpan]) -> List[ParentSpan]:
+        merged: List[ParentSpan] = []
+        for span in sorted(spans, key=lambda s: s.start):
+            previous = merged[-1] if merged else None
+            if previous is not None and span.start <= previous.end:
+                previous.rows = sorted(set(previous.rows) | set(span.rows), key=lambda r: previous.docstore.offsets(r)[0])
+                previous.end = max(previous.end, span.end)
+                previous.child_hits += span.child_hits
+                if span.score > previous.score:
+                    previous.score, previous.child = span.score, span.child
+            else:
+                merged.append(span)
+        return merged
+
+    @staticmethod
+    def _to_document(span: ParentSpan) -> Document:
+        """Stitch the span's chunks by offset; overlaps are skipped and gaps padded to keep offsets exact."""
+        docstore = span.docstore
+        parts, cursor = [], span.start
+        for row in span.rows:
+            start, end = docstore.offsets(row)
+            if end <= cursor:
+                continue
+            text = docstore.text(row)
+            if start > cursor:
+                parts.append(" " * (start - cursor))
+                parts.append(text)
+            else:
+                parts.append(text[cursor - start:])
+            cursor = end
+
+        metadata = dict(span.child.metadata)
+        metadata.update({
+            "start_index": span.start,
+            "end_index": span.end,
+            "chunk_size": span.end - span.start,
+            "child_hits": span.child_hits,
+            "parent": True
+        })
+        if metadata.get("source_type") == "transcript":
+            first, last = docstore.metadata(span.rows[0]), docstore.metadata(span.rows[-1])
+            metadata["start"], metadata["end"] = first.get("start"), last.get("end")
+        return Document(page_content="".join(parts), metadata=metadata)
@@ -0,0 +1,220 @@
+import hashlib
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from .text_splitter import get_tokenizer
+
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=4)
+def _load_tokenizer(tokenizer_name: Optional[str]) -> Optional[Any]:
+    """The named tokenizer, or None (remembered) when it cannot be loaded."""
+    if not tokenizer_name:
+        return None
+    try:
+        return get_tokenizer(tokenizer_name)
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str, tokenizer_name: Optional[str]) -> int:
+    """Token count of `text`, cached since the same chunks and history recur across turns.
+
+    Falls back to a characters/4 estimate when the tokenizer cannot be loaded.
+    """
+    tokenizer = _load_tokenizer(tokenizer_name)
+    if tokenizer is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+def format_timestamp(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:d}:{secs:02d}"
+
+
+@dataclass
+class ContextBlock:
+    """A run of adjacent retrieved chunks from one file, merged on their character offsets"""
+    file_name: str
+    page_number: int
+    start: int
+    end: int
+    text: str
+    score: float
+    chunk_count: int = 1
+    start_time: Optional[float] = None
+    end_time: Optional[float] = None
+
+    def render(self) -> str:
+        if self.start_time is not None:
+            location = f"{format_timestamp(self.start_time)}–{format_timestamp(self.end_time)}"
+        else:
+            location = f"page {self.page_number + 1}"
+        return f"[Source: {self.file_name}, {location}]\n{self.text}"
+
+
+@dataclass
+class PackedPrompt:
+    """Data class to hold the packed prompt sections and their token usage"""
+    context: str
+    chat_history: List[Dict[str, str]]
+    token_usage: Dict[str, int] = field(default_factory=dict)
+    chunks_used: int = 0
+    chunks_dropped: int = 0
+
+
+class PromptPacker:
+    def __init__(self, config: Dict[str, Any]):
+        """Fit retrieved context and chat history into the selected model's context window.
+
+        Settings come from `prompt_packer`; the window itself from `models.<name>.context_window`.
+        """
+        settings = config.get("prompt_packer", {})
+        self.models = config.get("models", {})
+        self.tokenizer_name = settings.get("tokenizer")
+        self.output_tokens = settings.get("output_tokens", 1024)
+        self.history_share = settings.get("history_share", 0.25)
+        self.max_context_tokens = settings.get("max_context_tokens")
+
+    def count(self, text: str) -> int:
+        return count_tokens(text, self.tokenizer_name)
+
+    def budget(self, model: str) -> int:
+        """Prompt tokens available for `model` after reserving room for the answer."""
+        context_window = self.models.get(model, {}).get("context_window", 8192)
+        return max(context_window - self.output_tokens, 0)
+
+    def pack(
+        self,
+        model: str,
+        template: str,
+        question: str,
+        scored_documents: List[Tuple[Document, float]],
+        history: List[Dict[str, str]]
+    ) -> PackedPrompt:
+        """Fill the budget: fixed sections first, then history (up to its share), then context by relevance."""
+        budget = self.budget(model)
+        fixed = {"template": self.count(template), "question": self.count(question)}
+        remaining = max(budget - sum(fixed.values()), 0)
+
+        history_cap = int(remaining * self.history_share)
+        kept_history, history_tokens = self._trim_history(history, history_cap)
+        remaining -= history_tokens
+        if self.max_context_tokens:
+            remaining = min(remaining, self.max_context_tokens)
+
+        blocks, context_tokens, dropped = self._fill_context(scored_documents, remaining)
+        context = "\n\n".join(block.render() for block in blocks)
+
+        token_usage = {
+            **fixed,
+            "context": context_tokens,
+            "history": history_tokens,
+            "reserved_output": self.output_tokens,
+            "total_prompt": sum(fixed.values()) + context_tokens + history_tokens,
+            "budget": budget
+        }
+        return PackedPrompt(
+            context=context,
+            chat_history=kept_history,
+            token_usage=token_usage,
+            chunks_used=sum(block.chunk_count for block in blocks),
+            chunks_dropped=dropped
+        )
+
+    def _trim_history(self, history: List[Dict[str, str]], cap: int) -> Tuple[List[Dict[str, str]], int]:
+        """Keep the most recent messages that fit in `cap` tokens."""
+        kept, used = [], 0
+        for message in reversed(history):
+            tokens = self.count(f"{message['role']}: {message['content']}")
+            if used + tokens > cap:
+                break
+            kept.append(message)
+            used += tokens
+        return list(reversed(kept)), used
+
+    def _fill_context(
+        self, scored_documents: List[Tuple[Document, float]], budget: int
+    ) -> Tuple[List[ContextBlock], int, int]:
+        """Greedily add chunks by descending score, charging only text not already in the prompt."""
+        blocks: List[ContextBlock] = []
+        seen = set()
+        used = dropped = 0
+
+        for doc, score in sorted(scored_documents, key=lambda pair: pair[1], reverse=True):
+            digest = hashlib.sha1(doc.page_content.encode()).digest()
+            if digest in seen:
+                continue
+            seen.add(digest)
+
+            metadata = doc.metadata
+            start = metadata.get("start_index", -1)
+            candidate = ContextBlock(
+                file_name=metadata.get("file_name", "unknown"),
+                page_number=metadata.get("page_number", metadata.get("page", 0)),
+                start=start,
+                end=metadata.get("end_index", start + len(doc.page_content)),
+                text=doc.page_content,
+                score=score,
+                start_time=metadata.get("start") if metadata.get("source_type") == "transcript" else None,
+                end_time=metadata.get("end") if metadata.get("source_type") == "transcript" else None
+            )
+            neighbour = self._adjacent_block(blocks, candidate)
+            if neighbour is None:
+                cost = self.count(candidate.render()) + 1
+                if used + cost > budget:
+                    dropped += 1
+                    continue
+                blocks.append(candidate)
+            else:
+                merged = self._merge(neighbour, candidate)
+                cost = self.count(merged.render()) - self.count(neighbour.render())
+                if used + cost > budget:
+                    dropped += 1
+                    continue
+                blocks[blocks.index(neighbour)] = merged
+            used += cost
+
+        return blocks, used, dropped
+
+    @staticmethod
+    def _adjacent_block(blocks: List[ContextBlock], candidate: ContextBlock) -> Optional[ContextBlock]:
+        """A selected block from the same page whose offsets touch or overlap the candidate's."""
+        if candidate.start < 0:
+            return None
+        for block in blocks:
+            if (
+                block.file_name == candidate.file_name
+                and block.page_number == candidate.page_number
+                and block.start >= 0
+                and candidate.start <= block.end
+                and block.start <= candidate.end
+            ):
+                return block
+        return None
+
+    @staticmethod
+    def _merge(block: ContextBlock, candidate: ContextBlock) -> ContextBlock:
+        first, second = (block, candidate) if block.start <= candidate.start else (candidate, block)
+        if second.end <= first.end:
+            text = first.text
+        else:
+            text = first.text + second.text[first.end - second.start:]
+        return ContextBlock(
+            file_name=block.file_name,
+            page_number=block.page_number,
+            start=first.start,
+            end=max(first.end, second.end),
+            text=text,
+            score=max(block.score, candidate.score),
+            chunk_count=block.chunk_count + candidate.chunk_count,
+            start_time=first.start_time,
+            end_time=second.end_time if second.end > first.end else first.end_time
+        )
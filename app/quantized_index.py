@@ -0,0 +1,308 @@
+import os
+import tempfile
+import threading
+import uuid
+import weakref
+from array import array
+from contextlib import nullcontext, suppress
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from .concurrent_faiss import ConcurrentFAISS
+from .metadata_filter import DocumentFilter, get_metadata_index, search_index
+
+QUANTIZATIONS = ("none", "fp16", "int8", "pq")
+
+
+def build_index(dim: int, quantization: str, pq_m: int = 16) -> faiss.Index:
+    """Empty L2 index storing vectors as float16, int8 or 8-bit PQ codes (`pq_m` bytes per vector)."""
+    if quantization == "fp16":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_L2)
+    if quantization == "int8":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+    if quantization == "pq":
+        return faiss.IndexPQ(dim, pq_m, 8, faiss.METRIC_L2)
+    if quantization == "none":
+        return faiss.IndexFlatL2(dim)
+    raise ValueError(f"Unsupported quantization: {quantization}")
+
+
+def index_bytes(index: faiss.Index) -> int:
+    """Bytes held by the stored codes (excluding the small trained quantizer)."""
+    return index.code_size * index.ntotal
+
+
+def _close_sidecar(file: Any, path: Optional[str]) -> None:
+    file.close()
+    if path:
+        with suppress(FileNotFoundError):
+            os.unlink(path)
+
+
+def exact_rerank(vectors: np.ndarray, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions and squared L2 distances of the `k` rows of `vectors` nearest to `query`."""
+    distances = ((vectors - query) ** 2).sum(axis=1)
+    order = np.argsort(distances, kind="stable")[:k]
+    return order, distances[order]
+
+
+class VectorSidecar:
+    """Append-only float32 copy of the indexed vectors, read through a memory map.
+
+    The quantized index only keeps compact codes in memory; exact vectors are
+    paged in from this file for the few candidates being re-ranked. Rows
+    removed from the index are dropped from the row map, their bytes are
+    reclaimed only on rebuild. With a `directory` the sidecar owns a uniquely
+    named file there, deleted once the sidecar is garbage-collected or closed.
+    """
+
+    def __init__(self, dim: int, directory: Optional[str] = None):
+        self.dim = dim
+        self._directory = directory
+        self._slots = 0
+        self._rows = array("q")
+        self._view: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        self._open()
+
+    def _open(self) -> None:
+        self._path = str(Path(self._directory) / f"{uuid.uuid4().hex}.f32") if self._directory else None
+        self._file = open(self._path, "w+b") if self._path else tempfile.TemporaryFile()
+        self._finalizer = weakref.finalize(self, _close_sidecar, self._file, self._path)
+
+    def close(self) -> None:
+        """Close the file, deleting it if it lives in `directory`."""
+        self._finalizer()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def nbytes(self) -> int:
+        return self._slots * 4 * self.dim
+
+    def append(self, vectors: np.ndarray) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock:
+            self._file.seek(0, 2)
+            self._file.write(vectors.tobytes())
+            self._file.flush()
+            self._rows.extend(range(self._slots, self._slots + len(vectors)))
+            self._slots += len(vectors)
+
+    def vectors(self, rows: Sequence[int]) -> np.ndarray:
+        """Exact vectors of the given index rows."""
+        view = self._mapping()
+        return np.asarray(view[[self._rows[row] for row in rows]], dtype=np.float32)
+
+    def sample(self, count: int, seed: int = 0) -> np.ndarray:
+        rows = np.arange(len(self._rows))
+        if count < len(rows):
+            rows = np.sort(np.random.default_rng(seed).choice(rows, count, replace=False))
+        return self.vectors(rows.tolist())
+
+    def remove(self, rows: Iterable[int]) -> None:
+        """Forget index rows, mirroring `faiss.Index.remove_ids` renumbering."""
+        removed = set(rows)
+        with self._lock:
+            self._rows = array("q", (slot for row, slot in enumerate(self._rows) if row not in removed))
+
+    def _mapping(self) -> np.memmap:
+        view = self._view
+        if view is None or len(view) < self._slots:
+            with self._lock:
+                if self._view is None or len(self._view) < self._slots:
+                    self._view = np.memmap(self._file, dtype=np.float32, mode="r", shape=(self._slots, self.dim))
+                view = self._view
+        return view
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        self._file.flush()
+        state["_bytes"] = bytes(np.asarray(self._mapping()).tobytes()) if self._slots else b""
+        for key in ("_file", "_path", "_finalizer", "_view", "_lock"):
+            state.pop(key)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore into a file of its own, so the copy outlives the original's cleanup."""
+        data = state.pop("_bytes")
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._view = None
+        self._open()
+        self._file.write(data)
+        self._file.flush()
+
+
+class QuantizedFAISS(ConcurrentFAISS):
+    """ConcurrentFAISS whose index stores float16, int8 or PQ codes.
+
+    Searches fetch `rerank_factor * k` candidates from the compact index and
+    re-rank them exactly against the float32 sidecar, so the returned scores
+    are true squared L2 distances. Int8 and PQ codes need training: until
+    `min_train_size` vectors are indexed the store uses an exact flat index,
+    then it is rebuilt once from the sidecar.
+    """
+
+    def __init__(self, *args: Any, settings: Optional[Dict[str, Any]] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        settings = settings or {}
+        self.quantization = settings.get("quantization", "fp16")
+        self.pq_m = settings.get("pq_m", 16)
+        self.rerank_factor = max(1, settings.get("rerank_factor", 4))
+        self.min_train_size = 0 if self.quantization == "fp16" else settings.get("min_train_size", 10000)
+        self.train_sample = settings.get("train_sample", 65536)
+        sidecar_dir = settings.get("sidecar_dir")
+        if sidecar_dir:
+            Path(sidecar_dir).mkdir(parents=True, exist_ok=True)
+        self.sidecar = VectorSidecar(self.index.d, sidecar_dir)
+
+    @classmethod
+    def create(
+        cls,
+        embeddings: Embeddings,
+        dim: int,
+        settings: Dict[str, Any],
+        docstore: Any
+    ) -> "QuantizedFAISS":
+        """Empty store; vectors are added with `add_embeddings`."""
+        return cls(embeddings, faiss.IndexFlatL2(dim), docstore, {}, settings=settings)
+
+    @property
+    def is_quantized(self) -> bool:
+        return not isinstance(self.index, faiss.IndexFlat)
+
+    def add_embeddings(
+        self,
+        text_embeddings: Iterable[Tuple[str, List[float]]],
+        metadatas: Optional[Iterable[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        text_embeddings = list(text_embeddings)
+        vectors = np.array([vector for _, vector in text_embeddings], dtype=np.float32)
+        if self._normalize_L2:
+            faiss.normalize_L2(vectors)
+        with self.lock:
+            ids = super().add_embeddings(text_embeddings, metadatas=metadatas, ids=ids, **kwargs)
+            self.sidecar.append(vectors)
+            if not self.is_quantized and self.index.ntotal >= self.min_train_size:
+                self._quantize()
+            return ids
+
+    def _quantize(self) -> None:
+        """Replace the flat index by the trained quantized one, keeping row order."""
+        index = build_index(self.index.d, self.quantization, self.pq_m)
+        if not index.is_trained:
+            index.train(self.sidecar.sample(self.train_sample))
+        total, batch = len(self.sidecar), 65536
+        for start in range(0, total, batch):
+            index.add(self.sidecar.vectors(range(start, min(start + batch, total))))
+        self.index = index
+
+    def _search_exact(
+        self, vector: np.ndarray, k: int, fetch_k: int, doc_filter: Optional[DocumentFilter]
+    ) -> Tuple[List[int], np.ndarray, np.ndarray]:
+        """Rows, exact vectors and distances of the best `k` rows out of `fetch_k` candidates."""
+        if isinstance(self.index, faiss.IndexPQ) and doc_filter is not None and not doc_filter.is_empty:
+            rows = self._pq_candidates(vector, fetch_k, doc_filter)
+        else:
+            _, indices = search_index(self, vector, fetch_k if self.is_quantized else k, doc_filter)
+            rows = [int(i) for i in indices[0] if i != -1]
+        if not rows:
+            return [], np.empty((0, self.index.d), dtype=np.float32), np.empty(0, dtype=np.float32)
+        vectors = self.sidecar.vectors(rows)
+        order, distances = exact_rerank(vectors, vector[0], k)
+        return [rows[i] for i in order], vectors[order], distances
+
+    def _pq_candidates(self, vector: np.ndarray, fetch_k: int, doc_filter: DocumentFilter) -> List[int]:
+        """Filtered PQ search: IndexPQ takes no ID selector, so the matching rows are scored from their codes."""
+        rows = np.flatnonzero(get_metadata_index(self).mask(doc_filter))
+        if not len(rows):
+            return []
+        pq = self.index.pq
+        table = np.empty((pq.M, pq.ksub), dtype=np.float32)
+        pq.compute_distance_table(faiss.swig_ptr(vector[0]), faiss.swig_ptr(table))
+        codes = faiss.rev_swig_ptr(self.index.codes.data(), self.index.ntotal * pq.code_size).reshape(-1, pq.code_size)
+        distances = table[np.arange(pq.M), codes[rows]].sum(axis=1)
+        best = np.argsort(distances, kind="stable")[:fetch_k]
+        return rows[best].tolist()
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[Any] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        if filter is not None and not isinstance(filter, DocumentFilter):
+            return super().similarity_search_with_score_by_vector(embedding, k=k, filter=filter, **kwargs)
+        with self.lock:
+            vector = np.array([embedding], dtype=np.float32)
+            if self._normalize_L2:
+                faiss.normalize_L2(vector)
+            rows, _, distances = self._search_exact(vector, k, k * self.rerank_factor, filter)
+            return [
+                (self.docstore.search(self.index_to_docstore_id[row]), float(distance))
+                for row, distance in zip(rows, distances)
+            ]
+
+    def max_marginal_relevance_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        *,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Any] = None
+    ) -> List[Tuple[Document, float]]:
+        if filter is not None and not isinstance(filter, DocumentFilter):
+            return super().max_marginal_relevance_search_with_score_by_vector(
+                embedding, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=filter
+            )
+        with self.lock:
+            vector = np.array([embedding], dtype=np.float32)
+            if self._normalize_L2:
+                faiss.normalize_L2(vector)
+            rows, vectors, distances = self._search_exact(vector, fetch_k, fetch_k * self.rerank_factor, filter)
+            selected = maximal_marginal_relevance(vector, list(vectors), k=k, lambda_mult=lambda_mult)
+            return [
+                (self.docstore.search(self.index_to_docstore_id[rows[j]]), float(distances[j]))
+                for j in selected
+            ]
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        with self.lock:
+            row_by_id = {doc_id: row for row, doc_id in self.index_to_docstore_id.items()}
+            rows = [row_by_id[doc_id] for doc_id in ids or [] if doc_id in row_by_id]
+            result = super().delete(ids, **kwargs)
+            self.sidecar.remove(rows)
+            return result
+
+    def merge_from(self, target: Any) -> None:
+        """Append another FAISS store's documents and vectors, keeping their ids."""
+        with getattr(target, "lock", nullcontext()):
+            rows = sorted(target.index_to_docstore_id)
+            if not rows:
+                return
+            sidecar = getattr(target, "sidecar", None)
+            vectors = sidecar.vectors(rows) if sidecar is not None else target.index.reconstruct_n(0, target.index.ntotal)[rows]
+            ids = [target.index_to_docstore_id[row] for row in rows]
+            documents = [target.docstore.search(doc_id) for doc_id in ids]
+        self.add_embeddings(
+            [(doc.page_content, vector) for doc, vector in zip(documents, vectors)],
+            metadatas=[doc.metadata for doc in documents],
+            ids=ids
+        )
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Resident index codes versus the float32 bytes they replace."""
+        return {
+            "vectors": self.index.ntotal,
+            "index_bytes": index_bytes(self.index),
+            "float32_bytes": self.index.ntotal * self.index.d * 4,
+            "sidecar_bytes": self.sidecar.nbytes
+        }
@@ -0,0 +1,79 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+
+def chunk_id(doc: Document) -> str:
+    """Content hash identifying a chunk across sessions and stores (its score depends only on its text)."""
+    return hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+
+
+class CrossEncoderReranker:
+    """Score (query, chunk) pairs with a small local cross-encoder.
+
+    All pairs not already in the score cache go through the model in a single
+    batched forward pass. Scores are cached per (query hash, chunk id), so a
+    repeated or rephrased-identical question only scores newly retrieved chunks.
+    """
+
+    def __init__(self, model_name: str, max_length: int = 512, cache_size: int = 4096):
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.model = CrossEncoder(model_name, max_length=max_length, device="cpu")
+        self.cache_size = cache_size
+        self._scores: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def query_hash(query: str) -> str:
+        return hashlib.sha1(" ".join(query.split()).encode("utf-8")).hexdigest()
+
+    def score(self, query: str, documents: List[Document]) -> List[float]:
+        query_key = self.query_hash(query)
+        keys = [(query_key, chunk_id(doc)) for doc in documents]
+        scores: List[Optional[float]] = [None] * len(documents)
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._scores.get(key)
+                if cached is not None:
+                    self._scores.move_to_end(key)
+                    scores[i] = cached
+                else:
+                    missing.setdefault(key, []).append(i)
+            self.hits += len(documents) - sum(len(positions) for positions in missing.values())
+            self.misses += len(missing)
+
+        if missing:
+            pairs = [(query, documents[positions[0]].page_content) for positions in missing.values()]
+            predicted = self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+            with self._lock:
+                for (key, positions), value in zip(missing.items(), predicted):
+                    for i in positions:
+                        scores[i] = float(value)
+                    self._scores[key] = float(value)
+                while len(self._scores) > self.cache_size:
+                    self._scores.popitem(last=False)
+        return scores
+
+    def rerank(
+        self, query: str, documents: List[Document], top_n: int, min_score: Optional[float] = None
+    ) -> List[Tuple[Document, float]]:
+        """The `top_n` documents by cross-encoder score, best first."""
+        scored = sorted(zip(documents, self.score(query, documents)), key=lambda pair: pair[1], reverse=True)
+        if min_score is not None:
+            scored = [pair for pair in scored if pair[1] >= min_score]
+        return scored[:top_n]
+
+
+@lru_cache(maxsize=2)
+def get_reranker(model_name: str, max_length: int = 512, cache_size: int = 4096) -> Any:
+    """Load the cross-encoder once per process and share it (and its score cache) across sessions."""
+    return CrossEncoderReranker(model_name, max_length, cache_size)
@@ -0,0 +1,256 @@
+import fcntl
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from .docstore import CompactDocstore
+from .metadata_filter import DocumentFilter, search_index
+
+CURRENT_FILE = "CURRENT"
+BLOB_FILE = "chunks.blob"
+LOCK_FILE = "write.lock"
+
+
+@dataclass(frozen=True)
+class CorpusSnapshot:
+    """Immutable view of one published generation of the shared corpus"""
+    generation: int
+    store: Optional[FAISS]
+
+
+class SharedCorpus:
+    """Read-mostly FAISS corpus shared by every session of every worker process.
+
+    Each published generation lives in `gen-<N>/` and is loaded with
+    `IO_FLAG_MMAP`, so worker processes share the index pages through the OS
+    page cache. Chunk text goes to one append-only blob that every generation
+    references. A writer publishes a new generation by atomically replacing the
+    `CURRENT` pointer; readers keep whichever snapshot they grabbed and pick up
+    the new one on their next query, without taking any lock.
+    """
+
+    def __init__(self, path: str, embeddings: Embeddings, keep_generations: int = 2):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.embeddings = embeddings
+        self.keep_generations = max(2, keep_generations)
+        self._snapshot = CorpusSnapshot(0, None)
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._reload_lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Latest generation published on disk."""
+        try:
+            return int((self.path / CURRENT_FILE).read_text().strip())
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def snapshot(self) -> CorpusSnapshot:
+        """Return the newest published snapshot, loading it if this process has not yet.
+
+        `CURRENT` is only re-read when its inode or mtime changed since the last
+        call. A generation pruned between reading `CURRENT` and loading it means
+        a newer one was published, so the pointer is read again.
+        """
+        stamp = self._current_stamp()
+        if stamp == self._stamp:
+            return self._snapshot
+
+        with self._reload_lock:
+            while True:
+                generation = self.generation
+                if generation == self._snapshot.generation:
+                    break
+                try:
+                    self._snapshot = CorpusSnapshot(generation, self._load(generation, mmap=True))
+                    break
+                except (FileNotFoundError, RuntimeError):
+                    # faiss reports a missing index file as RuntimeError.
+                    if self.generation == generation:
+                        raise
+            self._stamp = stamp
+            return self._snapshot
+
+    def _current_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path / CURRENT_FILE)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def append(self, documents: List[Document]) -> int:
+        """Embed and append documents, publishing them as a new generation."""
+        if not documents:
+            return self.generation
+
+        with self._write_lock():
+            generation = self.generation
+            store = self._load(generation, mmap=False)
+            if store is None:
+                store = FAISS.from_documents(
+                    documents, self.embeddings, docstore=CompactDocstore(str(self.path / BLOB_FILE))
+                )
+            else:
+                store.add_documents(documents)
+
+            new_generation = generation + 1
+            self._save(store, new_generation)
+            self._publish(new_generation)
+            self._prune(new_generation)
+            return new_generation
+
+    def _load(self, generation: int, mmap: bool) -> Optional[FAISS]:
+        if generation == 0:
+            return None
+        directory = self._generation_dir(generation)
+        index = faiss.read_index(str(directory / "index.faiss"), faiss.IO_FLAG_MMAP if mmap else 0)
+        with open(directory / "docstore.pkl", "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        return FAISS(self.embeddings, index, docstore, index_to_docstore_id)
+
+    def _save(self, store: FAISS, generation: int) -> None:
+        directory = self._generation_dir(generation)
+        temp_directory = directory.with_name(f"{directory.name}.{os.getpid()}.tmp")
+        temp_directory.mkdir(parents=True, exist_ok=True)
+        faiss.write_index(store.index, str(temp_directory / "index.faiss"))
+        with open(temp_directory / "docstore.pkl", "wb") as f:
+            pickle.dump((store.docstore, store.index_to_docstore_id), f)
+        os.replace(temp_directory, directory)
+
+    def _publish(self, generation: int) -> None:
+        temp_path = self.path / f"{CURRENT_FILE}.{os.getpid()}.tmp"
+        temp_path.write_text(str(generation))
+        os.replace(temp_path, self.path / CURRENT_FILE)
+
+    def _prune(self, generation: int) -> None:
+        """Remove generations that no new reader can pick up any more."""
+        for directory in self.path.glob("gen-*"):
+            suffix = directory.name[len("gen-"):]
+            if suffix.isdigit() and int(suffix) <= generation - self.keep_generations:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    def _generation_dir(self, generation: int) -> Path:
+        return self.path / f"gen-{generation}"
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        """Serialize writers across threads and processes."""
+        with open(self.path / LOCK_FILE, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+_corpora: Dict[str, SharedCorpus] = {}
+_corpora_lock = threading.Lock()
+
+
+def get_shared_corpus(path: str, embeddings: Embeddings) -> SharedCorpus:
+    """Return the process-wide SharedCorpus for `path`."""
+    key = str(Path(path).resolve())
+    with _corpora_lock:
+        if key not in _corpora:
+            _corpora[key] = SharedCorpus(key, embeddings)
+        return _corpora[key]
+
+
+class LayeredVectorStore(VectorStore):
+    """Query a shared corpus snapshot together with a session's private overlay."""
+
+    def __init__(self, corpus: SharedCorpus, overlay: Optional[FAISS] = None):
+        self.corpus = corpus
+        self.overlay = overlay
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.corpus.embeddings
+
+    def _layers(self) -> List[FAISS]:
+        shared = self.corpus.snapshot().store
+        return [layer for layer in (shared, self.overlay) if layer is not None]
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[str]:
+        """Add texts to the session overlay; the shared corpus is only written via `SharedCorpus.append`."""
+        texts = list(texts)
+        if self.overlay is None:
+            self.overlay = FAISS.from_texts(texts, self.embeddings, metadatas=metadatas, docstore=CompactDocstore(), **kwargs)
+            return list(self.overlay.index_to_docstore_id.values())
+        return self.overlay.add_texts(texts, metadatas=metadatas, **kwargs)
+
+    def _candidates(
+        self, query_vector: np.ndarray, k: int, doc_filter: Optional[DocumentFilter] = None, with_vectors: bool = False
+    ) -> List[Tuple[Document, float, Optional[np.ndarray]]]:
+        """Top-k (document, L2 distance, vector) over every layer, filtered inside each index search."""
+        candidates = []
+        for layer in self._layers():
+            with getattr(layer, "lock", nullcontext()):
+                scores, indices = search_index(layer, query_vector.reshape(1, -1), k, doc_filter)
+                for score, i in zip(scores[0], indices[0]):
+                    if i != -1:
+                        doc = layer.docstore.search(layer.index_to_docstore_id[int(i)])
+                        vector = layer.index.reconstruct(int(i)) if with_vectors else None
+                        candidates.append((doc, float(score), vector))
+        return sorted(candidates, key=lambda c: c[1])[:k]
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[DocumentFilter] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        query_vector = np.array(embedding, dtype=np.float32)
+        return [(doc, score) for doc, score, _ in self._candidates(query_vector, k, filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embeddings.embed_query(query), k=k, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, **kwargs)]
+
+    def max_marginal_relevance_search(
+        self, query: str, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5,
+        filter: Optional[DocumentFilter] = None, **kwargs: Any
+    ) -> List[Document]:
+        """Run MMR over the union of candidates fetched from every layer."""
+        return [
+            doc for doc, _ in self.max_marginal_relevance_search_with_relevance_scores(
+                query, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=filter
+            )
+        ]
+
+    def max_marginal_relevance_search_with_relevance_scores(
+        self, query: str, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5,
+        filter: Optional[DocumentFilter] = None
+    ) -> List[Tuple[Document, float]]:
+        """MMR selection, each document paired with its relevance to the query (higher is better)."""
+        query_vector = np.array(self.embeddings.embed_query(query), dtype=np.float32)
+        candidates = self._candidates(query_vector, fetch_k, filter, with_vectors=True)
+        selected = maximal_marginal_relevance(
+            query_vector, [vector for _, _, vector in candidates], k=k, lambda_mult=lambda_mult
+        )
+        return [(candidates[j][0], self._euclidean_relevance_score_fn(candidates[j][1])) for j in selected]
+
+    @classmethod
+    def from_texts(
+        cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+        path: Optional[str] = None, **kwargs: Any
+    ) -> "LayeredVectorStore":
+        """Create a store over a new shared corpus at `path` (a temporary directory by default)."""
+        corpus = SharedCorpus(path or tempfile.mkdtemp(prefix="shared-corpus-"), embedding)
+        metadatas = metadatas or [{} for _ in texts]
+        corpus.append([Document(page_content=text, metadata=metadata) for text, metadata in zip(texts, metadatas)])
+        return cls(corpus)
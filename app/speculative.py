@@ -0,0 +1,140 @@
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import BaseMessage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SpeculativeResult:
+    """Data class to hold the outcome of one speculative answer"""
+    output: str
+    model: str
+    draft: str
+    upgraded: bool
+    similarity: float
+    draft_latency: float
+    final_latency: float
+
+
+class SpeculationStats:
+    """Process-wide counters of how often the fast draft had to be replaced."""
+
+    def __init__(self):
+        self.drafts = 0
+        self.upgrades = 0
+        self.similarity_total = 0.0
+        self.time_saved = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, result: SpeculativeResult) -> None:
+        with self._lock:
+            self.drafts += 1
+            self.upgrades += int(result.upgraded)
+            self.similarity_total += result.similarity
+            if not result.upgraded:
+                self.time_saved += max(result.final_latency - result.draft_latency, 0.0)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "drafts": self.drafts,
+                "upgrades": self.upgrades,
+                "upgrade_rate": self.upgrades / self.drafts if self.drafts else 0.0,
+                "avg_similarity": self.similarity_total / self.drafts if self.drafts else 0.0,
+                "time_saved": self.time_saved
+            }
+
+
+speculation_stats = SpeculationStats()
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="speculative")
+
+
+class SpeculativeAnswerer:
+    def __init__(self, fast_llm: Any, strong_llm: Any, embeddings: Embeddings, threshold: float = 0.85):
+        """Answer with the fast model at once while the strong model answers in the background.
+
+        The draft is kept when its embedding agrees with the strong answer
+        (cosine similarity >= `threshold`), otherwise it is replaced.
+        """
+        self.fast_llm = fast_llm
+        self.strong_llm = strong_llm
+        self.embeddings = embeddings
+        self.threshold = threshold
+
+    def answer(self, messages: List[BaseMessage], on_update: Optional[Callable[[str], None]] = None) -> SpeculativeResult:
+        """Stream the draft through `on_update`, then call it again with the final text if upgraded.
+
+        `on_update` runs on the calling thread; only the strong model's request runs in a worker.
+        If the strong model fails after a draft was streamed, the draft is kept.
+        """
+        started = time.monotonic()
+        strong_future = _executor.submit(self._timed_invoke, self.strong_llm, messages, started)
+
+        draft = ""
+        for chunk in self.fast_llm.stream(messages):
+            draft += chunk.content
+            if on_update:
+                on_update(draft)
+        draft_latency = time.monotonic() - started
+
+        try:
+            final, final_latency = strong_future.result()
+        except Exception as e:
+            if not draft.strip():
+                raise
+            # The user is already reading the draft: keep it rather than erase it (not counted in the stats).
+            logger.warning(f"Strong model failed, keeping the draft: {e}")
+            return SpeculativeResult(
+                output=draft,
+                model=self.fast_llm.model_name,
+                draft=draft,
+                upgraded=False,
+                similarity=0.0,
+                draft_latency=draft_latency,
+                final_latency=time.monotonic() - started
+            )
+
+        similarity = self.agreement(draft, final)
+        upgraded = similarity < self.threshold
+        if upgraded and on_update:
+            on_update(final)
+
+        result = SpeculativeResult(
+            output=final if upgraded else draft,
+            model=self.strong_llm.model_name if upgraded else self.fast_llm.model_name,
+            draft=draft,
+            upgraded=upgraded,
+            similarity=similarity,
+            draft_latency=draft_latency,
+            final_latency=final_latency
+        )
+        speculation_stats.record(result)
+        return result
+
+    def agreement(self, draft: str, final: str) -> float:
+        """Cosine similarity of the two answers' embeddings (1.0 for identical normalized text)."""
+        if self._normalize(draft) == self._normalize(final):
+            return 1.0
+        vectors = np.asarray(self.embeddings.embed_documents([draft, final]), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1)
+        if not norms.all():
+            return 0.0
+        return float(vectors[0] @ vectors[1] / (norms[0] * norms[1]))
+
+    @staticmethod
+    def _timed_invoke(llm: Any, messages: List[BaseMessage], started: float) -> tuple:
+        response = llm.invoke(messages)
+        return response.content, time.monotonic() - started
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return re.sub(r"\W+", " ", text.lower()).strip()
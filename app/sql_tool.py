@@ -0,0 +1,242 @@
+import hashlib
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain.prompts import PromptTemplate
+from sqlalchemy import inspect
+
+from .database_manager import SQLDatabaseManager
+
+# Literals, quoted identifiers and comments, masked before looking for keywords.
+QUOTED_OR_COMMENT = re.compile(
+    r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|`(?:[^`]|``)*`|\[[^\]]*\]|--[^\n]*|/\*.*?\*/""",
+    re.DOTALL
+)
+# A write keyword only starts a statement at the beginning or right after a parenthesis
+# (a data-modifying CTE or subquery); followed by "(" it is a function call like REPLACE(...).
+FORBIDDEN_KEYWORDS = re.compile(
+    r"(?:^|[()])\s*(insert|update|delete|merge|drop|alter|create|truncate|replace|grant|revoke|attach|detach|pragma|vacuum|copy|call|exec|execute|lock|set)\b(?!\s*\()",
+    re.IGNORECASE
+)
+# Reserved everywhere, so never an unquoted identifier: SELECT ... INTO writes a table or file.
+FORBIDDEN_CLAUSES = re.compile(r"\binto\b", re.IGNORECASE)
+
+
+@dataclass
+class TableInfo:
+    """Data class to hold the introspected description of one table"""
+    name: str
+    columns: List[str]
+    primary_key: List[str]
+    foreign_keys: List[str]
+    sample_rows: List[Dict[str, Any]] = field(default_factory=list)
+
+    def describe(self) -> str:
+        lines = [f"TABLE {self.name} ({', '.join(self.columns)})"]
+        if self.primary_key:
+            lines.append(f"  PRIMARY KEY ({', '.join(self.primary_key)})")
+        lines.extend(f"  FOREIGN KEY {fk}" for fk in self.foreign_keys)
+        if self.sample_rows:
+            lines.append(f"  SAMPLE ROWS: {self.sample_rows}")
+        return "\n".join(lines)
+
+
+class SchemaIndex:
+    """Introspected schema of one database with table embeddings for retrieval.
+
+    The schema is read once and re-checked against a cheap structural
+    fingerprint (table and column names/types, no sample rows) only after
+    `ttl` seconds, so it is not re-read on every agent turn.
+    """
+
+    def __init__(self, manager: SQLDatabaseManager, embeddings: Embeddings, sample_rows: int = 3, ttl: float = 300):
+        self.manager = manager
+        self.embeddings = embeddings
+        self.sample_rows = sample_rows
+        self.ttl = ttl
+        self.fingerprint: Optional[str] = None
+        self.tables: Dict[str, TableInfo] = {}
+        self._table_names: List[str] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """Re-introspect the schema if the TTL expired and its fingerprint changed."""
+        with self._lock:
+            if self.fingerprint is not None and time.monotonic() - self._checked_at < self.ttl:
+                return
+            structure = self._read_structure()
+            fingerprint = hashlib.sha256(repr(sorted(structure.items())).encode()).hexdigest()
+            self._checked_at = time.monotonic()
+            if fingerprint != self.fingerprint:
+                self._build(structure)
+                self.fingerprint = fingerprint
+
+    def relevant_tables(self, question: str, top_k: int = 5) -> List[TableInfo]:
+        """Return the tables most similar to the question, plus the tables they reference."""
+        self.refresh()
+        if not self._table_names:
+            return []
+
+        query = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        scores = self._vectors @ (query / (np.linalg.norm(query) or 1.0))
+        selected = [self._table_names[i] for i in np.argsort(-scores)[:top_k]]
+
+        for name in list(selected):
+            for fk in self.tables[name].foreign_keys:
+                referenced = fk.split("REFERENCES ", 1)[-1].split("(", 1)[0].strip()
+                if referenced in self.tables and referenced not in selected:
+                    selected.append(referenced)
+        return [self.tables[name] for name in selected]
+
+    def _read_structure(self) -> Dict[str, tuple]:
+        inspector = inspect(self.manager.engine)
+        return {
+            table: tuple((column["name"], str(column["type"])) for column in inspector.get_columns(table))
+            for table in inspector.get_table_names()
+        }
+
+    def _build(self, structure: Dict[str, tuple]) -> None:
+        inspector = inspect(self.manager.engine)
+        tables = {}
+        for table, columns in structure.items():
+            foreign_keys = [
+                f"({', '.join(fk['constrained_columns'])}) REFERENCES {fk['referred_table']}({', '.join(fk['referred_columns'])})"
+                for fk in inspector.get_foreign_keys(table)
+            ]
+            tables[table] = TableInfo(
+                name=table,
+                columns=[f"{name} {type_}" for name, type_ in columns],
+                primary_key=inspector.get_pk_constraint(table).get("constrained_columns") or [],
+                foreign_keys=foreign_keys,
+                sample_rows=self._sample(table)
+            )
+
+        self.tables = tables
+        self._table_names = list(tables)
+        if tables:
+            vectors = np.asarray(
+                self.embeddings.embed_documents([info.describe() for info in tables.values()]), dtype=np.float32
+            )
+            self._vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        else:
+            self._vectors = None
+
+    def _sample(self, table: str) -> List[Dict[str, Any]]:
+        if not self.sample_rows:
+            return []
+        quoted = self.manager.engine.dialect.identifier_preparer.quote(table)
+        try:
+            with self.manager.stream_query(
+                f"SELECT * FROM {quoted}", max_rows=self.sample_rows, timeout=5, read_only=True
+            ) as stream:
+                return stream.read_all().to_pylist()
+        except Exception:
+            return []
+
+
+_schema_indexes: Dict[str, SchemaIndex] = {}
+_schema_lock = threading.Lock()
+
+
+def get_schema_index(manager: SQLDatabaseManager, embeddings: Embeddings, **kwargs: Any) -> SchemaIndex:
+    """Return the process-wide SchemaIndex for the manager's database target."""
+    key = manager.engine_key
+    with _schema_lock:
+        index = _schema_indexes.get(key)
+        if index is None:
+            index = _schema_indexes[key] = SchemaIndex(manager, embeddings, **kwargs)
+        index.manager = manager
+        return index
+
+
+class SQLQueryTool:
+    PROMPT = PromptTemplate.from_template("""
+    You write a single read-only {dialect} SQL query answering the question below.
+
+    Only use these tables and columns:
+    {schema}
+
+    Rules:
+    - Output only the SQL, with no explanation and no markdown fences
+    - Use a single SELECT (or WITH ... SELECT) statement; never modify data
+    - Return at most {max_rows} rows
+
+    Question: {question}
+    SQL:
+    """)
+
+    def __init__(self, manager: SQLDatabaseManager, llm: Any, embeddings: Embeddings, config: Optional[Dict[str, Any]] = None):
+        """Natural-language question answering over the connected SQL database."""
+        config = config or {}
+        self.manager = manager
+        self.llm = llm
+        self.max_rows = config.get("max_rows", 50)
+        self.statement_timeout = config.get("statement_timeout", 10)
+        self.top_k_tables = config.get("top_k_tables", 5)
+        self.schema = get_schema_index(
+            manager,
+            embeddings,
+            sample_rows=config.get("sample_rows", 3),
+            ttl=config.get("schema_ttl", 300)
+        )
+
+    def run(self, question: str) -> str:
+        """Generate SQL for the question, execute it read-only and format the rows."""
+        tables = self.schema.relevant_tables(question, top_k=self.top_k_tables)
+        if not tables:
+            return "The connected database has no tables."
+
+        response = (self.PROMPT | self.llm).invoke({
+            "dialect": self.manager.engine.dialect.name,
+            "schema": "\n\n".join(table.describe() for table in tables),
+            "max_rows": self.max_rows,
+            "question": question
+        })
+        sql = self._clean_sql(response.content if hasattr(response, "content") else str(response))
+
+        try:
+            self.validate_read_only(sql)
+            with self.manager.stream_query(
+                sql, max_rows=self.max_rows, timeout=self.statement_timeout, read_only=True
+            ) as stream:
+                rows = stream.read_all().to_pylist()
+        except Exception as e:
+            return f"SQL: {sql}\nQuery failed: {str(e)}"
+
+        return self._format_rows(sql, rows, stream.truncated)
+
+    @staticmethod
+    def validate_read_only(sql: str) -> None:
+        """Reject anything but a single SELECT/WITH statement."""
+        body = QUOTED_OR_COMMENT.sub(
+            lambda m: " " if m.group(0)[0] in "-/" else " _ ", sql
+        ).strip().rstrip(";")
+        if ";" in body:
+            raise ValueError("Only a single statement is allowed")
+        if not re.match(r"^\s*(select|with)\b", body, re.IGNORECASE):
+            raise ValueError("Only SELECT queries are allowed")
+        keyword = FORBIDDEN_KEYWORDS.search(body) or FORBIDDEN_CLAUSES.search(body)
+        if keyword:
+            raise ValueError(f"Forbidden keyword in read-only query: {keyword.group(keyword.lastindex or 0).upper()}")
+
+    @staticmethod
+    def _clean_sql(text: str) -> str:
+        text = re.sub(r"^```(?:sql)?|```$", "", text.strip(), flags=re.IGNORECASE | re.MULTILINE)
+        return text.strip().rstrip(";").strip()
+
+    @staticmethod
+    def _format_rows(sql: str, rows: List[Dict[str, Any]], truncated: bool) -> str:
+        if not rows:
+            return f"SQL: {sql}\nThe query returned no rows."
+        columns = list(rows[0])
+        lines = [" | ".join(columns)]
+        lines.extend(" | ".join(str(row[column]) for column in columns) for row in rows)
+        note = " (truncated)" if truncated else ""
+        return f"SQL: {sql}\nRows: {len(rows)}{note}\n" + "\n".join(lines)
@@ -0,0 +1,81 @@
+from typing import Iterable, List, Optional, Tuple
+
+TagEvent = Tuple[Optional[str], str]
+
+
+class TagStreamParser:
+    """Incremental parser routing streamed text to the `<tag>` section it belongs to.
+
+    Text is emitted as soon as it cannot be part of a tag; only a possible tag
+    prefix (at most the longest closing tag) is held back, so each token costs
+    work proportional to its own length. Sections may nest
+    (`<reflection>` inside `<thinking>`); text outside every tag has section None.
+    """
+
+    def __init__(self, tags: Iterable[str]):
+        self.tags = set(tags)
+        self._markers = {f"<{tag}>" for tag in self.tags} | {f"</{tag}>" for tag in self.tags}
+        self._max_marker = max((len(marker) for marker in self._markers), default=0)
+        self._buffer = ""
+        self._stack: List[str] = []
+        self.seen: set = set()
+
+    @property
+    def section(self) -> Optional[str]:
+        return self._stack[-1] if self._stack else None
+
+    def feed(self, text: str) -> List[TagEvent]:
+        """Consume a chunk of streamed text and return the `(section, text)` pieces it completes."""
+        events: List[TagEvent] = []
+        buffer = self._buffer + text
+        while buffer:
+            lt = buffer.find("<")
+            if lt == -1:
+                self._emit(events, buffer)
+                buffer = ""
+                break
+            if lt > 0:
+                self._emit(events, buffer[:lt])
+                buffer = buffer[lt:]
+
+            gt = buffer.find(">", 1, self._max_marker)
+            if gt == -1:
+                if len(buffer) < self._max_marker and any(marker.startswith(buffer) for marker in self._markers):
+                    break
+                self._emit(events, "<")
+                buffer = buffer[1:]
+                continue
+
+            marker = buffer[:gt + 1]
+            if marker not in self._markers:
+                self._emit(events, "<")
+                buffer = buffer[1:]
+                continue
+
+            name = marker.strip("</>")
+            if marker.startswith("</"):
+                if name in self._stack:
+                    while self._stack.pop() != name:
+                        pass
+            else:
+                self._stack.append(name)
+                self.seen.add(name)
+            buffer = buffer[gt + 1:]
+
+        self._buffer = buffer
+        return events
+
+    def close(self) -> List[TagEvent]:
+        """Flush text held back at the end of the stream."""
+        events: List[TagEvent] = []
+        if self._buffer:
+            self._emit(events, self._buffer)
+            self._buffer = ""
+        return events
+
+    def _emit(self, events: List[TagEvent], text: str) -> None:
+        section = self.section
+        if events and events[-1][0] == section:
+            events[-1] = (section, events[-1][1] + text)
+        else:
+            events.append((section, text))
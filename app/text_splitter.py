@@ -0,0 +1,140 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Iterator, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Ordered from strongest to weakest boundary: paragraph, line, sentence, word.
+DEFAULT_SEPARATORS = [r"\n\s*\n", r"\n", r"(?<=[.!?])\s+", r"\s+"]
+
+
+@dataclass(frozen=True)
+class ChunkSpan:
+    """Character offsets of a chunk inside its source text"""
+    start: int
+    end: int
+    token_count: int
+
+    def text(self, source: str) -> str:
+        return source[self.start:self.end]
+
+
+@lru_cache(maxsize=4)
+def get_tokenizer(model_name: str) -> Any:
+    """Load (once per process) the fast tokenizer matching the embedding model."""
+    from tokenizers import Tokenizer
+
+    tokenizer = Tokenizer.from_pretrained(model_name)
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    return tokenizer
+
+
+class FastTextSplitter:
+    def __init__(
+        self,
+        chunk_size: int = 200,
+        chunk_overlap: int = 20,
+        tokenizer_name: Optional[str] = "sentence-transformers/all-MiniLM-L6-v2",
+        separators: Optional[Sequence[str]] = None,
+        min_chunk_ratio: float = 0.5,
+    ):
+        """Single-pass splitter measuring chunk length in tokenizer tokens.
+
+        With `tokenizer_name=None` lengths are measured in characters instead.
+        """
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.tokenizer_name = tokenizer_name
+        self.min_chunk_tokens = int(chunk_size * min_chunk_ratio)
+        self._patterns = [re.compile(sep) for sep in (separators or DEFAULT_SEPARATORS)]
+
+    @property
+    def tokenizer(self) -> Any:
+        return get_tokenizer(self.tokenizer_name) if self.tokenizer_name else None
+
+    def split_spans(self, text: str) -> List[ChunkSpan]:
+        """Return chunk offsets for a single text without copying substrings."""
+        return self._spans_from_offsets(text, *self._token_offsets([text])[0])
+
+    def iter_spans(self, texts: Sequence[str]) -> Iterator[List[ChunkSpan]]:
+        """Yield chunk offsets for many texts, tokenizing them in one batch."""
+        for text, (starts, ends) in zip(texts, self._token_offsets(texts)):
+            yield self._spans_from_offsets(text, starts, ends)
+
+    def split_text(self, text: str) -> List[str]:
+        return [span.text(text) for span in self.split_spans(text)]
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """Split documents, materializing chunk text only when building the output."""
+        texts = [doc.page_content for doc in documents]
+        chunks = []
+        for doc, spans in zip(documents, self.iter_spans(texts)):
+            for span in spans:
+                metadata = dict(doc.metadata)
+                metadata.update({
+                    "start_index": span.start,
+                    "end_index": span.end,
+                    "token_count": span.token_count,
+                })
+                chunks.append(Document(page_content=span.text(doc.page_content), metadata=metadata))
+        return chunks
+
+    def _token_offsets(self, texts: Sequence[str]) -> List[tuple]:
+        """Return per-text arrays of token start/end character offsets."""
+        if self.tokenizer is None:
+            return [
+                (np.arange(len(text), dtype=np.int64), np.arange(1, len(text) + 1, dtype=np.int64))
+                for text in texts
+            ]
+
+        offsets = []
+        for encoding in self.tokenizer.encode_batch(list(texts), add_special_tokens=False):
+            pairs = np.asarray(encoding.offsets, dtype=np.int64).reshape(-1, 2)
+            offsets.append((pairs[:, 0], pairs[:, 1]))
+        return offsets
+
+    def _boundaries(self, text: str, token_starts: np.ndarray) -> List[np.ndarray]:
+        """Map separator matches of every level to sorted token indices."""
+        levels = []
+        for pattern in self._patterns:
+            positions = np.fromiter((m.end() for m in pattern.finditer(text)), dtype=np.int64)
+            levels.append(np.unique(np.searchsorted(token_starts, positions, side="left")))
+        return levels
+
+    def _spans_from_offsets(self, text: str, token_starts: np.ndarray, token_ends: np.ndarray) -> List[ChunkSpan]:
+        n_tokens = len(token_starts)
+        if n_tokens == 0:
+            return []
+        if n_tokens <= self.chunk_size:
+            return [ChunkSpan(int(token_starts[0]), int(token_ends[-1]), n_tokens)]
+
+        levels = self._boundaries(text, token_starts)
+        word_boundaries = levels[-1]
+        spans = []
+        start = 0
+        while start < n_tokens:
+            limit = start + self.chunk_size
+            end = min(limit, n_tokens)
+            if limit < n_tokens:
+                for boundaries in levels:
+                    idx = np.searchsorted(boundaries, limit, side="right") - 1
+                    if idx >= 0 and boundaries[idx] > start + self.min_chunk_tokens:
+                        end = int(boundaries[idx])
+                        break
+
+            spans.append(ChunkSpan(int(token_starts[start]), int(token_ends[end - 1]), end - start))
+            if end >= n_tokens:
+                break
+
+            next_start = end - self.chunk_overlap
+            idx = np.searchsorted(word_boundaries, next_start, side="left")
+            if idx < len(word_boundaries) and word_boundaries[idx] < end:
+                next_start = int(word_boundaries[idx])
+            start = max(next_start, start + 1)
+
+        return spans
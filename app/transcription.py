@@ -0,0 +1,308 @@
+import hashlib
+import io
+import json
+import subprocess
+import time
+import wave
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.02
+
+
+@dataclass(frozen=True)
+class AudioSegment:
+    """Sample range of one segment sent to the backend, and the part of it this segment owns"""
+    index: int
+    start: int
+    end: int
+    own_start: int
+    own_end: int
+
+    @property
+    def offset(self) -> float:
+        return self.start / SAMPLE_RATE
+
+
+@dataclass
+class TranscriptSegment:
+    """Data class to hold one timed piece of transcript (seconds from the start of the audio)"""
+    start: float
+    end: float
+    text: str
+
+
+@dataclass
+class Transcript:
+    """Data class to hold a stitched transcript"""
+    audio_hash: str
+    duration: float
+    segments: List[TranscriptSegment] = field(default_factory=list)
+    cached: bool = False
+    elapsed: float = 0.0
+
+    @property
+    def text(self) -> str:
+        return " ".join(segment.text.strip() for segment in self.segments if segment.text.strip())
+
+
+def decode_audio(data: bytes) -> np.ndarray:
+    """Decode any audio file once to 16 kHz mono int16 samples.
+
+    WAV files are read with the standard library; other formats go through ffmpeg.
+    """
+    if data[:4] == b"RIFF":
+        try:
+            return _decode_wav(data)
+        except wave.Error:
+            pass
+    try:
+        process = subprocess.run(
+            ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+             "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"],
+            input=data,
+            capture_output=True,
+            check=True
+        )
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg is required to decode non-WAV audio")
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Could not decode audio: {e.stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(process.stdout, dtype=np.int16)
+
+
+def _decode_wav(data: bytes) -> np.ndarray:
+    with wave.open(io.BytesIO(data)) as wav:
+        if wav.getsampwidth() != 2:
+            raise wave.Error("only 16-bit PCM is read natively")
+        channels, rate = wav.getnchannels(), wav.getframerate()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        positions = np.arange(0, len(samples), rate / SAMPLE_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    return samples.astype(np.int16)
+
+
+def encode_wav(samples: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.astype(np.int16).tobytes())
+    return buffer.getvalue()
+
+
+def plan_segments(
+    samples: np.ndarray,
+    segment_seconds: float = 60.0,
+    overlap_seconds: float = 1.0,
+    search_seconds: float = 5.0
+) -> List[AudioSegment]:
+    """Cut the audio near every `segment_seconds` at the quietest frame within `search_seconds`.
+
+    Each segment is padded by `overlap_seconds` on both sides so words at a cut
+    are heard whole; the unpadded `own` range decides which copy is kept.
+    Audio without samples has no segments.
+    """
+    if not len(samples):
+        return []
+    frame = int(FRAME_SECONDS * SAMPLE_RATE)
+    frame_count = len(samples) // frame
+    energy = np.sqrt(np.mean(samples[:frame_count * frame].astype(np.float32).reshape(-1, frame) ** 2, axis=1)) \
+        if frame_count else np.zeros(0)
+
+    cuts = [0]
+    target = segment_seconds
+    total_seconds = len(samples) / SAMPLE_RATE
+    while target < total_seconds - search_seconds:
+        low = max(int((target - search_seconds) / FRAME_SECONDS), int(cuts[-1] / frame) + 1)
+        high = min(int((target + search_seconds) / FRAME_SECONDS), frame_count)
+        if low >= high:
+            break
+        cuts.append((low + int(np.argmin(energy[low:high]))) * frame)
+        target = cuts[-1] / SAMPLE_RATE + segment_seconds
+    cuts.append(len(samples))
+
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+    return [
+        AudioSegment(
+            index=i,
+            start=max(start - overlap, 0),
+            end=min(end + overlap, len(samples)),
+            own_start=start,
+            own_end=end
+        )
+        for i, (start, end) in enumerate(zip(cuts, cuts[1:]))
+    ]
+
+
+class TranscriptionBackend(ABC):
+    name = "backend"
+
+    @abstractmethod
+    def transcribe(self, wav_bytes: bytes, language: Optional[str] = None) -> List[TranscriptSegment]:
+        """Transcribe one WAV segment; timestamps are relative to the segment start."""
+
+
+class GroqWhisperBackend(TranscriptionBackend):
+    name = "groq"
+
+    def __init__(self, api_key: str, model: str = "whisper-large-v3"):
+        from groq import Groq
+
+        self.client = Groq(api_key=api_key)
+        self.model = model
+        self.name = f"groq:{model}"
+
+    def transcribe(self, wav_bytes: bytes, language: Optional[str] = None) -> List[TranscriptSegment]:
+        kwargs = {"language": language} if language else {}
+        response = self.client.audio.transcriptions.create(
+            file=("segment.wav", wav_bytes),
+            model=self.model,
+            response_format="verbose_json",
+            **kwargs
+        )
+        segments = getattr(response, "segments", None) or []
+        if not segments:
+            duration = (len(wav_bytes) - 44) / 2 / SAMPLE_RATE
+            return [TranscriptSegment(0.0, duration, response.text)]
+        return [
+            TranscriptSegment(float(s["start"]), float(s["end"]), s["text"])
+            if isinstance(s, dict) else TranscriptSegment(float(s.start), float(s.end), s.text)
+            for s in segments
+        ]
+
+
+class StubBackend(TranscriptionBackend):
+    """Offline backend that reports each non-silent stretch as a placeholder sentence."""
+
+    name = "stub"
+
+    def __init__(self, silence_threshold: float = 500.0):
+        self.silence_threshold = silence_threshold
+
+    def transcribe(self, wav_bytes: bytes, language: Optional[str] = None) -> List[TranscriptSegment]:
+        samples = _decode_wav(wav_bytes).astype(np.float32)
+        frame = int(FRAME_SECONDS * SAMPLE_RATE)
+        frame_count = len(samples) // frame
+        if not frame_count:
+            return []
+        voiced = np.sqrt(np.mean(samples[:frame_count * frame].reshape(-1, frame) ** 2, axis=1)) > self.silence_threshold
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0]))))
+        return [
+            TranscriptSegment(start * FRAME_SECONDS, end * FRAME_SECONDS, f"[speech {start * FRAME_SECONDS:.2f}s]")
+            for start, end in zip(edges[::2], edges[1::2])
+        ]
+
+
+def create_backend(config: Dict[str, Any], api_key: Optional[str] = None) -> TranscriptionBackend:
+    backend = config.get("backend", "groq")
+    if backend == "groq":
+        return GroqWhisperBackend(api_key, model=config.get("model", "whisper-large-v3"))
+    if backend == "stub":
+        return StubBackend()
+    raise ValueError(f"Unsupported transcription backend: {backend}")
+
+
+class TranscriptCache:
+    """JSON transcripts on disk, keyed by audio content hash and backend."""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Transcript]:
+        path = self.cache_dir / f"{key}.json"
+        if not path.exists():
+            return None
+        data = json.loads(path.read_text())
+        data["segments"] = [TranscriptSegment(**segment) for segment in data["segments"]]
+        return Transcript(**{**data, "cached": True})
+
+    def put(self, key: str, transcript: Transcript) -> None:
+        path = self.cache_dir / f"{key}.json"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(asdict(transcript)))
+        tmp_path.replace(path)
+
+
+class Transcriber:
+    def __init__(self, config: Dict[str, Any], backend: Optional[TranscriptionBackend] = None, api_key: Optional[str] = None):
+        """Chunked, parallel transcription driven by the `transcription` config section."""
+        self.settings = config.get("transcription", {})
+        self.backend = backend or create_backend(self.settings, api_key)
+        self.segment_seconds = self.settings.get("segment_seconds", 60)
+        self.overlap_seconds = self.settings.get("overlap_seconds", 1.0)
+        self.search_seconds = self.settings.get("search_seconds", 5)
+        self.max_workers = self.settings.get("max_workers", 4)
+        self.max_attempts = self.settings.get("max_attempts", 2)
+        self.language = self.settings.get("language")
+        self.cache = TranscriptCache(Path(self.settings.get("cache_dir", "data/transcripts")))
+
+    def transcribe(self, data: bytes, progress: Optional[Callable[[int, int], None]] = None) -> Transcript:
+        """Transcribe an audio file, reusing the cached transcript of identical audio.
+
+        `progress(done, total)` is called from the calling thread as segments finish.
+        """
+        started = time.monotonic()
+        audio_hash = hashlib.sha256(data).hexdigest()
+        cache_key = hashlib.sha256(f"{audio_hash}:{self.backend.name}:{self.language}".encode()).hexdigest()
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        samples = decode_audio(data)
+        segments = plan_segments(samples, self.segment_seconds, self.overlap_seconds, self.search_seconds)
+        results: Dict[int, List[TranscriptSegment]] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="transcribe") as executor:
+            futures = {executor.submit(self._transcribe_segment, samples, segment): segment for segment in segments}
+            for future in as_completed(futures):
+                results[futures[future].index] = future.result()
+                if progress:
+                    progress(len(results), len(segments))
+
+        transcript = Transcript(
+            audio_hash=audio_hash,
+            duration=len(samples) / SAMPLE_RATE,
+            segments=self._stitch(segments, results),
+            elapsed=time.monotonic() - started
+        )
+        self.cache.put(cache_key, transcript)
+        return transcript
+
+    def _transcribe_segment(self, samples: np.ndarray, segment: AudioSegment) -> List[TranscriptSegment]:
+        wav_bytes = encode_wav(samples[segment.start:segment.end])
+        for attempt in range(self.max_attempts):
+            try:
+                return self.backend.transcribe(wav_bytes, language=self.language)
+            except Exception:
+                if attempt + 1 == self.max_attempts:
+                    raise
+                time.sleep(2 ** attempt)
+        return []
+
+    @staticmethod
+    def _stitch(segments: List[AudioSegment], results: Dict[int, List[TranscriptSegment]]) -> List[TranscriptSegment]:
+        """Shift segment-relative timestamps to absolute ones, keeping each overlapped piece once.
+
+        A piece belongs to the segment whose own (unpadded) range contains its midpoint.
+        """
+        stitched = []
+        for segment in segments:
+            own_start, own_end = segment.own_start / SAMPLE_RATE, segment.own_end / SAMPLE_RATE
+            for piece in results.get(segment.index, []):
+                start, end = piece.start + segment.offset, piece.end + segment.offset
+                midpoint = (start + end) / 2
+                is_last = segment.index == len(segments) - 1
+                if own_start <= midpoint and (midpoint < own_end or is_last):
+                    stitched.append(TranscriptSegment(round(float(start), 3), round(float(end), 3), piece.text))
+        return stitched
@@ -1,25 +1,108 @@
 import streamlit as st
-from langchain_community.callbacks import StreamlitCallbackHandler
-from langchain_core.runnables import RunnableConfig
-from app.database_manager import DatabaseManager
-from app.document_processor import DocumentProcessor
+from app.chat_store import get_chat_store
+from app.metadata_filter import DocumentFilter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Tuple
 import time
+import uuid
+
+# Document processing, ingestion, database drivers and pyarrow are imported
+# inside the methods that need them, so the chat page renders without them.
+
+@dataclass
+class HistoryPages:
+    """Data class to hold which older chat messages are drawn as pages"""
+    older_count: int
+    pages_shown: int
+    first_shown: int
+    bounds: List[Tuple[int, int, int]]
+
+
+def history_pages(message_count, live_messages, page_size, pages_requested):
+    """Split the messages older than the last `live_messages` into pages of `page_size`.
+
+    Pages are cut from the oldest message, so only the last page can be
+    partial. `bounds` lists `(page, start, end)` for the last
+    `pages_requested` pages (capped at the page count); `first_shown` is the
+    index of the first message drawn, i.e. how many stay hidden.
+    """
+    older_count = max(message_count - live_messages, 0)
+    page_count = -(-older_count // page_size)
+    pages_shown = min(pages_requested, page_count)
+    first_shown = older_count if pages_shown == 0 else (page_count - pages_shown) * page_size
+    bounds = [
+        (page, page * page_size, min((page + 1) * page_size, older_count))
+        for page in range(page_count - pages_shown, page_count)
+    ]
+    return HistoryPages(older_count, pages_shown, first_shown, bounds)
+
+
+class CoTSectionRenderer:
+    """Draws streamed chain-of-thought sections: thinking/reflection in collapsed panels, output live.
+
+    Redraws are throttled to one per `min_interval` seconds per section.
+    """
+
+    def __init__(self, tags, min_interval=0.1):
+        self.tags = tags
+        self.min_interval = min_interval
+        self.panels_container = st.container()
+        self.output_area = st.empty()
+        self.panels = {}
+        self.texts = {}
+        self.last_drawn = {}
+
+    def __call__(self, section, text):
+        if section is None:
+            return
+        self.texts[section] = self.texts.get(section, "") + text
+        if section != "output" and section not in self.panels:
+            with self.panels_container:
+                label = f"{self.tags.get(section, '')} {section.capitalize()}".strip()
+                self.panels[section] = st.expander(label, expanded=False).empty()
+
+        now = time.monotonic()
+        if now - self.last_drawn.get(section, 0.0) < self.min_interval:
+            return
+        self.last_drawn[section] = now
+        if section == "output":
+            self.output_area.markdown(self.texts[section] + "▌")
+        else:
+            self.panels[section].markdown(self.texts[section])
+
+    def finish(self, final_output):
+        for section, panel in self.panels.items():
+            panel.markdown(self.texts[section])
+        self.output_area.markdown(final_output)
+
 
 class UIComponents:
     def __init__(self, config):
         self.config = config
+        self.chat_store = get_chat_store(config)
         self.state = self._initialize_state()
         
     def _initialize_state(self):
         """Initialize all necessary session state variables."""
-        if "messages" not in st.session_state:
-            st.session_state.messages = []
         if "local_database" not in st.session_state:
             st.session_state.local_database = None
         if "external_database" not in st.session_state:
             st.session_state.external_database = None
         if "db_manager" not in st.session_state:
             st.session_state.db_manager = None
+        if "session_id" not in st.session_state:
+            # Never read from or written to the URL: anyone holding the link could read the history.
+            st.session_state.session_id = str(uuid.uuid4())
+            st.query_params.pop("session", None)
+        if "document_filter" not in st.session_state:
+            st.session_state.document_filter = DocumentFilter()
+        if "history_pages_shown" not in st.session_state:
+            st.session_state.history_pages_shown = 0
+        if "rendered_history" not in st.session_state:
+            st.session_state.rendered_history = {}
+        if "submitted_files" not in st.session_state:
+            st.session_state.submitted_files = set()
         if "document_stats" not in st.session_state:
             st.session_state.document_stats = {
                 "total_documents": 0,
@@ -37,24 +120,96 @@ class UIComponents:
             if not groq_api_key:
                 st.info("Enter a Groq API Key to continue")
                 st.stop()
-            
+
+        # Background ingestion transcribes this session's audio uploads with it.
+        st.session_state.groq_api_key = groq_api_key
         return {"groq_api_key": groq_api_key}
     
     def create_chat_history(self):
-        """Display chat history from session state."""
-        for message in st.session_state.messages:
+        """Display chat history from session state.
+
+        Only the last `live_messages` are rendered as chat bubbles; older ones
+        are grouped into pages that stay collapsed until requested, and each
+        page is drawn as a single cached markdown block, so a rerun does the
+        same work however long the conversation is.
+        """
+        settings = self.config.get('chat_history', {})
+        live_messages = settings.get('live_messages', 20)
+        page_size = settings.get('page_size', 50)
+
+        session_id = st.session_state.session_id
+        message_count = self.chat_store.count(session_id)
+        pages = history_pages(message_count, live_messages, page_size, st.session_state.history_pages_shown)
+
+        if pages.first_shown:
+            st.button(
+                f"⬆️ Show older messages ({pages.first_shown} hidden)",
+                key="show_older_messages",
+                on_click=lambda: setattr(st.session_state, "history_pages_shown", pages.pages_shown + 1)
+            )
+
+        for page, start, end in pages.bounds:
+            with st.expander(f"Messages {start + 1}–{end}", expanded=True):
+                st.markdown(self._page_markdown(page, start, end, page_size))
+
+        for message in self.chat_store.range(session_id, pages.older_count, message_count):
             with st.chat_message(message["role"]):
                 st.markdown(message["content"])
+
+    def _create_conversation_resume(self):
+        """Sidebar key to resume a stored conversation after a reload.
+
+        The key is a random conversation id, shown only here and never put in
+        the URL, so sharing a link does not share the history.
+        """
+        with st.sidebar.expander("🔑 Conversation key"):
+            st.caption("Keep this key private. Paste it after a reload to resume this conversation.")
+            st.code(st.session_state.session_id, language=None)
+            key = st.text_input("Resume a conversation", type="password", key="resume_conversation_key").strip()
+            if key and key != st.session_state.session_id:
+                if self.chat_store.count(key):
+                    st.session_state.session_id = key
+                    st.session_state.history_pages_shown = 0
+                    st.session_state.rendered_history = {}
+                    st.rerun()
+                else:
+                    st.warning("No stored conversation has this key.")
+
+    def _page_markdown(self, page, start, end, page_size):
+        """Markdown for one page of older messages, loaded from the chat store on first display.
+
+        Full pages never change, so they are cached.
+        """
+        cache = st.session_state.rendered_history
+        if page in cache:
+            return cache[page]
+        markdown = "\n\n---\n\n".join(
+            f"**{'🧑 You' if message['role'] == 'user' else '🤖 Assistant'}**\n\n{message['content']}"
+            for message in self.chat_store.range(st.session_state.session_id, start, end)
+        )
+        if end - start == page_size:
+            cache[page] = markdown
+        return markdown
     
     def create_chat_interface(self, chatbot_manager):
+        cot_config = self.config.get('cot_reflection', {})
+        st.session_state.cot_reflection = st.sidebar.toggle(
+            "🧠 Chain-of-thought reflection",
+            value=st.session_state.get("cot_reflection", False),
+            help=cot_config.get('help')
+        )
+        self._create_conversation_resume()
         self.create_chat_history()
         
         user_input = st.chat_input("Type your message here...")
         if user_input:
             self._handle_user_input(user_input, chatbot_manager)
     
+    def _shared_corpus_enabled(self):
+        return self.config.get('document_processing', {}).get('shared_corpus', {}).get('enabled', False)
+
     def _show_document_context(self):
-        if not st.session_state.local_database:
+        if not st.session_state.local_database and not self._shared_corpus_enabled():
             st.warning("📚 Please upload documents to use document context.")
             return
             
@@ -70,34 +225,142 @@ class UIComponents:
                 for filename, details in stats['file_details'].items():
                     with st.expander(f"📄 {filename}"):
                         st.write(f"Chunks: {details.get('chunks', 0)}")
-                        st.write(f"Total Pages: {details.get('total_pages', 0)}")
+                        if details.get('audio_duration'):
+                            st.write(
+                                f"Audio: {details['audio_duration'] / 60:.1f} min, "
+                                f"{details.get('transcript_segments', 0)} transcript segments"
+                                + (" (cached transcript)" if details.get('transcript_cached') else "")
+                            )
+                        else:
+                            st.write(f"Total Pages: {details.get('total_pages', 0)}")
                         st.write(f"Average Chunk Size: {int(details.get('average_chunk_size', 0))} chars")
                         st.write(f"Processed At: {details.get('processed_at', 'Unknown')}")
+                        if details.get('ocr_pages'):
+                            st.write(
+                                f"OCR Pages: {details['ocr_pages']} "
+                                f"({details.get('ocr_cached_pages', 0)} cached, "
+                                f"{details.get('ocr_total_time', 0):.2f}s)"
+                            )
+                            st.caption(
+                                "Per-page OCR time (s): "
+                                + ", ".join(f"p{page}: {secs}" for page, secs in details.get('ocr_page_timings', {}).items())
+                            )
+
+        self._create_document_filter()
+
+    def _create_document_filter(self):
+        """Let the user restrict document retrieval to some files, pages or upload dates."""
+        details = st.session_state.document_stats.get('file_details', {})
+        with st.expander("🔎 Search Filter", expanded=False):
+            file_names = st.multiselect("Files", options=sorted(details), key="filter_file_names")
+            file_types = st.multiselect(
+                "File types",
+                options=sorted({d['file_type'] for d in details.values() if d.get('file_type')}),
+                key="filter_file_types"
+            )
+            max_page = max((d.get('total_pages', 1) for d in details.values()), default=1)
+            use_pages = st.checkbox("Restrict pages", key="filter_use_pages")
+            pages = st.slider(
+                "Pages", min_value=1, max_value=max(max_page, 2), value=(1, max(max_page, 2)),
+                disabled=not use_pages, key="filter_pages"
+            )
+            uploaded_after = st.date_input("Uploaded on or after", value=None, key="filter_uploaded_after")
+
+        st.session_state.document_filter = DocumentFilter(
+            file_names=tuple(file_names),
+            file_types=tuple(file_types),
+            page_range=(pages[0] - 1, pages[1] - 1) if use_pages else None,
+            uploaded_after=uploaded_after.isoformat() if uploaded_after else None
+        )
     
-    def _process_pdf_files(self, new_files):
-        doc_processor = DocumentProcessor()
-        
-        with st.spinner("Processing documents..."):
-            progress_bar = st.progress(0)
-            for idx, file in enumerate(new_files):
-                progress = (idx + 1) / len(new_files)
-                progress_bar.progress(progress)
-                
-                chunks, vector_store = doc_processor.chunk_pdf([file])
-                if vector_store:
-                    st.session_state.local_database = vector_store
-                
-            progress_bar.empty()
+    def _submit_pdf_files(self, new_files, shared=False):
+        from app.ingestion import get_ingestion_queue
+
+        queue = get_ingestion_queue(self.config)
+        for file in new_files:
+            queue.submit(
+                st.session_state.session_id,
+                file,
+                shared=shared,
+                api_key=st.session_state.get("groq_api_key"),
+                store=st.session_state.local_database
+            )
+            st.session_state.submitted_files.add(file.name)
+    
+    def _show_ingestion_progress(self):
+        from app.ingestion import JobStatus, get_ingestion_queue
+
+        queue = get_ingestion_queue(self.config)
+        session_id = st.session_state.session_id
+        active = any(job.status in JobStatus.ACTIVE for job in queue.jobs(session_id))
+
+        @st.fragment(run_every=2 if active else None)
+        def render_jobs():
+            jobs = queue.jobs(session_id)
+            for job in jobs:
+                col1, col2 = st.columns([4, 1])
+                col1.progress(
+                    job.progress,
+                    text=f"{job.file_name}: {job.status} ({job.chunks_done}/{job.chunks_total} chunks)"
+                )
+                if job.status in JobStatus.ACTIVE:
+                    col2.button("Cancel", key=f"cancel_{job.job_id}", on_click=queue.cancel, args=(job.job_id,))
+                elif job.status in JobStatus.RETRYABLE:
+                    col2.button(
+                        "Retry", key=f"retry_{job.job_id}", on_click=queue.retry,
+                        args=(job.job_id, st.session_state.get("groq_api_key"))
+                    )
+                if job.error:
+                    st.caption(f"⚠️ {job.error}")
+            self._sync_ingested_files(queue, jobs)
+
+        render_jobs()
+
+    def _sync_ingested_files(self, queue, jobs):
+        """Expose already-indexed chunks for querying and record finished files in the stats."""
+        from app.ingestion import JobStatus
+
+        vector_store = queue.vector_store(st.session_state.session_id)
+        if vector_store is not None:
+            st.session_state.local_database = vector_store
+
+        stats = st.session_state.document_stats
+        for job in jobs:
+            if job.status != JobStatus.DONE or job.file_name in stats["processed_files"]:
+                continue
+            stats["total_documents"] += 1
+            stats["total_chunks"] += job.chunks_total
+            stats["processed_files"].add(job.file_name)
+            stats["last_update"] = datetime.now().isoformat()
+            stats["file_details"][job.file_name] = {
+                "chunks": job.chunks_total,
+                "file_type": job.file_type,
+                "processed_at": job.updated_at,
+                **job.metadata
+            }
     
     def _show_chat_controls(self):
-        if st.session_state.messages:
+        if self.chat_store.count(st.session_state.session_id):
             if st.button("Clear Chat History"):
+                self.chat_store.clear(st.session_state.session_id)
+                if st.session_state.local_database is not None:
+                    from app.ingestion import get_ingestion_queue
+
+                    get_ingestion_queue(self.config).release(st.session_state.session_id)
                 st.session_state.clear()
                 st.rerun()
     
     def _handle_user_input(self, user_input, chatbot_manager, use_documents=False):
-        """Handle user input and display the response."""
-        st.session_state.messages.append({"role": "user", "content": user_input})
+        """Handle user input and display the response.
+
+        ChatbotManager records successful turns in the chat store; turns it did
+        not record (errors) are appended here so the transcript stays complete.
+        """
+        from langchain_community.callbacks import StreamlitCallbackHandler
+        from langchain_core.runnables import RunnableConfig
+
+        session_id = st.session_state.session_id
+        stored_count = self.chat_store.count(session_id)
         
         with st.chat_message("user"):
             st.markdown(user_input)
@@ -107,38 +370,69 @@ class UIComponents:
             st_callback = StreamlitCallbackHandler(message_placeholder)
             cfg = RunnableConfig()
             cfg["callbacks"] = [st_callback]
+            cot_renderer = None
 
             try:
-                if use_documents and st.session_state.local_database:
-                    response = chatbot_manager.document_retrieval(st.session_state.local_database, user_input)
+                if use_documents and (st.session_state.local_database or self._shared_corpus_enabled()):
+                    from app.document_processor import DocumentProcessor
+
+                    vector_store = DocumentProcessor(config=self.config).retrieval_store()
+                    response = chatbot_manager.document_retrieval(
+                        vector_store, user_input, doc_filter=st.session_state.document_filter
+                    )
+                elif st.session_state.get("cot_reflection"):
+                    cot_renderer = CoTSectionRenderer(self.config.get('cot_reflection', {}).get('tags', {}))
+                    response = chatbot_manager.cot_response(user_input, on_section=cot_renderer)
                 else:
-                    response = chatbot_manager.get_response(user_input, cfg)
+                    response = chatbot_manager.get_response(user_input, cfg, on_update=message_placeholder.markdown)
             
-                st.session_state.messages.append({"role": "assistant", "content": response["output"]})
-                message_placeholder.markdown(response["output"])
+                if self.chat_store.count(session_id) == stored_count:
+                    self.chat_store.append(session_id, "user", user_input)
+                    self.chat_store.append(session_id, "assistant", response["output"])
+                if cot_renderer is not None:
+                    cot_renderer.finish(response["output"])
+                else:
+                    message_placeholder.markdown(response["output"])
+                if response.get("token_usage"):
+                    usage = response["token_usage"]
+                    st.caption(
+                        f"Prompt tokens: {usage['total_prompt']:,}/{usage['budget']:,} "
+                        f"(context {usage['context']:,}, history {usage['history']:,}, "
+                        f"question {usage['question']:,}, template {usage['template']:,})"
+                    )
                 
             except Exception as e:
                 error_message = f"An error occurred: {str(e)}"
-                st.session_state.messages.append({"role": "assistant", "content": error_message})
+                if self.chat_store.count(session_id) == stored_count:
+                    self.chat_store.append(session_id, "user", user_input)
+                    self.chat_store.append(session_id, "assistant", error_message)
                 st.error(error_message)
                 st.stop()
 
     def create_file_uploader(self, name="Upload files"):    
         uploaded_files = st.file_uploader(
             name,
-            type=["pdf"],
+            type=["pdf", "wav", "mp3", "m4a", "ogg", "flac", "aac"],
             accept_multiple_files=True,
             help="Select one or more files to upload"
         )
         
+        shared = self._shared_corpus_enabled() and st.checkbox(
+            "Add to shared corpus",
+            value=False,
+            help="Make these documents searchable by every user instead of only this session"
+        )
+        
+        new_files = []
         if uploaded_files:
-            processed_files = st.session_state.document_stats["processed_files"]
-            new_files = [f for f in uploaded_files if f.name not in processed_files]
+            submitted_files = st.session_state.submitted_files
+            new_files = [f for f in uploaded_files if f.name not in submitted_files]
             
             if new_files:
-                self._process_pdf_files(new_files)
-                
-            return new_files
+                self._submit_pdf_files(new_files, shared=shared)
+        
+        self._show_ingestion_progress()
+        return new_files
         
     def create_database_connection(self):  
         db_type = st.sidebar.selectbox(
@@ -191,6 +485,8 @@ class UIComponents:
             if st.button("Connect" if not st.session_state.external_database else "Disconnect"):
                 if not st.session_state.external_database:
                     try:
+                        from app.database_manager import DatabaseManager
+
                         st.session_state.db_manager = DatabaseManager(db_type, connection_params)
                         st.session_state.external_database = st.session_state.db_manager.create_connection()
                         st.sidebar.success("Successfully connected to database!")
@@ -221,6 +517,13 @@ class UIComponents:
                     st.caption(f"Connected since: {conn_info['connected_since'].strftime('%Y-%m-%d %H:%M:%S')}")
                 if conn_info["last_error"]:
                     st.error(f"Last Error: {conn_info['last_error']}")
+                if conn_info.get("pool"):
+                    pool = conn_info["pool"]
+                    st.caption(
+                        f"Pool: {pool['checked_out']}/{pool['pool_size']} in use "
+                        f"({pool['utilization']:.0%}), shared by {pool['sessions']} session(s), "
+                        f"avg wait {pool['avg_wait_ms']:.1f} ms (max {pool['max_wait_ms']:.1f} ms)"
+                    )
 
     def create_database_details(self):
         if st.session_state.local_database or st.session_state.external_database:
@@ -239,4 +542,35 @@ class UIComponents:
             if st.session_state.external_database:
                 st.sidebar.subheader(f"**External Database:**")
                 with st.sidebar.expander("Database Details", expanded=False):
-                    st.write(st.session_state.external_database)
\ No newline at end of file
+                    st.write(st.session_state.external_database)
+                if st.session_state.db_manager.database_type in ["sqlite", "mysql", "postgresql"]:
+                    self._create_sql_query_runner()
+
+    def _create_sql_query_runner(self, page_size=200):
+        """Run a SQL query and render its first page.
+
+        Only that page is fetched: a larger result is reported as "≥ N rows"
+        instead of being drained just to count it.
+        """
+        with st.sidebar.expander("Run SQL Query", expanded=False):
+            query = st.text_area("SQL", key="sql_query")
+            run_query = st.button("Run", key="run_sql_query")
+
+        if not (run_query and query.strip()):
+            return
+
+        st.subheader("Query Results")
+        try:
+            with st.session_state.db_manager.stream_query(query, batch_size=page_size, max_rows=page_size) as stream:
+                table = stream.read_all()
+
+            if not table.num_rows:
+                st.info("Query returned no rows.")
+                return
+            st.dataframe(table)
+            if stream.truncated:
+                st.caption(f"≥ {stream.rows_read:,} rows; showing the first {stream.rows_read:,}, the rest was not fetched")
+            else:
+                st.caption(f"{stream.rows_read:,} rows ({stream.bytes_read / 1e6:.1f} MB)")
+        except Exception as e:
+            st.error(f"Query execution failed: {str(e)}")
\ No newline at end of file
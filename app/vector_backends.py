@@ -0,0 +1,355 @@
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from qdrant_client import QdrantClient
+from qdrant_client.http import models as qdrant_models
+
+from .concurrent_faiss import ConcurrentFAISS
+from .docstore import CompactDocstore
+from .metadata_filter import DocumentFilter
+from .quantized_index import QUANTIZATIONS, QuantizedFAISS
+
+PAYLOAD_INDEXES = {
+    # Every query filters on the session, so Qdrant groups points by it.
+    "session_id": qdrant_models.KeywordIndexParams(type=qdrant_models.KeywordIndexType.KEYWORD, is_tenant=True),
+    "metadata.file_name": qdrant_models.PayloadSchemaType.KEYWORD,
+    "metadata.file_type": qdrant_models.PayloadSchemaType.KEYWORD,
+    "metadata.page_number": qdrant_models.PayloadSchemaType.INTEGER,
+    "metadata.processing_timestamp": qdrant_models.PayloadSchemaType.DATETIME,
+}
+
+
+class QdrantStore(VectorStore):
+    """LangChain vector store over a Qdrant collection with batched, parallel upserts.
+
+    Points carry `{"page_content", "metadata", "session_id"}` payloads, with
+    payload indexes on the metadata fields a DocumentFilter can restrict. The
+    collection is shared by all sessions: every search and delete must-filters
+    on this store's `session_id`, so a session only sees its own points.
+    """
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        collection_name: str,
+        embeddings: Embeddings,
+        batch_size: int = 256,
+        parallel: int = 4,
+        session_id: Optional[str] = None
+    ):
+        self.client = client
+        self.collection_name = collection_name
+        self._embeddings = embeddings
+        self.batch_size = batch_size
+        self.parallel = max(1, parallel)
+        # Without a session, the store gets a private scope of its own.
+        self.session_id = session_id or uuid.uuid4().hex
+        self._collection_ready = False
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embeddings
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        texts = list(texts)
+        return self.add_embeddings(texts, self._embeddings.embed_documents(texts), metadatas=metadatas, ids=ids)
+
+    def add_embeddings(
+        self,
+        texts: List[str],
+        vectors: List[List[float]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Upsert pre-computed embeddings in batches, sending batches in parallel."""
+        if not texts:
+            return []
+        self._ensure_collection(len(vectors[0]))
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        metadatas = metadatas or [{} for _ in texts]
+        points = [
+            qdrant_models.PointStruct(
+                id=point_id,
+                vector=list(map(float, vector)),
+                payload={"page_content": text, "metadata": metadata, "session_id": self.session_id}
+            )
+            for point_id, text, vector, metadata in zip(ids, texts, vectors, metadatas)
+        ]
+        batches = [points[i:i + self.batch_size] for i in range(0, len(points), self.batch_size)]
+
+        def upsert(batch: List[qdrant_models.PointStruct]) -> None:
+            self.client.upsert(collection_name=self.collection_name, points=batch, wait=True)
+
+        if self.parallel == 1 or len(batches) == 1:
+            for batch in batches:
+                upsert(batch)
+        else:
+            with ThreadPoolExecutor(max_workers=self.parallel) as executor:
+                list(executor.map(upsert, batches))
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if ids and self._collection_exists():
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=qdrant_models.FilterSelector(filter=qdrant_models.Filter(must=[
+                    qdrant_models.HasIdCondition(has_id=ids),
+                    self._session_condition()
+                ]))
+            )
+        return True
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[Any] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        if not self._collection_exists():
+            return []
+        response = self.client.query_points(
+            collection_name=self.collection_name,
+            query=embedding,
+            query_filter=self._scoped_filter(filter),
+            limit=k,
+            with_payload=True
+        )
+        return [(self._to_document(point), point.score) for point in response.points]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embeddings.embed_query(query), k=k, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, **kwargs)]
+
+    def max_marginal_relevance_search(
+        self, query: str, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5,
+        filter: Optional[Any] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [
+            doc for doc, _ in self.max_marginal_relevance_search_with_relevance_scores(
+                query, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=filter
+            )
+        ]
+
+    def max_marginal_relevance_search_with_relevance_scores(
+        self, query: str, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5, filter: Optional[Any] = None
+    ) -> List[Tuple[Document, float]]:
+        """MMR selection, each document paired with its cosine similarity to the query."""
+        if not self._collection_exists():
+            return []
+        query_vector = np.asarray(self._embeddings.embed_query(query), dtype=np.float32)
+        response = self.client.query_points(
+            collection_name=self.collection_name,
+            query=query_vector.tolist(),
+            query_filter=self._scoped_filter(filter),
+            limit=fetch_k,
+            with_payload=True,
+            with_vectors=True
+        )
+        points = response.points
+        selected = maximal_marginal_relevance(
+            query_vector, [np.asarray(point.vector, dtype=np.float32) for point in points],
+            k=k, lambda_mult=lambda_mult
+        )
+        return [(self._to_document(points[i]), points[i].score) for i in selected]
+
+    def _session_condition(self) -> qdrant_models.FieldCondition:
+        return qdrant_models.FieldCondition(key="session_id", match=qdrant_models.MatchValue(value=self.session_id))
+
+    def _scoped_filter(self, filter: Optional[Any]) -> qdrant_models.Filter:
+        """The caller's filter, restricted to this store's session."""
+        user_filter = self.to_filter(filter)
+        return qdrant_models.Filter(must=[self._session_condition(), *([user_filter] if user_filter else [])])
+
+    @staticmethod
+    def to_filter(filter: Optional[Any]) -> Optional[qdrant_models.Filter]:
+        """Accept a Qdrant Filter, a DocumentFilter or a `{metadata_key: value}` equality dict."""
+        if filter is None or isinstance(filter, qdrant_models.Filter):
+            return filter
+        if isinstance(filter, DocumentFilter):
+            return QdrantStore._document_filter(filter)
+        return qdrant_models.Filter(must=[
+            qdrant_models.FieldCondition(key=f"metadata.{key}", match=qdrant_models.MatchValue(value=value))
+            for key, value in filter.items()
+        ])
+
+    @staticmethod
+    def _document_filter(doc_filter: DocumentFilter) -> Optional[qdrant_models.Filter]:
+        if doc_filter.is_empty:
+            return None
+        must = []
+        if doc_filter.file_names:
+            must.append(qdrant_models.FieldCondition(
+                key="metadata.file_name", match=qdrant_models.MatchAny(any=list(doc_filter.file_names))
+            ))
+        if doc_filter.file_types:
+            must.append(qdrant_models.FieldCondition(
+                key="metadata.file_type", match=qdrant_models.MatchAny(any=list(doc_filter.file_types))
+            ))
+        if doc_filter.page_range:
+            must.append(qdrant_models.FieldCondition(
+                key="metadata.page_number",
+                range=qdrant_models.Range(gte=doc_filter.page_range[0], lte=doc_filter.page_range[1])
+            ))
+        if doc_filter.uploaded_after or doc_filter.uploaded_before:
+            must.append(qdrant_models.FieldCondition(
+                key="metadata.processing_timestamp",
+                range=qdrant_models.DatetimeRange(gte=doc_filter.uploaded_after, lte=doc_filter.uploaded_before)
+            ))
+        return qdrant_models.Filter(must=must)
+
+    def _ensure_collection(self, dimension: int) -> None:
+        if self._collection_ready:
+            return
+        if not self.client.collection_exists(self.collection_name):
+            self.client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config=qdrant_models.VectorParams(size=dimension, distance=qdrant_models.Distance.COSINE)
+            )
+            for field_name, schema in PAYLOAD_INDEXES.items():
+                self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field_name,
+                    field_schema=schema
+                )
+        self._collection_ready = True
+
+    def _collection_exists(self) -> bool:
+        return self._collection_ready or self.client.collection_exists(self.collection_name)
+
+    @staticmethod
+    def _to_document(point: Any) -> Document:
+        payload = point.payload or {}
+        return Document(
+            id=str(point.id),
+            page_content=payload.get("page_content", ""),
+            metadata=payload.get("metadata", {})
+        )
+
+    @classmethod
+    def from_texts(
+        cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, **kwargs: Any
+    ) -> "QdrantStore":
+        store = cls(kwargs.pop("client"), kwargs.pop("collection_name"), embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas)
+        return store
+
+
+class VectorStoreBackend(ABC):
+    """Where DocumentProcessor keeps chunk embeddings."""
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+
+    @abstractmethod
+    def add_documents(
+        self,
+        store: Optional[VectorStore],
+        documents: List[Document],
+        vectors: Optional[List[List[float]]] = None,
+        session_id: Optional[str] = None
+    ) -> Tuple[VectorStore, List[str]]:
+        """Append documents (embedding them unless `vectors` is given), creating the store on first use.
+
+        A new store belongs to `session_id`; backends sharing storage between
+        sessions scope it to that session.
+        """
+
+
+class FAISSBackend(VectorStoreBackend):
+    def __init__(self, embeddings: Embeddings, config: Optional[Dict[str, Any]] = None):
+        super().__init__(embeddings)
+        self.settings = config or {}
+        self.quantization = self.settings.get("quantization", "none")
+        if self.quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unsupported quantization: {self.quantization}")
+
+    def add_documents(
+        self,
+        store: Optional[ConcurrentFAISS],
+        documents: List[Document],
+        vectors: Optional[List[List[float]]] = None,
+        session_id: Optional[str] = None
+    ) -> Tuple[ConcurrentFAISS, List[str]]:
+        texts = [doc.page_content for doc in documents]
+        metadatas = [doc.metadata for doc in documents]
+        if vectors is None:
+            vectors = self.embeddings.embed_documents(texts)
+
+        if store is None and self.quantization != "none":
+            store = QuantizedFAISS.create(self.embeddings, len(vectors[0]), self.settings, CompactDocstore())
+        if store is None:
+            store = ConcurrentFAISS.from_embeddings(
+                list(zip(texts, vectors)),
+                self.embeddings,
+                metadatas=metadatas,
+                docstore=CompactDocstore()
+            )
+            return store, list(store.index_to_docstore_id.values())
+        return store, store.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas)
+
+
+class QdrantBackend(VectorStoreBackend):
+    def __init__(self, embeddings: Embeddings, config: Optional[Dict[str, Any]] = None):
+        super().__init__(embeddings)
+        config = config or {}
+        local = config.get("path") or config.get("url", ":memory:") == ":memory:"
+        if config.get("path"):
+            self.client = QdrantClient(path=config["path"])
+        elif local:
+            self.client = QdrantClient(location=":memory:")
+        else:
+            self.client = QdrantClient(url=config["url"], api_key=config.get("api_key"))
+        self.collection_name = config.get("collection", "documents")
+        self.batch_size = config.get("batch_size", 256)
+        # The local (embedded) client is not meant for concurrent writers.
+        self.parallel = 1 if local else config.get("parallel", 4)
+
+    def add_documents(
+        self,
+        store: Optional[QdrantStore],
+        documents: List[Document],
+        vectors: Optional[List[List[float]]] = None,
+        session_id: Optional[str] = None
+    ) -> Tuple[QdrantStore, List[str]]:
+        if store is None:
+            store = QdrantStore(
+                self.client, self.collection_name, self.embeddings, self.batch_size, self.parallel, session_id
+            )
+        texts = [doc.page_content for doc in documents]
+        if vectors is None:
+            vectors = self.embeddings.embed_documents(texts)
+        return store, store.add_embeddings(texts, vectors, metadatas=[doc.metadata for doc in documents])
+
+
+_qdrant_backends: Dict[str, QdrantBackend] = {}
+_qdrant_backends_lock = threading.Lock()
+
+
+def create_backend(config: Optional[Dict[str, Any]], embeddings: Embeddings) -> VectorStoreBackend:
+    """Build the backend selected by `document_processing.vector_store.backend`."""
+    config = config or {}
+    backend = config.get("backend", "faiss").lower()
+    if backend == "faiss":
+        return FAISSBackend(embeddings, config.get("faiss", {}))
+    if backend == "qdrant":
+        qdrant_config = config.get("qdrant", {})
+        key = repr(sorted(qdrant_config.items()))
+        # One client per target: embedded Qdrant storage can only be opened once per process.
+        with _qdrant_backends_lock:
+            if key not in _qdrant_backends:
+                _qdrant_backends[key] = QdrantBackend(embeddings, qdrant_config)
+            return _qdrant_backends[key]
+    raise ValueError(f"Unsupported vector store backend: {backend}")
@@ -0,0 +1,52 @@
+"""Compare embedding backends on chunk throughput and parity with the PyTorch model.
+
+Usage:
+    python -m benchmarks.bench_embeddings path/to/a.pdf --backends torch onnx torch_int8 --threads 4
+"""
+import argparse
+import statistics
+import time
+from typing import List
+
+import numpy as np
+
+from app.embeddings import check_parity, get_embeddings
+from app.text_splitter import FastTextSplitter
+from benchmarks.bench_text_splitter import MODEL_NAME, load_corpus
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paths", nargs="+", help="PDF or text files forming the corpus")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "torch_int8"])
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    splitter = FastTextSplitter(chunk_size=200, chunk_overlap=20, tokenizer_name=MODEL_NAME)
+    texts: List[str] = [c.page_content for c in splitter.split_documents(load_corpus(args.paths))]
+    print(f"Corpus: {len(texts)} chunks")
+
+    reference = get_embeddings(MODEL_NAME)
+    expected = np.asarray(reference.embed_documents(texts), dtype=np.float32)
+    for backend in args.backends:
+        embeddings = get_embeddings(
+            MODEL_NAME, backend=backend, threads=args.threads, batch_size=args.batch_size, parity_threshold=None
+        )
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            actual = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+            timings.append(time.perf_counter() - start)
+        cosines = (expected * actual).sum(axis=1)
+        report = check_parity(reference, embeddings, backend)
+        print(
+            f"{backend:<12} {len(texts) / statistics.median(timings):8.1f} chunks/s  "
+            f"corpus cosine min={cosines.min():.5f} mean={cosines.mean():.5f}  "
+            f"probes {'pass' if report.passed else 'FAIL'} (min {report.min_cosine:.5f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
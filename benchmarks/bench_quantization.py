@@ -0,0 +1,98 @@
+"""Memory saved versus recall@k lost by quantized FAISS storage.
+
+Embeds a corpus with the document embedding model (or draws random unit
+vectors with --synthetic), then compares each quantization against the exact
+float32 index, with and without exact re-ranking from the float32 sidecar.
+
+Usage:
+    python -m benchmarks.bench_quantization path/to/a.pdf path/to/notes.txt --k 4 --queries 200
+    python -m benchmarks.bench_quantization --synthetic 200000 --dim 384
+"""
+import argparse
+import statistics
+import time
+from typing import List
+
+import faiss
+import numpy as np
+
+from app.quantized_index import build_index, exact_rerank, index_bytes
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def embed_corpus(paths: List[str]) -> np.ndarray:
+    from app.document_processor import DocumentProcessor
+    from app.embeddings import get_embeddings
+    from benchmarks.bench_text_splitter import load_corpus
+
+    processor = DocumentProcessor(MODEL_NAME, track_session=False)
+    chunks = processor.text_splitter.split_documents(load_corpus(paths))
+    print(f"Corpus: {len(chunks)} chunks")
+    return np.array(get_embeddings(MODEL_NAME).embed_documents([c.page_content for c in chunks]), dtype=np.float32)
+
+
+def synthetic_corpus(count: int, dim: int, seed: int = 0) -> np.ndarray:
+    # Clustered rather than uniform, closer to how real embeddings are distributed.
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(count // 200, 1), dim))
+    vectors = centers[rng.integers(len(centers), size=count)] + 0.5 * rng.normal(size=(count, dim))
+    vectors = vectors.astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    return statistics.mean(len(set(f) & set(t)) / len(t) for f, t in zip(found, truth))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paths", nargs="*", help="PDF or text files forming the corpus")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use this many random vectors instead of files")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    parser.add_argument("--pq-m", type=int, default=16)
+    args = parser.parse_args()
+
+    vectors = synthetic_corpus(args.synthetic, args.dim) if args.synthetic else embed_corpus(args.paths)
+    rng = np.random.default_rng(1)
+    # Queries are perturbed corpus vectors so every query has close neighbours.
+    queries = vectors[rng.choice(len(vectors), min(args.queries, len(vectors)), replace=False)]
+    queries = queries + 0.05 * rng.normal(size=queries.shape).astype(np.float32)
+    faiss.normalize_L2(queries)
+
+    exact = build_index(vectors.shape[1], "none")
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+    float32_bytes = index_bytes(exact)
+    print(f"Vectors: {len(vectors)} x {vectors.shape[1]}, float32 index {float32_bytes / 2 ** 20:.1f} MiB")
+    print(f"{'storage':<8} {'MiB':>8} {'saved':>7} {'recall@k':>9} {'reranked':>9} {'ms/query':>9}")
+
+    for quantization in ("none", "fp16", "int8", "pq"):
+        index = build_index(vectors.shape[1], quantization, args.pq_m)
+        if not index.is_trained:
+            index.train(vectors[rng.choice(len(vectors), min(len(vectors), 65536), replace=False)])
+        index.add(vectors)
+
+        _, approximate = index.search(queries, args.k)
+        start = time.perf_counter()
+        _, candidates = index.search(queries, args.k * args.rerank_factor)
+        reranked = []
+        for query, rows in zip(queries, candidates):
+            rows = rows[rows != -1]
+            order, _ = exact_rerank(vectors[rows], query, args.k)
+            reranked.append(rows[order])
+        elapsed = (time.perf_counter() - start) / len(queries)
+
+        size = index_bytes(index)
+        print(
+            f"{quantization:<8} {size / 2 ** 20:8.1f} {1 - size / float32_bytes:7.0%} "
+            f"{recall(approximate, truth):9.3f} {recall(reranked, truth):9.3f} {elapsed * 1000:9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
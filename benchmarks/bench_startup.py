@@ -0,0 +1,94 @@
+"""Measure the import cost of the chat page with `python -X importtime`.
+
+Reports the total import time of the modules the Streamlit entry point needs
+before the first render, the slowest imports, and which heavy dependencies
+(vector stores, embedding models, database drivers) were loaded eagerly.
+
+Usage:
+    python -m benchmarks.bench_startup --repeat 5 --top 15
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+STARTUP_CODE = "import app; from app import ChatbotManager, UIComponents; import config"
+
+# Modules that should only be imported once a feature that needs them is used.
+HEAVY_MODULES = [
+    "faiss",
+    "torch",
+    "sentence_transformers",
+    "transformers",
+    "langchain_huggingface",
+    "langchain_community.vectorstores",
+    "qdrant_client",
+    "sqlalchemy",
+    "pymongo",
+    "motor",
+    "pyarrow",
+    "fitz",
+    "pytesseract",
+]
+
+
+def measure(code: str) -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """Run `code` in a fresh interpreter and parse its `-X importtime` report.
+
+    Returns the wall-clock seconds of the run and, per module, its
+    (self, cumulative) import time in microseconds.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import time; t = time.perf_counter(); {code}; "
+                                                   "print(time.perf_counter() - t)"],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    modules = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return float(process.stdout.strip().splitlines()[-1]), modules
+
+
+def top_level(modules: Dict[str, Tuple[int, int]], top: int) -> List[Tuple[str, int]]:
+    return sorted(((name, cumulative) for name, (_, cumulative) in modules.items()), key=lambda item: -item[1])[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--code", default=STARTUP_CODE, help="Statements whose imports are measured")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--target", type=float, default=1.0, help="Import budget in seconds")
+    args = parser.parse_args()
+
+    timings = []
+    modules: Dict[str, Tuple[int, int]] = {}
+    for _ in range(args.repeat):
+        elapsed, modules = measure(args.code)
+        timings.append(elapsed)
+
+    print(f"Startup imports: {args.code}")
+    print(f"{'modules imported':<28} {len(modules):>6}")
+    print(f"{'median':<28} {statistics.median(timings) * 1000:8.1f} ms")
+    print(f"{'min':<28} {min(timings) * 1000:8.1f} ms")
+
+    print("\nSlowest imports (cumulative, last run):")
+    for name, cumulative in top_level(modules, args.top):
+        print(f"  {name:<48} {cumulative / 1000:8.1f} ms")
+
+    loaded = [name for name in HEAVY_MODULES if name in modules]
+    print(f"\nHeavy modules loaded at startup: {', '.join(loaded) if loaded else 'none'}")
+
+    median = statistics.median(timings)
+    verdict = "OK" if median <= args.target else "OVER BUDGET"
+    print(f"Target {args.target * 1000:.0f} ms: {verdict}")
+
+
+if __name__ == "__main__":
+    main()
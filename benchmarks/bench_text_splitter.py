@@ -0,0 +1,78 @@
+"""Compare FastTextSplitter against the previous RecursiveCharacterTextSplitter.
+
+Usage:
+    python -m benchmarks.bench_text_splitter path/to/a.pdf path/to/notes.txt --repeat 5
+"""
+import argparse
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
+
+from app.text_splitter import FastTextSplitter, get_tokenizer
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def load_corpus(paths: List[str]) -> List[Document]:
+    documents = []
+    for path in map(Path, paths):
+        if path.suffix.lower() == ".pdf":
+            documents.extend(PyPDFLoader(str(path)).load())
+        else:
+            documents.append(Document(page_content=path.read_text(encoding="utf-8"), metadata={"source": str(path)}))
+    return documents
+
+
+def run(name: str, split: Callable[[List[Document]], List[Document]], documents: List[Document], repeat: int) -> None:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = split(documents)
+        timings.append(time.perf_counter() - start)
+
+    tokenizer = get_tokenizer(MODEL_NAME)
+    lengths = [len(e.ids) for e in tokenizer.encode_batch([c.page_content for c in chunks], add_special_tokens=False)]
+    print(
+        f"{name:<28} chunks={len(chunks):>6}  "
+        f"median={statistics.median(timings) * 1000:8.1f} ms  "
+        f"tokens/chunk avg={statistics.mean(lengths):6.1f} max={max(lengths):4d}  "
+        f"over 256 tokens={sum(1 for n in lengths if n > 256)}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paths", nargs="+", help="PDF or text files forming the corpus")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    documents = load_corpus(args.paths)
+    print(f"Corpus: {len(documents)} pages, {sum(len(d.page_content) for d in documents)} chars")
+
+    recursive = RecursiveCharacterTextSplitter(
+        chunk_size=500,
+        chunk_overlap=50,
+        separators=["\n\n", "\n", ".", "!", "?", " ", ""],
+        length_function=len,
+    )
+    fast = FastTextSplitter(chunk_size=200, chunk_overlap=20, tokenizer_name=MODEL_NAME)
+    get_tokenizer(MODEL_NAME)  # exclude the one-off tokenizer load from timings
+
+    run("RecursiveCharacterTextSplitter", recursive.split_documents, documents, args.repeat)
+    run("FastTextSplitter", fast.split_documents, documents, args.repeat)
+
+    texts = [d.page_content for d in documents]
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        n_spans = sum(len(spans) for spans in fast.iter_spans(texts))
+        timings.append(time.perf_counter() - start)
+    print(f"{'FastTextSplitter (offsets)':<28} chunks={n_spans:>6}  median={statistics.median(timings) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
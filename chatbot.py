@@ -1,5 +1,5 @@
 import streamlit as st
-from app import ChatbotManager, UIComponents, DocumentProcessor
+from app import ChatbotManager, UIComponents
 from config import load_config
 import os
 from dotenv import load_dotenv
@@ -31,10 +31,15 @@ def initialize_session_state():
         st.session_state.chat_started = False
 
 def load_configuration():
-    """Load and validate configuration."""
+    """Load and validate configuration.
+
+    The configuration is parsed once per process and hot-reloaded when the file changes.
+    """
     try:
         config = load_config()
-        logger.info("Configuration loaded successfully")
+        if st.session_state.get("config_version") != config.version:
+            st.session_state.config_version = config.version
+            logger.info(f"Configuration version {config.version} loaded")
         return config
     except Exception as e:
         logger.error(f"Failed to load configuration: {e}")
@@ -77,7 +82,12 @@ def main():
         st.markdown("Powered by Groq")
         
         try:
-            chatbot_manager = ChatbotManager(api_keys=api_keys, config=config)
+            chatbot_manager = ChatbotManager(
+                api_keys=api_keys,
+                config=config,
+                db_manager=st.session_state.db_manager,
+                session_id=st.session_state.session_id
+            )
             ui.create_chat_interface(chatbot_manager)
             
             if not st.session_state.chat_started:
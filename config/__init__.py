@@ -1,3 +1,3 @@
-from .config import load_config
+from .config import AppConfig, ConfigError, ModelSpec, SliderSettings, load_config, reload_config
 
-__all__ = ['load_config']
+__all__ = ['AppConfig', 'ConfigError', 'ModelSpec', 'SliderSettings', 'load_config', 'reload_config']
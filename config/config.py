@@ -1,5 +1,258 @@
+import logging
+import os
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Optional
+
 import yaml
 
-def load_config():
-    with open('config/config.yaml', 'r', encoding='utf-8') as config_file:
-        return yaml.safe_load(config_file)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = 'config/config.yaml'
+
+
+class ConfigError(ValueError):
+    """Raised when the configuration file is missing required settings or has invalid values."""
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """Data class to hold one entry of the `models` section"""
+    name: str
+    context_window: int
+    description: str
+    use_cases: List[str]
+
+
+@dataclass(frozen=True)
+class SliderSettings:
+    """Data class to hold the settings of one `*_slider` section"""
+    min_value: float
+    max_value: float
+    value: float
+    step: float
+    help: str = ""
+
+    def kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for `st.slider`."""
+        return {
+            "min_value": self.min_value,
+            "max_value": self.max_value,
+            "value": self.value,
+            "step": self.step,
+            "help": self.help
+        }
+
+
+def _freeze(value: Any) -> Any:
+    """Read-only copy of a parsed YAML value: mappings become MappingProxyType, lists tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def format_model_specs(models: Dict[str, ModelSpec]) -> str:
+    """Model descriptions as listed in the model selector prompt."""
+    model_details = []
+    for model, details in models.items():
+        spec = f"- {model}:\n"
+        spec += f"  Description: {details.description.strip()}\n"
+        spec += f"  Use cases: {', '.join(details.use_cases)}\n"
+        spec += f"  Context window: {details.context_window} tokens\n"
+        model_details.append(spec)
+    return "\n".join(model_details)
+
+
+class AppConfig(Mapping):
+    """Validated, read-only view of `config.yaml` with derived data computed once.
+
+    Sections are still read like a dict (`config.get('chat_history', {})`)
+    but are read-only at every level, so one caller cannot change the shared
+    configuration under another; `models`, `routing`, `sliders` and `model_specs` are precomputed.
+    `version` increases on every successful reload so caches can key on it.
+    """
+
+    def __init__(self, data: Dict[str, Any], version: int = 1):
+        errors: List[str] = []
+        self.models = self._parse_models(data, errors)
+        self.routing = self._parse_routing(data, errors)
+        self.sliders = self._parse_sliders(data, errors)
+        self._validate_sections(data, errors)
+        if errors:
+            raise ConfigError("Invalid configuration:\n- " + "\n- ".join(errors))
+
+        self._data = _freeze(data)
+        self.version = version
+        self.model_specs = format_model_specs(self.models)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def route(self, factor: str, level: str, default: Optional[str] = None) -> Optional[str]:
+        """Model configured for `level` of a selection factor, e.g. `route('task_type', 'coding')`."""
+        model = self.routing.get(factor, {}).get(level)
+        return model if model in self.models else default
+
+    @staticmethod
+    def _parse_models(data: Dict[str, Any], errors: List[str]) -> Dict[str, ModelSpec]:
+        models = {}
+        section = data.get('models')
+        if not isinstance(section, dict) or not section:
+            errors.append("`models` must map model names to their specifications")
+            return models
+        for name, details in section.items():
+            details = details or {}
+            context_window = details.get('context_window')
+            if not isinstance(context_window, int) or context_window <= 0:
+                errors.append(f"`models.{name}.context_window` must be a positive integer")
+            if not isinstance(details.get('description'), str):
+                errors.append(f"`models.{name}.description` must be a string")
+            use_cases = details.get('use_case', [])
+            if not isinstance(use_cases, list):
+                errors.append(f"`models.{name}.use_case` must be a list")
+                use_cases = []
+            models[name] = ModelSpec(name, context_window, str(details.get('description', '')), list(use_cases))
+        return models
+
+    @staticmethod
+    def _parse_routing(data: Dict[str, Any], errors: List[str]) -> Dict[str, Dict[str, str]]:
+        """Flatten `models_selection_criteria.priority_factors` into `{factor: {level: model}}`."""
+        routing: Dict[str, Dict[str, str]] = {}
+        factors = data.get('models_selection_criteria', {}).get('priority_factors', [])
+        for entry in factors:
+            if not isinstance(entry, dict):
+                errors.append("`models_selection_criteria.priority_factors` entries must be mappings")
+                continue
+            for factor, levels in entry.items():
+                if not isinstance(levels, dict):
+                    errors.append(f"`priority_factors.{factor}` must map levels to model names")
+                    continue
+                for level, model in levels.items():
+                    if model != "any" and model not in data.get('models', {}):
+                        errors.append(f"`priority_factors.{factor}.{level}` names unknown model {model!r}")
+                routing[factor] = dict(levels)
+        return routing
+
+    @staticmethod
+    def _parse_sliders(data: Dict[str, Any], errors: List[str]) -> Dict[str, SliderSettings]:
+        sliders = {}
+        sections = {key: value for key, value in data.items() if key.endswith('_slider') or '_slider_' in key}
+        for name, parameter in data.get('additional_parameters', {}).items():
+            if 'slider' in parameter:
+                sections[name] = parameter['slider']
+        for name, section in sections.items():
+            try:
+                slider = SliderSettings(
+                    min_value=section['min_value'],
+                    max_value=section['max_value'],
+                    value=section['value'],
+                    step=section['step'],
+                    help=section.get('help', "")
+                )
+            except (KeyError, TypeError):
+                errors.append(f"`{name}` needs min_value, max_value, value and step")
+                continue
+            if not slider.min_value <= slider.value <= slider.max_value:
+                errors.append(f"`{name}.value` must lie between min_value and max_value")
+            sliders[name] = slider
+        return sliders
+
+    @staticmethod
+    def _validate_sections(data: Dict[str, Any], errors: List[str]) -> None:
+        for section in ('system_prompt', 'cot_reflection'):
+            if not isinstance(data.get(section, {}).get('value'), str):
+                errors.append(f"`{section}.value` must be a string")
+        for key in ('prompt_window', 'live_messages', 'page_size'):
+            value = data.get('chat_history', {}).get(key, 1)
+            if not isinstance(value, int) or value <= 0:
+                errors.append(f"`chat_history.{key}` must be a positive integer")
+        processing = data.get('document_processing', {})
+        if processing.get('chunk_overlap', 0) >= processing.get('chunk_size', 1):
+            errors.append("`document_processing.chunk_overlap` must be smaller than chunk_size")
+
+
+def parse_config(path: str = DEFAULT_PATH, version: int = 1) -> AppConfig:
+    with open(path, 'r', encoding='utf-8') as config_file:
+        return AppConfig(yaml.safe_load(config_file) or {}, version)
+
+
+class ConfigWatcher:
+    """Poll the configuration file and swap in a new AppConfig when it changes.
+
+    The new file is parsed and validated before the swap; an invalid edit is
+    logged and the previous configuration stays in use.
+    """
+
+    def __init__(self, path: str, config: AppConfig, interval: float = 1.0):
+        self.path = path
+        self.interval = interval
+        self._config = config
+        self._mtime = self._stat()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+
+    @property
+    def config(self) -> AppConfig:
+        return self._config
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def reload(self) -> AppConfig:
+        """Re-read the file now; returns the configuration in use afterwards."""
+        with self._lock:
+            self._mtime = self._stat()
+            try:
+                self._config = parse_config(self.path, self._config.version + 1)
+                logger.info(f"Configuration reloaded (version {self._config.version})")
+            except (OSError, yaml.YAMLError, ConfigError) as e:
+                logger.error(f"Keeping configuration version {self._config.version}: {e}")
+            return self._config
+
+    def _stat(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if self._stat() != self._mtime:
+                self.reload()
+
+
+_watcher: Optional[ConfigWatcher] = None
+_watcher_lock = threading.Lock()
+
+
+def load_config(path: str = DEFAULT_PATH) -> AppConfig:
+    """Return the process-wide configuration, parsed once and hot-reloaded on file changes."""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            config = parse_config(path)
+            settings = config.get('config_reload', {})
+            _watcher = ConfigWatcher(path, config, settings.get('interval', 1.0))
+            if settings.get('enabled', True):
+                _watcher.start()
+        return _watcher.config
+
+
+def reload_config() -> AppConfig:
+    """Force a reload of the configuration file."""
+    load_config()
+    return _watcher.reload()
@@ -0,0 +1,190 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.tools import tool
+
+from app import agent_runtime
+from app.agent_runtime import FINAL_ANSWER_PROMPT, AgentRuntime, ToolResultCache, TurnBudget
+
+
+class ScriptedModel:
+    """Chat model stand-in returning queued replies and recording the messages it saw."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = []
+        self.timeouts = []
+
+    def bind_tools(self, tools):
+        return self
+
+    def invoke(self, messages, config=None, timeout=None):
+        self.calls.append(list(messages))
+        self.timeouts.append(timeout)
+        reply = self.replies.pop(0)
+        if callable(reply):
+            return reply()
+        return reply
+
+
+def tool_call(name, call_id, **args):
+    return {"name": name, "args": args, "id": call_id, "type": "tool_call"}
+
+
+def make_tools():
+    calls = []
+
+    @tool
+    def lookup(query: str) -> str:
+        """Look a term up."""
+        calls.append(query)
+        return f"result for {query}"
+
+    @tool
+    def broken(query: str) -> str:
+        """Always fails."""
+        calls.append(query)
+        raise RuntimeError("backend down")
+
+    return [lookup, broken], calls
+
+
+def test_cache_normalizes_arguments_and_expires(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(agent_runtime.time, "monotonic", lambda: now[0])
+    tools, _ = make_tools()
+    cache = ToolResultCache(max_entries=2, ttl={"lookup": 10, "broken": 0})
+
+    key = ToolResultCache.key(tools[0], {"query": " faiss "})
+    assert key == ToolResultCache.key(tools[0], {"query": "faiss"})
+    cache.put(key, "cached")
+    assert cache.get(key) == "cached"
+    now[0] += 11
+    assert cache.get(key) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    broken_key = ToolResultCache.key(tools[1], {"query": "x"})
+    cache.put(broken_key, "never stored")
+    assert cache.get(broken_key) is None
+
+
+def test_cache_evicts_least_recently_used():
+    tools, _ = make_tools()
+    cache = ToolResultCache(max_entries=2)
+    keys = [ToolResultCache.key(tools[0], {"query": str(i)}) for i in range(3)]
+    cache.put(keys[0], "0")
+    cache.put(keys[1], "1")
+    cache.get(keys[0])
+    cache.put(keys[2], "2")
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == "0"
+
+
+def test_runtime_runs_each_distinct_call_once_and_caches_across_turns():
+    tools, calls = make_tools()
+    cache = ToolResultCache()
+    llm = ScriptedModel(
+        AIMessage(content="", tool_calls=[
+            tool_call("lookup", "1", query="faiss"),
+            tool_call("lookup", "2", query=" faiss"),
+            tool_call("broken", "3", query="x"),
+            tool_call("missing", "4", query="x"),
+        ]),
+        AIMessage(content="first answer"),
+        AIMessage(content="", tool_calls=[tool_call("lookup", "5", query="faiss"), tool_call("broken", "6", query="x")]),
+        AIMessage(content="second answer"),
+    )
+    runtime = AgentRuntime(llm, tools, {}, cache=cache)
+
+    result = runtime.run([HumanMessage(content="hi")])
+    assert result["output"] == "first answer"
+    assert [observation for _, observation in result["intermediate_steps"]] == [
+        "result for faiss", "result for faiss", "broken failed: backend down",
+        "Unknown tool 'missing'. Available tools: lookup, broken",
+    ]
+    assert result["budget"]["steps"] == 2 and result["budget"]["stop_reason"] is None
+
+    assert runtime.run([HumanMessage(content="again")])["output"] == "second answer"
+    # The successful lookup is served from the cache; the failure is retried.
+    assert sorted(calls) == ["faiss", "x", "x"]
+
+
+def test_exhausted_budget_asks_for_a_final_answer_without_tools():
+    tools, _ = make_tools()
+    llm = ScriptedModel(
+        AIMessage(content="", tool_calls=[tool_call("lookup", "1", query="faiss")]),
+        AIMessage(content="final answer"),
+    )
+    result = AgentRuntime(llm, tools, {"agent": {"max_steps": 1}}).run([HumanMessage(content="hi")])
+    assert result["output"] == "final answer"
+    assert result["budget"]["stop_reason"] == "steps"
+    final_prompt = llm.calls[-1][-1]
+    assert isinstance(final_prompt, SystemMessage) and final_prompt.content == FINAL_ANSWER_PROMPT
+
+
+def clocked_runtime(llm, tools, now):
+    """Runtime with a 60 s budget (10 s reserved for the final answer) started on the fake clock."""
+    runtime = AgentRuntime(llm, tools, {})
+    runtime.new_budget = lambda: TurnBudget(max_seconds=60, max_tokens=12000, max_steps=8, reserve_seconds=10, started=now[0])
+    return runtime
+
+
+def test_model_calls_get_a_timeout_from_the_time_budget(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(agent_runtime.time, "monotonic", lambda: now[0])
+    tools, _ = make_tools()
+
+    def slow_step():
+        now[0] += 55
+        return AIMessage(content="", tool_calls=[tool_call("lookup", "1", query="faiss")])
+
+    llm = ScriptedModel(slow_step, AIMessage(content="final answer"))
+    result = clocked_runtime(llm, tools, now).run([HumanMessage(content="hi")])
+
+    # The step may use the budget minus the reserve; the final answer gets what is left.
+    assert llm.timeouts == [50, 5]
+    assert result["output"] == "final answer"
+    assert result["budget"]["stop_reason"] == "time"
+
+
+def test_step_timeout_falls_back_to_the_final_answer(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(agent_runtime.time, "monotonic", lambda: now[0])
+    tools, _ = make_tools()
+
+    def timed_out():
+        now[0] += 50
+        raise TimeoutError("request timed out")
+
+    llm = ScriptedModel(timed_out, AIMessage(content="final answer"))
+    result = clocked_runtime(llm, tools, now).run([HumanMessage(content="hi")])
+
+    assert result["output"] == "final answer"
+    assert result["budget"]["stop_reason"] == "time"
+    assert llm.timeouts == [50, 10]
+
+
+def test_no_time_left_skips_the_final_answer_call(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(agent_runtime.time, "monotonic", lambda: now[0])
+    tools, _ = make_tools()
+
+    def overran():
+        now[0] += 70
+        return AIMessage(content="", tool_calls=[tool_call("lookup", "1", query="faiss")])
+
+    llm = ScriptedModel(overran)
+    result = clocked_runtime(llm, tools, now).run([HumanMessage(content="hi")])
+
+    assert result["output"] == agent_runtime.OUT_OF_TIME_ANSWER
+    assert len(llm.calls) == 1
+
+
+def test_errors_within_the_time_budget_are_raised():
+    tools, _ = make_tools()
+
+    def failed():
+        raise RuntimeError("rate limited")
+
+    llm = ScriptedModel(failed)
+    with pytest.raises(RuntimeError, match="rate limited"):
+        AgentRuntime(llm, tools, {}).run([HumanMessage(content="hi")])
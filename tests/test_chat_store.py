@@ -0,0 +1,58 @@
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.chat_store import ChatStore, ChatStoreHistory
+
+
+def fill(store, session_id, count):
+    for i in range(count):
+        store.append(session_id, "user" if i % 2 == 0 else "assistant", f"message {i}")
+
+
+def test_sequence_numbers_continue_after_reopening(tmp_path):
+    path = tmp_path / "chats" / "history.db"
+    store = ChatStore(path)
+    assert [store.append("a", "user", "first"), store.append("a", "assistant", "second")] == [0, 1]
+    assert store.append("b", "user", "other session") == 0
+
+    reopened = ChatStore(path)
+    assert reopened.count("a") == 2
+    assert reopened.append("a", "user", "third") == 2
+    assert [message["content"] for message in reopened.range("a", 0, 3)] == ["first", "second", "third"]
+
+
+def test_range_and_window_bounds(tmp_path):
+    store = ChatStore(tmp_path / "history.db")
+    fill(store, "a", 5)
+
+    assert [message["content"] for message in store.range("a", 1, 3)] == ["message 1", "message 2"]
+    assert store.range("a", 3, 3) == []
+    assert len(store.range("a", 0, 100)) == 5
+    assert [message["content"] for message in store.window("a", 2)] == ["message 3", "message 4"]
+    assert len(store.window("a", 10)) == 5
+    assert store.window("missing", 10) == []
+
+
+def test_clear_removes_only_one_session(tmp_path):
+    store = ChatStore(tmp_path / "history.db")
+    fill(store, "a", 3)
+    fill(store, "b", 2)
+
+    store.clear("a")
+    assert store.count("a") == 0 and store.range("a", 0, 10) == []
+    assert store.count("b") == 2
+    assert [session["session_id"] for session in store.sessions()] == ["b"]
+    # A cleared session starts numbering again from zero.
+    assert store.append("a", "user", "again") == 0
+
+
+def test_history_reads_a_window_of_typed_messages(tmp_path):
+    store = ChatStore(tmp_path / "history.db")
+    history = ChatStoreHistory(store, "a", window=2)
+    history.add_messages([HumanMessage(content="question"), AIMessage(content="answer"), HumanMessage(content="follow-up")])
+
+    assert store.count("a") == 3
+    assert [(type(message), message.content) for message in history.messages] == [
+        (AIMessage, "answer"), (HumanMessage, "follow-up")
+    ]
+    history.clear()
+    assert history.messages == [] and store.count("a") == 0
@@ -0,0 +1,42 @@
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.concurrent_faiss import ConcurrentFAISS
+from app.docstore import CompactDocstore
+from app.metadata_filter import DocumentFilter
+
+TEXTS = [f"chunk number {i}" for i in range(12)]
+
+
+@pytest.fixture
+def store():
+    return ConcurrentFAISS.from_texts(
+        TEXTS,
+        DeterministicFakeEmbedding(size=16),
+        metadatas=[{"file_name": f"file{i % 2}.pdf", "page_number": i} for i in range(len(TEXTS))],
+        docstore=CompactDocstore(),
+        normalize_L2=True
+    )
+
+
+@pytest.mark.parametrize("doc_filter", [None, DocumentFilter(file_names=("file1.pdf",))])
+def test_mmr_scores_are_each_documents_relevance(store, doc_filter):
+    query = TEXTS[3]
+    picked = store.max_marginal_relevance_search_with_relevance_scores(query, k=4, fetch_k=12, filter=doc_filter)
+    relevance = {
+        doc.page_content: score
+        for doc, score in store.similarity_search_with_relevance_scores(query, k=len(TEXTS))
+    }
+
+    assert len(picked) == 4
+    for doc, score in picked:
+        assert score == pytest.approx(relevance[doc.page_content], abs=1e-5)
+    if doc_filter is not None:
+        assert {doc.metadata["file_name"] for doc, _ in picked} == {"file1.pdf"}
+
+
+def test_exact_match_is_the_most_relevant_pick(store):
+    picked = store.max_marginal_relevance_search_with_relevance_scores(TEXTS[5], k=3, fetch_k=12)
+    best_doc, best_score = max(picked, key=lambda pair: pair[1])
+    assert best_doc.page_content == TEXTS[5]
+    assert best_score == pytest.approx(1.0)
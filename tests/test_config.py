@@ -0,0 +1,75 @@
+import os
+import time
+
+import pytest
+import yaml
+
+from config.config import DEFAULT_PATH, ConfigError, ConfigWatcher, parse_config
+
+
+@pytest.fixture
+def settings():
+    with open(DEFAULT_PATH, encoding="utf-8") as config_file:
+        return yaml.safe_load(config_file)
+
+
+def write_config(path, settings):
+    path.write_text(yaml.safe_dump(settings), encoding="utf-8")
+
+
+def test_bad_model_spec_is_rejected(tmp_path, settings):
+    settings["models"]["llama-3.1-8b-instant"]["context_window"] = "large"
+    path = tmp_path / "config.yaml"
+    write_config(path, settings)
+
+    with pytest.raises(ConfigError, match="llama-3.1-8b-instant.context_window"):
+        parse_config(str(path))
+
+
+def test_sections_are_read_only(tmp_path, settings):
+    path = tmp_path / "config.yaml"
+    write_config(path, settings)
+    config = parse_config(str(path))
+
+    with pytest.raises(TypeError):
+        config["chat_history"]["page_size"] = 1
+    with pytest.raises(TypeError):
+        config["models"]["llama-3.1-8b-instant"]["use_case"][0] = "anything"
+    assert config.get("chat_history", {}).get("page_size") == settings["chat_history"]["page_size"]
+
+
+def test_edit_swaps_in_a_new_version(tmp_path, settings):
+    path = tmp_path / "config.yaml"
+    write_config(path, settings)
+    watcher = ConfigWatcher(str(path), parse_config(str(path)), interval=0.01)
+    before = watcher.config
+    watcher.start()
+    try:
+        settings["chat_history"]["page_size"] = before["chat_history"]["page_size"] + 1
+        write_config(path, settings)
+        # Move the mtime forward so the edit is seen even on coarse filesystem clocks.
+        mtime = os.stat(path).st_mtime_ns + 1_000_000_000
+        os.utime(path, ns=(mtime, mtime))
+
+        deadline = time.monotonic() + 5
+        while watcher.config is before and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        watcher.stop()
+
+    assert watcher.config is not before
+    assert watcher.config.version == before.version + 1
+    assert watcher.config["chat_history"]["page_size"] == before["chat_history"]["page_size"] + 1
+
+
+def test_invalid_edit_keeps_the_previous_version(tmp_path, settings):
+    path = tmp_path / "config.yaml"
+    write_config(path, settings)
+    watcher = ConfigWatcher(str(path), parse_config(str(path)))
+    before = watcher.config
+
+    settings["chat_history"]["page_size"] = 0
+    write_config(path, settings)
+
+    assert watcher.reload() is before
+    assert watcher.config.version == before.version
@@ -0,0 +1,124 @@
+import json
+
+import pytest
+from qdrant_client.http import models as qdrant_models
+
+from app import database_manager
+from app.database_manager import DatabaseManager, SQLDatabaseManager
+
+
+def connect_local_qdrant(**params):
+    manager = DatabaseManager("qdrant", params)
+    manager.create_connection()
+    client = manager.manager.connection
+    client.create_collection(
+        "notes", vectors_config=qdrant_models.VectorParams(size=2, distance=qdrant_models.Distance.COSINE)
+    )
+    client.upsert("notes", points=[
+        qdrant_models.PointStruct(id=1, vector=[1.0, 0.0], payload={"topic": "a"}),
+        qdrant_models.PointStruct(id=2, vector=[0.0, 1.0], payload={"topic": "b"}),
+    ])
+    return manager
+
+
+def test_async_query_on_in_memory_qdrant_sees_the_sync_clients_data():
+    manager = connect_local_qdrant(url=":memory:")
+    points = manager.submit_query(json.dumps({"collection": "notes", "vector": [1.0, 0.1], "limit": 1})).result(10)
+    assert [point.id for point in points] == [1]
+    manager.disconnect()
+
+
+def test_async_query_on_embedded_qdrant_path_does_not_reopen_storage(tmp_path):
+    manager = connect_local_qdrant(path=str(tmp_path / "qdrant"))
+    query = json.dumps({"collection": "notes", "vectors": [[1.0, 0.0], [0.0, 1.0]], "limit": 1})
+    responses = manager.submit_query(query).result(10)
+    assert [[point.id for point in points] for points in responses] == [[1], [2]]
+    assert manager.manager.async_connection is None
+    manager.disconnect()
+
+
+def test_read_only_stream_rejects_writes_and_releases_the_guard(tmp_path):
+    manager = SQLDatabaseManager("sqlite", {"file_path": str(tmp_path / "guards.db")})
+    manager.connect()
+    manager.query("CREATE TABLE notes (id INTEGER)")
+
+    with pytest.raises(Exception, match="readonly"):
+        with manager.stream_query("INSERT INTO notes VALUES (1)", read_only=True) as stream:
+            stream.read_all()
+
+    manager.query("INSERT INTO notes VALUES (2)")
+    with manager.stream_query("SELECT id FROM notes", read_only=True) as stream:
+        assert stream.read_all().to_pylist() == [{"id": 2}]
+    manager.disconnect()
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = database_manager.EngineRegistry(pool_size=2, max_overflow=1)
+    monkeypatch.setattr(database_manager, "engine_registry", registry)
+    return registry
+
+
+def connect_sqlite(path):
+    manager = SQLDatabaseManager("sqlite", {"file_path": str(path)})
+    manager.connect()
+    return manager
+
+
+def test_sessions_share_one_engine_per_normalized_url(registry, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    relative = connect_sqlite("shared.db")
+    absolute = connect_sqlite(tmp_path / "shared.db")
+    other = connect_sqlite(tmp_path / "other.db")
+
+    assert relative.engine is absolute.engine
+    assert relative.engine_key == absolute.engine_key
+    assert other.engine is not relative.engine
+    assert registry.stats(relative.engine_key)["sessions"] == 2
+    # Credentials are part of the key, so different users never share a pool.
+    assert registry.normalize("postgresql://alice:one@db/app") != registry.normalize("postgresql://alice:two@db/app")
+    assert registry.normalize("postgresql://alice:one@db/app") != registry.normalize("postgresql://bob:one@db/app")
+
+
+def test_engine_is_disposed_when_the_last_session_releases_it(registry, tmp_path, monkeypatch):
+    first = connect_sqlite(tmp_path / "shared.db")
+    second = connect_sqlite(tmp_path / "shared.db")
+    key, engine = first.engine_key, first.engine
+    disposed = []
+    monkeypatch.setattr(engine, "dispose", lambda: disposed.append(engine))
+
+    first.disconnect()
+    assert not disposed
+    assert registry.stats(key)["sessions"] == 1
+
+    second.disconnect()
+    assert disposed == [engine]
+    assert registry.stats(key) == {}
+    registry.release(key)  # Releasing an unknown key is a no-op.
+
+    third = connect_sqlite(tmp_path / "shared.db")
+    assert third.engine is not engine
+    third.disconnect()
+
+
+def test_pool_stats_report_checkouts_and_wait_times(registry, tmp_path):
+    manager = DatabaseManager("sqlite", {"file_path": str(tmp_path / "stats.db")})
+    sql = manager.create_connection()
+    key = sql.engine_key
+
+    with sql.checkout():
+        stats = manager.get_connection_info()["pool"]
+        assert stats["sessions"] == 1
+        assert stats["checked_out"] == 1
+        assert stats["utilization"] == pytest.approx(1 / 3)
+        # One checkout to verify the connection, one held here.
+        assert stats["checkouts"] == 2
+
+    registry.record_wait(key, 0.5)
+    stats = sql.pool_status()
+    assert stats["checked_out"] == 0
+    assert stats["checkouts"] == 3
+    assert stats["max_wait_ms"] == pytest.approx(500)
+    assert 0 < stats["avg_wait_ms"] <= stats["max_wait_ms"]
+    manager.disconnect()
+    assert sql.pool_status() == {}
@@ -0,0 +1,79 @@
+import pickle
+
+import pytest
+from langchain_core.documents import Document
+
+from app.docstore import CompactDocstore
+
+SHARED = {"file_name": "report.pdf", "file_type": "application/pdf", "processing_timestamp": "2024-05-01T10:00:00"}
+
+
+def chunks():
+    return {
+        f"id-{i}": Document(
+            page_content=f"chunk {i} – ünïcode",
+            metadata={**SHARED, "page_number": i // 2, "start_index": (i % 2) * 20, "chunk_index": i}
+        )
+        for i in range(4)
+    }
+
+
+def test_documents_round_trip_with_shared_metadata_interned():
+    docstore = CompactDocstore()
+    docstore.add(chunks())
+    doc = docstore.search("id-3")
+    assert doc.id == "id-3"
+    assert doc.page_content == "chunk 3 – ünïcode"
+    assert doc.metadata == {**SHARED, "page_number": 1, "start_index": 20, "chunk_index": 3}
+    assert docstore.stats()["metadata_groups"] == 1
+    assert docstore.search("missing") == "ID missing not found."
+
+
+def test_unhashable_metadata_and_deletes():
+    docstore = CompactDocstore()
+    docstore.add({"a": Document(page_content="text", metadata={"tags": ["x", "y"], "page": True})})
+    assert docstore.search("a").metadata == {"tags": ["x", "y"], "page": True}
+
+    with pytest.raises(ValueError):
+        docstore.add({"a": Document(page_content="again")})
+    docstore.delete(["a"])
+    assert "a" not in docstore and len(docstore) == 0
+    with pytest.raises(ValueError):
+        docstore.delete(["a"])
+
+
+def test_page_rows_and_offsets_group_sibling_chunks():
+    docstore = CompactDocstore()
+    docstore.add(chunks())
+    row = docstore.row("id-2")
+    assert docstore.page_rows(row) == [docstore.row("id-2"), docstore.row("id-3")]
+    assert docstore.offsets(docstore.row("id-3")) == (20, 20 + len("chunk 3 – ünïcode"))
+    assert docstore.metadata(row)["page_number"] == 1
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_pickle_keeps_text(tmp_path, on_disk):
+    docstore = CompactDocstore(str(tmp_path / "chunks.blob") if on_disk else None)
+    docstore.add(chunks())
+    restored = pickle.loads(pickle.dumps(docstore))
+    restored.add({"id-new": Document(page_content="appended")})
+    assert restored.search("id-1").page_content == "chunk 1 – ünïcode"
+    assert restored.search("id-new").page_content == "appended"
+
+
+def test_transcript_chunks_share_one_metadata_group():
+    pytest.importorskip("streamlit")
+    from app.document_processor import DocumentProcessor
+    from app.text_splitter import FastTextSplitter
+    from app.transcription import Transcript, TranscriptSegment
+
+    processor = DocumentProcessor.__new__(DocumentProcessor)
+    processor.text_splitter = FastTextSplitter(chunk_size=40, chunk_overlap=5, tokenizer_name=None)
+    segments = [TranscriptSegment(i * 2.5, i * 2.5 + 2.25, f"Speaker line {i}.") for i in range(300)]
+    result = processor.load_transcript(Transcript("hash", 750.0, segments), "meeting.mp3", "audio/mpeg")
+
+    docstore = CompactDocstore()
+    docstore.add({f"id-{i}": chunk for i, chunk in enumerate(result.chunks)})
+    assert len(result.chunks) > 100
+    assert docstore.stats()["metadata_groups"] == 1
+    assert docstore.search("id-7").metadata == result.chunks[7].metadata
@@ -0,0 +1,21 @@
+import sys
+import types
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app import embeddings
+
+
+def test_backend_errors_fall_back_to_torch(monkeypatch):
+    def broken_backend(*args):
+        raise RuntimeError("ONNX export failed")
+
+    torch_backend = types.SimpleNamespace(HuggingFaceEmbeddings=lambda **kwargs: DeterministicFakeEmbedding(size=4))
+    monkeypatch.setitem(sys.modules, "langchain_huggingface", torch_backend)
+    monkeypatch.setattr(embeddings, "SentenceTransformerEmbeddings", broken_backend)
+    embeddings.get_embeddings.cache_clear()
+    try:
+        fallback = embeddings.get_embeddings("test-model", backend="onnx")
+    finally:
+        embeddings.get_embeddings.cache_clear()
+    assert isinstance(fallback, DeterministicFakeEmbedding)
@@ -0,0 +1,128 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+pytest.importorskip("streamlit")
+
+from app import ingestion
+from app.document_processor import ProcessingResult
+from app.ingestion import INTERRUPTED_ERROR, IngestionJob, IngestionQueue, JobStatus, JobStore
+from app.vector_backends import FAISSBackend
+
+
+class TextProcessor:
+    """Indexes each uploaded text file as a single chunk."""
+
+    def __init__(self, config=None, track_session=False):
+        self.embeddings = DeterministicFakeEmbedding(size=8)
+        self.backend = FAISSBackend(self.embeddings)
+        self.shared_corpus = None
+
+    def load_file(self, path, file_name, file_type, api_key=None):
+        return ProcessingResult(success=True, chunks=[Document(page_content=Path(path).read_text())], metadata={})
+
+
+@dataclass
+class Upload:
+    name: str
+    data: bytes
+    type: str = "text/plain"
+
+    def getvalue(self):
+        return self.data
+
+
+def make_queue(tmp_path, monkeypatch, **settings):
+    monkeypatch.setattr(ingestion, "DocumentProcessor", TextProcessor)
+    config = {"document_processing": {"ingestion": {"data_dir": str(tmp_path), "max_workers": 1, **settings}}}
+    return IngestionQueue(config)
+
+
+def ingest(queue, session_id, text):
+    queue.submit(session_id, Upload(f"{text}.txt", text.encode()))
+    queue._executor.submit(lambda: None).result()
+
+
+def test_restart_requeues_shared_jobs_and_fails_private_ones(tmp_path):
+    store = JobStore(tmp_path / "jobs.db")
+    for job_id, status, shared in [
+        ("shared", JobStatus.RUNNING, True),
+        ("private-running", JobStatus.RUNNING, False),
+        ("private-queued", JobStatus.QUEUED, False),
+        ("private-done", JobStatus.DONE, False),
+    ]:
+        store.add(IngestionJob(job_id, "old-session", f"{job_id}.pdf", "application/pdf",
+                               str(tmp_path / job_id), shared=shared, status=status))
+
+    requeued, orphaned = store.requeue_interrupted()
+
+    assert requeued == ["shared"]
+    assert sorted(job.job_id for job in orphaned) == ["private-queued", "private-running"]
+    for job_id in ("private-queued", "private-running"):
+        job = store.get(job_id)
+        assert (job.status, job.error) == (JobStatus.FAILED, INTERRUPTED_ERROR)
+    assert store.get("private-done").status == JobStatus.DONE
+
+
+def test_least_recently_used_session_index_is_evicted(tmp_path, monkeypatch):
+    queue = make_queue(tmp_path, monkeypatch, max_sessions=2)
+    for session_id in ("a", "b"):
+        ingest(queue, session_id, session_id)
+    assert queue.vector_store("a") is not None  # "b" is now the least recently used
+
+    ingest(queue, "c", "c")
+
+    assert queue.vector_store("b") is None
+    assert queue.vector_store("a") is not None
+    assert queue.vector_store("c") is not None
+
+
+def test_idle_session_index_expires_and_is_reattached_on_upload(tmp_path, monkeypatch):
+    queue = make_queue(tmp_path, monkeypatch, store_ttl=0)
+    ingest(queue, "a", "first")
+    store = queue._stores["a"][0]
+    queue.release("a")
+    assert queue.vector_store("a") is None
+
+    queue.submit("a", Upload("second.txt", b"second"), store=store)
+    queue._executor.submit(lambda: None).result()
+
+    assert sorted(doc.page_content for doc in store.similarity_search("x", k=5)) == ["first", "second"]
+
+
+def test_failed_upload_cleanup_keeps_the_finished_job(tmp_path, monkeypatch):
+    queue = make_queue(tmp_path, monkeypatch)
+    unlink = Path.unlink
+
+    def locked_upload(path, missing_ok=False):
+        if path.parent == queue.files_dir:
+            raise PermissionError("file is locked")
+        return unlink(path, missing_ok=missing_ok)
+
+    monkeypatch.setattr(Path, "unlink", locked_upload)
+    ingest(queue, "a", "kept")
+
+    job, = queue.jobs("a")
+    assert (job.status, job.error) == (JobStatus.DONE, None)
+    assert [doc.page_content for doc in queue.vector_store("a").similarity_search("x", k=5)] == ["kept"]
+
+
+def test_cancel_during_the_last_batch_is_forgotten_once_done(tmp_path, monkeypatch):
+    queue = make_queue(tmp_path, monkeypatch)
+    index_batch = queue._index_batch
+
+    def cancel_mid_batch(session_id, batch):
+        job, = queue.jobs(session_id)
+        queue.cancel(job.job_id)
+        return index_batch(session_id, batch)
+
+    monkeypatch.setattr(queue, "_index_batch", cancel_mid_batch)
+    ingest(queue, "a", "late")
+
+    job, = queue.jobs("a")
+    assert job.status == JobStatus.DONE
+    assert not queue._cancelled
+    assert not Path(job.file_path).exists()
@@ -0,0 +1,18 @@
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.docstore import CompactDocstore
+from app.metadata_filter import DocumentFilter, get_metadata_index
+
+
+def test_sync_reads_compact_metadata_without_building_documents(monkeypatch):
+    metadatas = [{"file_name": name, "file_type": "application/pdf", "page_number": page}
+                 for name, page in (("a.pdf", 1), ("b.pdf", 2), ("a.pdf", 3))]
+    store = FAISS.from_texts(
+        ["one", "two", "three"], DeterministicFakeEmbedding(size=8), metadatas=metadatas, docstore=CompactDocstore()
+    )
+    monkeypatch.setattr(store.docstore, "search", lambda doc_id: (_ for _ in ()).throw(AssertionError(doc_id)))
+
+    index = get_metadata_index(store)
+    assert index.mask(DocumentFilter(file_names=("a.pdf",))).tolist() == [True, False, True]
+    assert index.mask(DocumentFilter(page_range=(2, 3))).tolist() == [False, True, True]
@@ -0,0 +1,101 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fitz
+import pytest
+from langchain_core.documents import Document
+
+from app import ocr_processor
+from app.ocr_processor import OCRProcessor
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    """Run OCR in threads with a fake Tesseract; returns the list of OCRed page labels."""
+    calls = []
+
+    def ocr_image(png_bytes, language, tesseract_config, timeout=0):
+        label = f"page-{len(calls)}"
+        calls.append(tesseract_config)
+        if tesseract_config == "--slow":
+            time.sleep(0.5)
+        return f"text of {label} ({tesseract_config})", 0.25
+
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(ocr_processor, "_ocr_image", ocr_image)
+    monkeypatch.setattr(ocr_processor, "_get_executor", lambda max_workers: executor)
+    monkeypatch.setattr(ocr_processor, "_cache", None)
+    yield calls
+    executor.shutdown(wait=True)
+
+
+def scanned_pdf(tmp_path, count=3):
+    path = tmp_path / "scan.pdf"
+    with fitz.open() as pdf:
+        for i in range(count):
+            page = pdf.new_page()
+            page.draw_rect(fitz.Rect(50 + 40 * i, 50, 80 + 40 * i, 80), fill=(0, 0, 0))
+        pdf.save(str(path))
+    return path
+
+
+def pages(*texts):
+    return [Document(page_content=text, metadata={"page": i}) for i, text in enumerate(texts)]
+
+
+def test_find_textless_pages_uses_the_threshold():
+    processor = OCRProcessor({"min_text_chars": 5})
+    assert processor.find_textless_pages(pages("", "  abcd  ", "abcde", "\n")) == [0, 1, 3]
+
+
+def test_textless_pages_are_replaced_in_place_and_cached(tmp_path, fake_ocr):
+    path = scanned_pdf(tmp_path)
+    processor = OCRProcessor({"dpi": 30, "tesseract_config": "--psm 6"})
+    docs = pages("", "a page with plenty of extracted text", "")
+
+    results = processor.fill_textless_pages(path, docs)
+    assert [r.page_number for r in results] == [0, 2]
+    assert not any(r.cached or r.error for r in results)
+    assert docs[0].page_content.startswith("text of") and docs[0].metadata["ocr"]
+    assert "ocr" not in docs[1].metadata
+
+    again = processor.fill_textless_pages(path, pages("", "a page with plenty of extracted text", ""))
+    assert [r.cached for r in again] == [True, True]
+    assert [r.text for r in again] == [r.text for r in results]
+    assert len(fake_ocr) == 2
+
+    other_config = OCRProcessor({"dpi": 30, "tesseract_config": "--psm 11"})
+    assert not any(r.cached for r in other_config.fill_textless_pages(path, pages("", "", "")))
+
+
+def test_timeout_is_reported_as_an_error(tmp_path, fake_ocr):
+    path = scanned_pdf(tmp_path, count=1)
+    processor = OCRProcessor({"dpi": 30, "tesseract_config": "--slow", "page_timeout": 0.05})
+    docs = pages("")
+    result, = processor.fill_textless_pages(path, docs)
+    assert (result.error, result.text, result.duration) == ("OCR timed out", "", 0.05)
+    assert docs[0].page_content == "" and "ocr" not in docs[0].metadata
+
+
+def test_summarize_reports_per_page_timings():
+    results = [
+        ocr_processor.OCRPageResult(0, "a", "text", 1.23456),
+        ocr_processor.OCRPageResult(2, "b", "cached", 0.0, cached=True),
+        ocr_processor.OCRPageResult(3, "c", "", 5.0, error="OCR timed out"),
+    ]
+    summary = OCRProcessor.summarize(results)
+    assert summary == {
+        "ocr_pages": 3,
+        "ocr_cached_pages": 1,
+        "ocr_failed_pages": 1,
+        "ocr_total_time": 6.23456,
+        "ocr_page_timings": {1: 1.235, 3: 0.0, 4: 5.0},
+    }
+
+
+def test_executors_of_other_sizes_keep_running():
+    small = ocr_processor._get_executor(1)
+    large = ocr_processor._get_executor(2)
+    assert ocr_processor._get_executor(1) is small
+    assert small is not large
+    assert small.submit(sum, [1, 2]).result(timeout=30) == 3
@@ -0,0 +1,44 @@
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.docstore import CompactDocstore
+from app.parent_retrieval import ParentExpander
+from app.text_splitter import FastTextSplitter
+
+PAGE = " ".join(f"Sentence number {i} of the page." for i in range(30))
+METADATA = {"file_name": "a.pdf", "file_type": "application/pdf", "processing_timestamp": "2024-05-01T10:00:00"}
+
+
+def child_store():
+    page = Document(page_content=PAGE, metadata={**METADATA, "page": 0, "page_number": 0})
+    children = FastTextSplitter(chunk_size=60, chunk_overlap=10, tokenizer_name=None).split_documents([page])
+    store = FAISS.from_documents(children, DeterministicFakeEmbedding(size=8), docstore=CompactDocstore())
+    docs = [store.docstore.search(doc_id) for doc_id in store.index_to_docstore_id.values()]
+    return store, docs
+
+
+def test_children_of_one_page_merge_into_the_page():
+    store, docs = child_store()
+    parents = ParentExpander({"parent": "page"}).expand(store, [(docs[3], 0.9), (docs[10], 0.7)])
+    assert len(parents) == 1
+    parent, score = parents[0]
+    assert score == 0.9
+    assert parent.page_content == PAGE
+    assert parent.metadata["child_hits"] == 2 and parent.metadata["parent"]
+
+
+def test_window_parent_stitches_whole_neighbour_chunks():
+    store, docs = child_store()
+    child = docs[8]
+    (parent, _), = ParentExpander({"parent": "window", "window_chars": 70}).expand(store, [(child, 0.5)])
+    start, end = parent.metadata["start_index"], parent.metadata["end_index"]
+    assert parent.page_content == PAGE[start:end]
+    assert start < child.metadata["start_index"] and end > child.metadata["end_index"]
+    assert end - start < len(PAGE)
+
+
+def test_documents_without_offsets_pass_through():
+    store, _ = child_store()
+    loose = Document(page_content="from another store", metadata={})
+    assert ParentExpander({}).expand(store, [(loose, 0.3)]) == [(loose, 0.3)]
@@ -0,0 +1,47 @@
+from langchain_core.documents import Document
+
+from app.prompt_packer import PromptPacker
+
+
+def packer(context_window, **settings):
+    config = {
+        "models": {"tiny": {"context_window": context_window}},
+        # No tokenizer: counts use the chars/4 estimate, so the test needs no download.
+        "prompt_packer": {"tokenizer": None, "output_tokens": 0, "history_share": 0.0, **settings},
+    }
+    return PromptPacker(config)
+
+
+def chunk(text, file_name="a.pdf", page=0, start=None):
+    metadata = {"file_name": file_name, "page_number": page}
+    if start is not None:
+        metadata.update({"start_index": start, "end_index": start + len(text)})
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_context_is_filled_by_descending_relevance():
+    scored = [(chunk("low " * 20, page=1), 0.2), (chunk("high " * 20, page=2), 0.9), (chunk("mid " * 20, page=3), 0.5)]
+    # Room for two of the three chunks.
+    packed = packer(70).pack("tiny", "", "q", scored, [])
+
+    assert packed.chunks_used == 2
+    assert packed.chunks_dropped == 1
+    assert packed.context.index("high") < packed.context.index("mid")
+    assert "low" not in packed.context
+
+
+def test_adjacent_chunks_are_merged_without_repeating_the_overlap():
+    scored = [(chunk("abcdefgh", start=0), 0.9), (chunk("efghijkl", start=4), 0.8)]
+    packed = packer(1000).pack("tiny", "", "q", scored, [])
+
+    assert packed.chunks_used == 2
+    assert packed.context.endswith("abcdefghijkl")
+
+
+def test_history_keeps_the_most_recent_messages_within_its_share():
+    history = [{"role": "user", "content": f"message {i} " * 10} for i in range(10)]
+    packed = packer(400, history_share=0.5).pack("tiny", "", "q", [], history)
+
+    assert packed.chat_history == history[-len(packed.chat_history):]
+    assert 0 < len(packed.chat_history) < len(history)
+    assert packed.token_usage["history"] <= 200
@@ -0,0 +1,60 @@
+import gc
+import pickle
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.docstore import CompactDocstore
+from app.quantized_index import QuantizedFAISS
+
+embeddings = DeterministicFakeEmbedding(size=16)
+texts = [f"chunk {i}" for i in range(12)]
+
+
+def build(settings=None, **kwargs):
+    store = QuantizedFAISS.create(embeddings, 16, {"quantization": "fp16", **(settings or {})}, CompactDocstore())
+    store._normalize_L2 = kwargs.get("normalize_L2", False)
+    store.add_embeddings(zip(texts, embeddings.embed_documents(texts)), metadatas=[{"i": i} for i in range(len(texts))])
+    return store
+
+
+def test_search_reranks_to_exact_distances():
+    store = build()
+    assert store.is_quantized
+    query = embeddings.embed_query("chunk 3")
+    doc, distance = store.similarity_search_with_score_by_vector(query, k=1)[0]
+    assert doc.page_content == "chunk 3"
+    assert distance < 1e-6
+
+
+def test_mmr_normalizes_the_query_like_similarity_search():
+    store = build(normalize_L2=True)
+    query = (np.asarray(embeddings.embed_query("chunk 5")) * 10).tolist()
+    (similar, distance), = store.similarity_search_with_score_by_vector(query, k=1)
+    (mmr, mmr_distance), = store.max_marginal_relevance_search_with_score_by_vector(query, k=1, fetch_k=4)
+    assert similar.page_content == mmr.page_content == "chunk 5"
+    assert abs(distance - mmr_distance) < 1e-5
+
+
+def test_merge_from_appends_vectors_and_documents():
+    store = build()
+    other = FAISS.from_texts(["merged text"], embeddings, metadatas=[{"i": 99}], ids=["merged"])
+    store.merge_from(other)
+    assert len(store.sidecar) == store.index.ntotal == len(texts) + 1
+    doc, distance = store.similarity_search_with_score_by_vector(embeddings.embed_query("merged text"), k=1)[0]
+    assert (doc.id, doc.metadata) == ("merged", {"i": 99})
+    assert distance < 1e-6
+
+
+def test_sidecar_file_is_deleted_with_its_store(tmp_path):
+    store = build({"sidecar_dir": str(tmp_path)})
+    copy = pickle.loads(pickle.dumps(store.sidecar))
+    assert len(list(tmp_path.glob("*.f32"))) == 2
+
+    del store
+    gc.collect()
+    assert len(list(tmp_path.glob("*.f32"))) == 1
+    assert copy.vectors([0]).shape == (1, 16)
+    copy.close()
+    assert not list(tmp_path.glob("*.f32"))
@@ -0,0 +1,68 @@
+import sys
+import types
+
+import pytest
+from langchain_core.documents import Document
+
+from app.reranker import CrossEncoderReranker
+
+SCORES = {"faiss": 0.9, "qdrant": 0.7, "sqlite": 0.4, "pandas": 0.1}
+
+
+class FakeCrossEncoder:
+    """Cross-encoder stand-in scoring a chunk by its text and recording each batch."""
+
+    def __init__(self, model_name, max_length=512, device=None):
+        self.batches = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=None):
+        self.batches.append([text for _, text in pairs])
+        return [SCORES[text] for _, text in pairs]
+
+
+@pytest.fixture
+def make_reranker(monkeypatch):
+    monkeypatch.setitem(sys.modules, "sentence_transformers", types.SimpleNamespace(CrossEncoder=FakeCrossEncoder))
+    return lambda **kwargs: CrossEncoderReranker("fake-cross-encoder", **kwargs)
+
+
+def docs(*texts):
+    return [Document(page_content=text) for text in texts]
+
+
+def test_repeated_query_scores_only_new_chunks_in_one_batch(make_reranker):
+    reranker = make_reranker()
+    assert reranker.score("which vector store?", docs("faiss", "qdrant")) == [0.9, 0.7]
+
+    # Whitespace differences hash to the same query.
+    assert reranker.score("which  vector store? ", docs("qdrant", "sqlite", "faiss", "pandas")) == [0.7, 0.4, 0.9, 0.1]
+    assert reranker.model.batches == [["faiss", "qdrant"], ["sqlite", "pandas"]]
+    assert (reranker.hits, reranker.misses) == (2, 4)
+
+
+def test_duplicate_chunks_are_scored_once(make_reranker):
+    reranker = make_reranker()
+    assert reranker.score("q", docs("faiss", "sqlite", "faiss")) == [0.9, 0.4, 0.9]
+    assert reranker.model.batches == [["faiss", "sqlite"]]
+
+
+def test_least_recently_used_scores_are_evicted(make_reranker):
+    reranker = make_reranker(cache_size=2)
+    reranker.score("q", docs("faiss", "qdrant"))
+    reranker.score("q", docs("faiss"))
+    reranker.score("q", docs("sqlite"))
+
+    reranker.score("q", docs("faiss", "qdrant", "sqlite"))
+    assert reranker.model.batches[-1] == ["qdrant"]
+
+
+def test_rerank_applies_min_score_then_top_n(make_reranker):
+    reranker = make_reranker()
+    documents = docs("sqlite", "faiss", "pandas", "qdrant")
+
+    ranked = reranker.rerank("q", documents, top_n=2)
+    assert [(doc.page_content, score) for doc, score in ranked] == [("faiss", 0.9), ("qdrant", 0.7)]
+
+    ranked = reranker.rerank("q", documents, top_n=5, min_score=0.4)
+    assert [doc.page_content for doc, _ in ranked] == ["faiss", "qdrant", "sqlite"]
+    assert reranker.rerank("q", documents, top_n=3, min_score=0.95) == []
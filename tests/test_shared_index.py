@@ -0,0 +1,44 @@
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.shared_index import LayeredVectorStore, SharedCorpus
+
+embeddings = DeterministicFakeEmbedding(size=8)
+
+
+def test_snapshot_is_cached_until_a_new_generation_is_published(tmp_path):
+    reader, writer = SharedCorpus(str(tmp_path), embeddings), SharedCorpus(str(tmp_path), embeddings)
+    writer.append([Document(page_content="alpha")])
+    first = reader.snapshot()
+    assert first.generation == 1
+    assert reader.snapshot() is first
+
+    writer.append([Document(page_content="beta")])
+    assert reader.snapshot().generation == 2
+
+
+def test_snapshot_rereads_current_when_its_generation_was_pruned(tmp_path):
+    reader, writer = SharedCorpus(str(tmp_path), embeddings), SharedCorpus(str(tmp_path), embeddings)
+    writer.append([Document(page_content="alpha")])
+    load = reader._load
+
+    def publish_twice_then_load(generation, mmap):
+        if generation == 1:
+            writer.append([Document(page_content="beta")])
+            writer.append([Document(page_content="gamma")])
+        return load(generation, mmap)
+
+    reader._load = publish_twice_then_load
+    snapshot = reader.snapshot()
+    assert snapshot.generation == 3
+    assert snapshot.store.index.ntotal == 3
+
+
+def test_from_texts_builds_a_searchable_layered_store(tmp_path):
+    store = LayeredVectorStore.from_texts(
+        ["alpha", "beta"], embeddings, metadatas=[{"n": 1}, {"n": 2}], path=str(tmp_path)
+    )
+    store.add_texts(["gamma"])
+    results = store.similarity_search("beta", k=3)
+    assert [doc.page_content for doc in results][0] == "beta"
+    assert {doc.page_content for doc in results} == {"alpha", "beta", "gamma"}
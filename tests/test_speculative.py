@@ -0,0 +1,64 @@
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+
+from app.speculative import SpeculativeAnswerer, speculation_stats
+
+
+class ScriptedModel:
+    """Chat model stand-in answering with a fixed text, or failing."""
+
+    def __init__(self, model_name, text=None, error=None):
+        self.model_name = model_name
+        self.text = text
+        self.error = error
+
+    def stream(self, messages):
+        for word in self.text.split(" "):
+            yield AIMessageChunk(content=word + " ")
+
+    def invoke(self, messages):
+        if self.error:
+            raise self.error
+        return AIMessage(content=self.text)
+
+
+def answer(draft, final=None, error=None):
+    updates = []
+    answerer = SpeculativeAnswerer(
+        ScriptedModel("llama-3.1-8b-instant", draft),
+        ScriptedModel("llama-3.3-70b-versatile", final, error),
+        DeterministicFakeEmbedding(size=16)
+    )
+    return answerer.answer([HumanMessage(content="capital of France?")], on_update=updates.append), updates
+
+
+def test_agreeing_draft_is_kept():
+    drafts = speculation_stats.snapshot()["drafts"]
+    result, updates = answer("The capital is Paris", "the capital is paris.")
+    assert (result.upgraded, result.similarity) == (False, 1.0)
+    assert result.output == updates[-1] == "The capital is Paris "
+    assert result.model == "llama-3.1-8b-instant"
+    assert speculation_stats.snapshot()["drafts"] == drafts + 1
+
+
+def test_disagreeing_draft_is_replaced():
+    result, updates = answer("The capital is Lyon", "Paris is the capital of France.")
+    assert result.upgraded
+    assert result.output == updates[-1] == "Paris is the capital of France."
+    assert result.draft == "The capital is Lyon "
+    assert result.model == "llama-3.3-70b-versatile"
+
+
+def test_strong_model_failure_keeps_the_streamed_draft():
+    drafts = speculation_stats.snapshot()["drafts"]
+    result, updates = answer("The capital is Paris", error=RuntimeError("503 from provider"))
+    assert not result.upgraded
+    assert result.output == updates[-1] == "The capital is Paris "
+    assert "" not in updates
+    assert speculation_stats.snapshot()["drafts"] == drafts
+
+
+def test_strong_model_failure_without_a_draft_is_raised():
+    with pytest.raises(RuntimeError):
+        answer("", error=RuntimeError("503 from provider"))
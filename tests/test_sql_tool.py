@@ -0,0 +1,27 @@
+import pytest
+
+sql_tool = pytest.importorskip("app.sql_tool")
+validate_read_only = sql_tool.SQLQueryTool.validate_read_only
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT REPLACE(name, 'a', 'b') FROM users",
+    'SELECT "update", `delete` FROM audit',
+    "SELECT 'drop table users; --' AS note",
+    "SELECT upper(replace(name, 'x', 'y')) FROM users -- update later",
+    "WITH recent AS (SELECT * FROM orders) SELECT count(*) FROM recent",
+])
+def test_read_only_accepts_selects_mentioning_write_keywords(sql):
+    validate_read_only(sql)
+
+
+@pytest.mark.parametrize("sql, message", [
+    ("DELETE FROM users", "Only SELECT"),
+    ("SELECT 1; DROP TABLE users", "single statement"),
+    ("WITH gone AS (DELETE FROM users RETURNING *) SELECT * FROM gone", "DELETE"),
+    ("WITH a AS (SELECT 1) UPDATE users SET name = 'x'", "UPDATE"),
+    ("SELECT * INTO backup FROM users", "INTO"),
+])
+def test_read_only_rejects_writes_in_statement_position(sql, message):
+    with pytest.raises(ValueError, match=message):
+        validate_read_only(sql)
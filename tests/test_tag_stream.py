@@ -0,0 +1,28 @@
+from app.tag_stream import TagStreamParser
+
+
+def parse(chunks, tags=("thinking", "reflection", "output")):
+    parser = TagStreamParser(tags)
+    events = [event for chunk in chunks for event in parser.feed(chunk)] + parser.close()
+    sections = {}
+    for section, text in events:
+        sections[section] = sections.get(section, "") + text
+    return sections, parser
+
+
+def test_tags_split_across_chunks_route_text_to_their_section():
+    text = "<thinking>plan<reflection>check</reflection> more</thinking><output>answer</output>"
+    for size in (1, 2, 7, len(text)):
+        sections, parser = parse([text[i:i + size] for i in range(0, len(text), size)])
+        assert sections == {"thinking": "plan more", "reflection": "check", "output": "answer"}
+        assert parser.seen == {"thinking", "reflection", "output"}
+
+
+def test_unknown_tags_and_comparisons_stay_in_the_text():
+    sections, _ = parse(["<output>a < b and <b>bold</b> <out", "put</output>"])
+    assert sections == {"output": "a < b and <b>bold</b> <output"}
+
+
+def test_held_back_prefix_is_flushed_on_close():
+    sections, _ = parse(["done <outp"])
+    assert sections == {None: "done <outp"}
@@ -0,0 +1,59 @@
+import pytest
+from langchain_core.documents import Document
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import Whitespace
+
+from app import text_splitter
+from app.text_splitter import FastTextSplitter
+
+TEXT = (
+    "The first paragraph talks about retrieval. It has two sentences.\n\n"
+    "The second paragraph is about chunking text. Chunks should end on boundaries.\n\n"
+    "A third paragraph closes the document."
+)
+
+
+def test_short_text_is_one_chunk():
+    splitter = FastTextSplitter(chunk_size=500, chunk_overlap=10, tokenizer_name=None)
+    assert splitter.split_spans(TEXT) == [text_splitter.ChunkSpan(0, len(TEXT), len(TEXT))]
+    assert splitter.split_spans("") == []
+
+
+def test_chunks_respect_size_and_prefer_strong_boundaries():
+    splitter = FastTextSplitter(chunk_size=90, chunk_overlap=15, tokenizer_name=None)
+    spans = splitter.split_spans(TEXT)
+    assert len(spans) > 1
+    assert all(span.end - span.start <= 90 for span in spans)
+    assert spans[0].text(TEXT).endswith("\n\n")
+    assert spans[-1].end == len(TEXT)
+    for previous, span in zip(spans, spans[1:]):
+        assert previous.start < span.start <= previous.end
+        assert TEXT[span.start - 1].isspace()
+
+
+def test_split_documents_records_offsets_into_the_page():
+    splitter = FastTextSplitter(chunk_size=90, chunk_overlap=15, tokenizer_name=None)
+    chunks = splitter.split_documents([Document(page_content=TEXT, metadata={"page": 3})])
+    for chunk in chunks:
+        assert chunk.metadata["page"] == 3
+        assert TEXT[chunk.metadata["start_index"]:chunk.metadata["end_index"]] == chunk.page_content
+
+
+def test_token_mode_counts_tokenizer_tokens(monkeypatch):
+    words = sorted(set(TEXT.replace(".", " . ").split()))
+    tokenizer = Tokenizer(WordLevel({word: i for i, word in enumerate(words, 1)} | {"[UNK]": 0}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    monkeypatch.setattr(text_splitter, "get_tokenizer", lambda name: tokenizer)
+
+    splitter = FastTextSplitter(chunk_size=12, chunk_overlap=2, tokenizer_name="word-level")
+    spans = splitter.split_spans(TEXT)
+    assert len(spans) > 1
+    for span in spans:
+        assert span.token_count <= 12
+        assert len(tokenizer.encode(span.text(TEXT), add_special_tokens=False).ids) == span.token_count
+
+
+def test_overlap_must_be_smaller_than_chunk_size():
+    with pytest.raises(ValueError):
+        FastTextSplitter(chunk_size=10, chunk_overlap=10, tokenizer_name=None)
@@ -0,0 +1,71 @@
+import numpy as np
+
+from app.transcription import (
+    SAMPLE_RATE, AudioSegment, StubBackend, Transcriber, TranscriptSegment, encode_wav, plan_segments
+)
+
+# Speech-like tone bursts separated by short silences at ~10 s and ~20 s.
+SPEECH = [(0.0, 9.6), (10.4, 19.7), (20.3, 25.0)]
+
+
+def synthetic_audio():
+    samples = np.zeros(int(25.0 * SAMPLE_RATE), dtype=np.int16)
+    for start, end in SPEECH:
+        t = np.arange(int(start * SAMPLE_RATE), int(end * SAMPLE_RATE))
+        samples[t] = (8000 * np.sin(2 * np.pi * 220 * t / SAMPLE_RATE)).astype(np.int16)
+    return samples
+
+
+class CountingStub(StubBackend):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def transcribe(self, wav_bytes, language=None):
+        self.calls += 1
+        return super().transcribe(wav_bytes, language)
+
+
+def test_plan_segments_cuts_in_silence():
+    samples = synthetic_audio()
+    segments = plan_segments(samples, segment_seconds=10, overlap_seconds=1, search_seconds=2)
+    assert len(segments) == 3
+    for segment, silence in zip(segments, [(9.6, 10.4), (19.7, 20.3)]):
+        assert silence[0] <= segment.own_end / SAMPLE_RATE <= silence[1]
+        assert segment.end - segment.own_end == SAMPLE_RATE
+    assert (segments[0].start, segments[-1].end) == (0, len(samples))
+    assert plan_segments(np.zeros(0, dtype=np.int16)) == []
+
+
+def test_stitch_keeps_each_overlapped_piece_once():
+    second = 10 * SAMPLE_RATE
+    segments = [
+        AudioSegment(0, start=0, end=11 * SAMPLE_RATE, own_start=0, own_end=second),
+        AudioSegment(1, start=9 * SAMPLE_RATE, end=20 * SAMPLE_RATE, own_start=second, own_end=20 * SAMPLE_RATE),
+    ]
+    results = {
+        0: [TranscriptSegment(1.0, 4.0, "first"), TranscriptSegment(9.5, 10.2, "boundary")],
+        1: [TranscriptSegment(0.5, 1.2, "boundary"), TranscriptSegment(5.0, 8.0, "second")],
+    }
+    stitched = Transcriber._stitch(segments, results)
+    assert [(piece.start, piece.end, piece.text) for piece in stitched] == [
+        (1.0, 4.0, "first"), (9.5, 10.2, "boundary"), (14.0, 17.0, "second")
+    ]
+
+
+def test_transcription_is_stitched_and_cached(tmp_path):
+    backend = CountingStub()
+    settings = {"segment_seconds": 10, "overlap_seconds": 1, "search_seconds": 2, "cache_dir": str(tmp_path)}
+    transcriber = Transcriber({"transcription": settings}, backend=backend)
+    data = encode_wav(synthetic_audio())
+
+    transcript = transcriber.transcribe(data)
+    assert not transcript.cached
+    assert transcript.duration == 25.0
+    assert [(round(piece.start, 1), round(piece.end, 1)) for piece in transcript.segments] == SPEECH
+    assert backend.calls == 3
+
+    again = transcriber.transcribe(data)
+    assert again.cached
+    assert again.segments == transcript.segments
+    assert backend.calls == 3
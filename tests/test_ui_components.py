@@ -0,0 +1,34 @@
+import pytest
+
+pytest.importorskip("streamlit")
+
+from app.ui_components import history_pages
+
+
+def test_no_older_messages_means_no_pages():
+    pages = history_pages(message_count=15, live_messages=20, page_size=10, pages_requested=3)
+    assert (pages.older_count, pages.pages_shown, pages.first_shown, pages.bounds) == (0, 0, 0, [])
+
+
+def test_collapsed_history_hides_every_older_message():
+    pages = history_pages(message_count=45, live_messages=20, page_size=10, pages_requested=0)
+    assert pages.older_count == 25
+    assert pages.first_shown == 25
+    assert pages.bounds == []
+
+
+def test_only_the_last_page_is_partial():
+    pages = history_pages(message_count=45, live_messages=20, page_size=10, pages_requested=1)
+    assert pages.bounds == [(2, 20, 25)]
+    assert pages.first_shown == 20
+
+    pages = history_pages(message_count=45, live_messages=20, page_size=10, pages_requested=2)
+    assert pages.bounds == [(1, 10, 20), (2, 20, 25)]
+    assert pages.first_shown == 10
+
+
+def test_requesting_more_pages_than_exist_shows_them_all():
+    pages = history_pages(message_count=45, live_messages=20, page_size=10, pages_requested=7)
+    assert pages.pages_shown == 3
+    assert pages.first_shown == 0
+    assert pages.bounds == [(0, 0, 10), (1, 10, 20), (2, 20, 25)]
@@ -0,0 +1,60 @@
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from qdrant_client import QdrantClient
+
+from app.metadata_filter import DocumentFilter
+from app.vector_backends import QdrantBackend, create_backend
+
+DIM = 16
+
+
+def make_backend():
+    return QdrantBackend(DeterministicFakeEmbedding(size=DIM), {"collection": "documents"})
+
+
+def documents(file_name, count=3):
+    return [
+        Document(page_content=f"{file_name} chunk {i}", metadata={"file_name": file_name, "page_number": i})
+        for i in range(count)
+    ]
+
+
+def test_sessions_cannot_see_each_others_points():
+    backend = make_backend()
+    alice, alice_ids = backend.add_documents(None, documents("alice.pdf"), session_id="alice")
+    bob, _ = backend.add_documents(None, documents("bob.pdf"), session_id="bob")
+
+    assert {doc.metadata["file_name"] for doc in alice.similarity_search("chunk", k=10)} == {"alice.pdf"}
+    assert {doc.metadata["file_name"] for doc in bob.similarity_search("chunk", k=10)} == {"bob.pdf"}
+    assert {
+        doc.metadata["file_name"] for doc in bob.max_marginal_relevance_search("chunk", k=10, fetch_k=10)
+    } == {"bob.pdf"}
+    # A filter naming another session's file cannot widen the scope.
+    assert bob.similarity_search("chunk", k=10, filter=DocumentFilter(file_names=("alice.pdf",))) == []
+
+    # Deleting another session's ids through this store is a no-op.
+    bob.delete(alice_ids)
+    assert len(alice.similarity_search("chunk", k=10)) == 3
+
+
+def test_store_without_session_gets_a_private_scope():
+    backend = make_backend()
+    first, _ = backend.add_documents(None, documents("first.pdf"))
+    second, _ = backend.add_documents(None, documents("second.pdf"))
+
+    assert first.session_id != second.session_id
+    assert {doc.metadata["file_name"] for doc in second.similarity_search("chunk", k=10)} == {"second.pdf"}
+
+
+def test_delete_removes_own_points():
+    store, ids = make_backend().add_documents(None, documents("notes.pdf"), session_id="carol")
+    store.delete(ids[:2])
+    assert [doc.id for doc in store.similarity_search("chunk", k=10)] == ids[2:]
+
+
+def test_create_backend_reuses_one_client_per_target():
+    embeddings = DeterministicFakeEmbedding(size=DIM)
+    config = {"backend": "qdrant", "qdrant": {"collection": "shared_target"}}
+    backend = create_backend(config, embeddings)
+    assert create_backend(config, embeddings) is backend
+    assert isinstance(backend.client, QdrantClient)